@@ -0,0 +1,129 @@
+#! /usr/bin/env python3
+
+import shutil
+import pytest
+from pathlib import Path
+from lxml import etree
+
+SAMPLE_DATA = Path(__file__).resolve().parent.parent / "sample_data"
+
+# Smallest sample map still large enough for partial re-conversions and several tiles
+INTEGRATION_MAP = SAMPLE_DATA / "CARLA" / "Town02_no_georef.xodr"
+
+
+def buildOSM(nodes: list[dict], ways: list[tuple], relations: list[tuple] = ()) -> etree.Element:
+    """
+    Small <osm> tree laid out like the downsampled output: ways, relations, then nodes.
+
+    Params
+    ------
+        nodes: list[dict], node attributes, "tags" holding (k, v) pairs.
+        ways: list of (way_id, node_refs, tags).
+        relations: list of (relation_id, [(type, ref, role)], tags).
+    """
+
+    osm_root = etree.Element("osm", version = "0.6", upload = "true", generator = "VMB")
+    for way_id, node_refs, tags in ways:
+        way = etree.SubElement(osm_root, "way", id = str(way_id), action = "modify", visible = "true", version = "1")
+        for k, v in tags:
+            etree.SubElement(way, "tag", k = k, v = v)
+        for ref in node_refs:
+            etree.SubElement(way, "nd", ref = str(ref))
+    for relation_id, members, tags in relations:
+        relation = etree.SubElement(
+            osm_root, "relation", id = str(relation_id), action = "modify", visible = "true", version = "1"
+        )
+        for member_type, ref, role in members:
+            etree.SubElement(relation, "member", type = member_type, ref = str(ref), role = role)
+        for k, v in tags:
+            etree.SubElement(relation, "tag", k = k, v = v)
+    for node in nodes:
+        node = dict(node)
+        tags = node.pop("tags", ())
+        elem = etree.SubElement(osm_root, "node", {k: str(v) for k, v in node.items()})
+        for k, v in tags:
+            etree.SubElement(elem, "tag", k = k, v = v)
+
+    return osm_root
+
+
+@pytest.fixture(scope = "session")
+def converted_map(tmp_path_factory) -> dict:
+    """
+    Full batch conversion of INTEGRATION_MAP, shared by the integration tests.
+    """
+
+    pytest.importorskip("crdesigner")
+    from utils.batch import convertFile, outputPaths
+    from utils.mapping import readIdMappingCSV
+
+    output_dir = tmp_path_factory.mktemp("full")
+    times = convertFile(str(INTEGRATION_MAP), str(output_dir))
+    assert times is not None, f"Conversion of {INTEGRATION_MAP} failed"
+
+    paths = outputPaths(INTEGRATION_MAP, output_dir)
+
+    return {
+        "output_dir": output_dir,
+        "osm_path": paths["osm"],
+        "osm_root": etree.parse(str(paths["osm"])).getroot(),
+        "mapping_rows": readIdMappingCSV(paths["mapping"]),
+    }
+
+
+@pytest.fixture(scope = "session")
+def converted_model():
+    """
+    Converter's OSM model of INTEGRATION_MAP, before downsampling.
+    """
+
+    pytest.importorskip("crdesigner")
+    from crdesigner.common.config.opendrive_config import OpenDriveConfig
+    from utils.conversion import PROJ_MET, prepConversionCRS, convertOpenDriveWithMapping, convertToOSMLanelet
+
+    scenario, _ = convertOpenDriveWithMapping(str(INTEGRATION_MAP), OpenDriveConfig())
+    scenario.location = prepConversionCRS(PROJ_MET)
+
+    return convertToOSMLanelet(scenario)
+
+
+@pytest.fixture
+def xodr_copy(tmp_path) -> Path:
+    """
+    Editable copy of INTEGRATION_MAP.
+    """
+
+    path = tmp_path / "input" / INTEGRATION_MAP.name
+    path.parent.mkdir()
+    shutil.copy(INTEGRATION_MAP, path)
+
+    return path
+
+
+def laneGeometry(osm_root: etree.Element, mapping_rows: list) -> dict:
+    """
+    (road, section, lane) -> coordinate tags of every way of its lanelet, in member order.
+    Independent of element IDs, so outputs numbered differently compare equal.
+    """
+
+    ways = {way.get("id"): way for way in osm_root.iterfind("way")}
+    relations = {relation.get("id"): relation for relation in osm_root.iterfind("relation")}
+    nodes = {
+        node.get("id"): tuple((tag.get("k"), tag.get("v")) for tag in node.iterfind("tag"))
+        for node in osm_root.iterfind("node")
+    }
+
+    return {
+        tuple(row[ : 3]): [
+            [nodes[nd.get("ref")] for nd in ways[member.get("ref")].iterfind("nd")]
+            for member in relations[str(row[3])].iterfind("member[@type='way']")
+        ]
+        for row in mapping_rows
+    }
+
+
+def danglingRefs(osm_root: etree.Element) -> int:
+
+    ids = {child.get("id") for child in osm_root}
+
+    return sum(ref.get("ref") not in ids for ref in osm_root.iter("nd", "member"))
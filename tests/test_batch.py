@@ -0,0 +1,83 @@
+#! /usr/bin/env python3
+
+import shutil
+import pytest
+from conftest import SAMPLE_DATA
+
+pytest.importorskip("crdesigner")
+
+from lxml import etree
+from crdesigner.common.config.opendrive_config import OpenDriveConfig
+from utils.batch import runBatch, convertFile, outputPaths
+from utils.instrument import FileRecord, osmCounts
+from utils.writer import OSMOutputOptions
+
+SMALL_MAP = SAMPLE_DATA / "esmini" / "straight_500m.xodr"
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_failing_file_does_not_stop_batch(workers, tmp_path):
+    """
+    An error escaping convertFile (here the cache hashing a directory) is recorded
+    as a failed file, whatever the worker count.
+    """
+
+    input_dir = tmp_path / "input"
+    (input_dir / "maps").mkdir(parents = True)
+    shutil.copy(SMALL_MAP, input_dir / "maps" / SMALL_MAP.name)
+    (input_dir / "maps" / "broken.xodr").mkdir()
+
+    process_time_log = runBatch(
+        str(input_dir),
+        str(tmp_path / "output"),
+        set_list = ["maps"],
+        workers = workers,
+        cache_dir = str(tmp_path / "cache")
+    )
+
+    assert process_time_log["maps"]["broken.xodr"] is None
+    assert process_time_log["maps"][SMALL_MAP.name] is not None
+    assert (tmp_path / "output" / "processing_times_log.csv").exists()
+
+
+@pytest.mark.parametrize("sampling", ["dense", "analytic"])
+def test_chord_tolerance_leaves_config(sampling, tmp_path):
+    """
+    crdesigner config attributes are process-wide, convertFile must not set them.
+    """
+
+    error_tolerance = OpenDriveConfig().error_tolerance
+    assert convertFile(str(SMALL_MAP), str(tmp_path), sampling = sampling, chord_tolerance = 0.5) is not None
+
+    assert OpenDriveConfig().error_tolerance == error_tolerance
+
+
+@pytest.mark.parametrize("output_options", [None, OSMOutputOptions(pretty_print = False, metric_decimals = 3)])
+def test_streamed_output_matches_tree_output(output_options, tmp_path):
+    """
+    Streamed output, fresh conversion and cache hit, is the same file as the one
+    written from the downsampled tree, which the binary map asks for.
+    """
+
+    def convert(output_dir, **kwargs) -> tuple[bytes, list[dict]]:
+        output_dir.mkdir()
+        record = FileRecord(SMALL_MAP)
+        with record.activate():
+            assert convertFile(str(SMALL_MAP), str(output_dir), output_options = output_options, **kwargs) is not None
+        osm_path = outputPaths(SMALL_MAP, output_dir)["osm"]
+        if (output_options is not None):
+            osm_path = osm_path.with_suffix(output_options.suffix)
+        return osm_path.read_bytes(), record.stages
+
+    expected, tree_stages = convert(tmp_path / "tree", binary_map = True)
+    fresh, fresh_stages = convert(tmp_path / "fresh", cache_dir = tmp_path / "cache")
+    cached, cached_stages = convert(tmp_path / "cached", cache_dir = tmp_path / "cache")
+
+    assert fresh == expected
+    assert cached == expected
+    assert "serialization" in [entry["stage"] for entry in tree_stages]
+    assert cached_stages[0]["output"] == {"hit": True}
+    for stages in (fresh_stages, cached_stages):
+        streamed = [entry for entry in stages if entry["stage"] == "downsampling_serialization"]
+        assert len(streamed) == 1
+        assert {k: streamed[0]["output"][k] for k in ("nodes", "ways", "relations")} == osmCounts(etree.fromstring(expected))
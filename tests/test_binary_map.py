@@ -0,0 +1,116 @@
+#! /usr/bin/env python3
+
+import io
+import numpy as np
+import pytest
+from lxml import etree
+from conftest import buildOSM
+from utils.writer import writeOSM
+from utils.binary_map import BinaryMap, writeBinaryMap, osmToArrays
+
+
+def serialized(osm_root: etree.Element) -> bytes:
+    """
+    What the writer makes of a tree: indentation is not part of the binary map.
+    """
+
+    buffer = io.BytesIO()
+    writeOSM(osm_root, buffer)
+
+    return buffer.getvalue()
+
+
+def roundTrip(osm_root: etree.Element, compressed: bool = False) -> BinaryMap:
+
+    buffer = io.BytesIO()
+    writeBinaryMap(osm_root, buffer, compressed = compressed)
+    buffer.seek(0)
+
+    return BinaryMap.load(buffer)
+
+
+def sampleTree() -> etree.Element:
+    """
+    Lanelet with a regulatory element: local_x/local_y only nodes as the batch writes
+    them, one node with lat/lon and unusual precision, a way without tags.
+    """
+
+    nodes = [
+        {"id": 1000000, "action": "modify", "visible": "true", "version": "1", "lat": "", "lon": "",
+         "tags": [("ele", "0.0000"), ("local_x", "0.0000"), ("local_y", "-1.7500")]},
+        {"id": 1000001, "action": "modify", "visible": "true", "version": "1", "lat": "", "lon": "",
+         "tags": [("ele", "0.0000"), ("local_x", "49.5000"), ("local_y", "-1.7500")]},
+        {"id": 1000002, "action": "modify", "visible": "true", "version": "1", "lat": "", "lon": "",
+         "tags": [("ele", "1.2500"), ("local_x", "0.0000"), ("local_y", "1.7500")]},
+        {"id": 1000003, "action": "modify", "visible": "true", "version": "1",
+         "lat": "0.00001571954", "lon": "0.000444", "tags": [("ele", "1.25")]},
+    ]
+    ways = [
+        (8001, [1000000, 1000001], [("type", "line_thin"), ("subtype", "solid")]),
+        (8002, [1000002, 1000003], [("type", "line_thin"), ("subtype", "dashed")]),
+        (8004, [1000001, 1000003], []),
+    ]
+    relations = [
+        (8003, [("way", 8002, "left"), ("way", 8001, "right"), ("relation", 8005, "regulatory_element")],
+         [("type", "lanelet"), ("subtype", "road"), ("one_way", "yes")]),
+        (8005, [("way", 8004, "ref_line")], [("type", "regulatory_element"), ("subtype", "speed_limit")]),
+    ]
+
+    return buildOSM(nodes, ways, relations)
+
+
+@pytest.mark.parametrize("compressed", [False, True])
+def test_round_trip(compressed):
+
+    osm_root = sampleTree()
+    binary_map = roundTrip(osm_root, compressed)
+
+    assert serialized(binary_map.toOSM()) == serialized(osm_root)
+
+
+def test_typed_columns():
+
+    binary_map = roundTrip(sampleTree())
+
+    assert binary_map.node_ids.tolist() == [1000000, 1000001, 1000002, 1000003]
+    assert np.allclose(binary_map.node_local_xy[ : 3], [(0.0, -1.75), (49.5, -1.75), (0.0, 1.75)])
+    assert np.isnan(binary_map.node_latlon[0]).all()
+    assert binary_map.node_ele.tolist() == [0.0, 0.0, 1.25, 1.25]
+
+    # Way nodes and relation members point at rows of the typed arrays
+    assert binary_map.node_ids[binary_map.wayNodeRows(0)].tolist() == [1000000, 1000001]
+    assert binary_map.relationMembers(0) == [("way", 1, "left"), ("way", 0, "right"), ("relation", 1, "regulatory_element")]
+    assert binary_map.tags("relation", 0) == {"type": "lanelet", "subtype": "road", "one_way": "yes"}
+
+
+def test_rejects_unknown_content():
+
+    osm_root = sampleTree()
+    etree.SubElement(osm_root, "bounds")
+
+    with pytest.raises(ValueError):
+        osmToArrays(osm_root)
+
+
+def test_round_trip_converted_map(converted_map, tmp_path):
+
+    osm_root = converted_map["osm_root"]
+    binary_path = tmp_path / "converted.npz"
+    writeBinaryMap(osm_root, binary_path)
+
+    assert serialized(BinaryMap.load(binary_path).toOSM()) == serialized(osm_root)
+
+
+def test_rounded_write_leaves_tree():
+    """
+    convertFile writes the rounded OSM before the binary map, from the same tree.
+    """
+
+    osm_root = sampleTree()
+    before = etree.tostring(osm_root)
+    expected = serialized(osm_root)
+
+    writeOSM(osm_root, io.BytesIO(), pretty_print = False, latlon_decimals = 2, metric_decimals = 1)
+
+    assert etree.tostring(osm_root) == before
+    assert serialized(roundTrip(osm_root).toOSM()) == expected
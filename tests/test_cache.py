@@ -0,0 +1,104 @@
+#! /usr/bin/env python3
+
+import os
+import pytest
+from lxml import etree
+from conftest import SAMPLE_DATA, buildOSM
+from utils.cache import ConversionCache
+
+SMALL_MAP = SAMPLE_DATA / "esmini" / "straight_500m.xodr"
+MAPPING_ROWS = [("1", "0", "-1", 1000), ("1", "0", "1", 1001)]
+
+
+class Config:
+    """
+    Stand-in for a crdesigner config, without attributes.
+    """
+
+
+def storeEntry(cache: ConversionCache, input_file, num_nodes: int = 1) -> str:
+
+    key = cache.key(input_file, Config(), Config(), "+proj=utm +zone=32")
+    predown_osm = buildOSM([{"id": i + 1, "lat": "0.0", "lon": "0.0"} for i in range(num_nodes)], [])
+    cache.store(key, {"scenario": str(input_file)}, predown_osm, MAPPING_ROWS, input_file)
+
+    return key
+
+
+def test_key_follows_inputs(tmp_path):
+
+    cache = ConversionCache(tmp_path / "cache")
+    xodr_path = tmp_path / "map.xodr"
+    xodr_path.write_text("<OpenDRIVE/>")
+
+    key = cache.key(xodr_path, Config(), Config(), "+proj=utm +zone=32")
+    assert cache.key(xodr_path, Config(), Config(), "+proj=utm +zone=32") == key
+    assert cache.key(xodr_path, Config(), Config(), "+proj=utm +zone=33") != key
+    assert cache.key(xodr_path, Config(), Config(), "+proj=utm +zone=32", "analytic", 0.15) != key
+    assert (
+        cache.key(xodr_path, Config(), Config(), "+proj=utm +zone=32", "analytic", 0.15) !=
+        cache.key(xodr_path, Config(), Config(), "+proj=utm +zone=32", "analytic", 0.05)
+    )
+
+    xodr_path.write_text("<OpenDRIVE><road/></OpenDRIVE>")
+    assert cache.key(xodr_path, Config(), Config(), "+proj=utm +zone=32") != key
+
+
+def test_store_load_invalidate(tmp_path):
+
+    cache = ConversionCache(tmp_path / "cache")
+    xodr_path = tmp_path / "map.xodr"
+    xodr_path.write_text("<OpenDRIVE/>")
+
+    assert cache.load("0" * 64) is None
+
+    key = storeEntry(cache, xodr_path, num_nodes = 3)
+    cached = cache.load(key)
+    assert cached.scenario == {"scenario": str(xodr_path)}
+    assert len(cached.predown_osm.findall("node")) == 3
+    assert cached.mapping_rows == MAPPING_ROWS
+
+    assert cache.invalidate(input_file = xodr_path) == 1
+    assert cache.load(key) is None
+    assert cache.invalidate(key = key) == 0
+
+
+def test_evicts_least_recently_used(tmp_path):
+
+    cache = ConversionCache(tmp_path / "cache")
+    keys = []
+    for i in range(3):
+        xodr_path = tmp_path / f"map_{i}.xodr"
+        xodr_path.write_text(f"<OpenDRIVE name='{i}'/>")
+        keys.append(storeEntry(cache, xodr_path, num_nodes = 50))
+        # Distinct access times, oldest first
+        os.utime(cache.cache_dir / keys[-1] / "meta.json", (1000 + i, 1000 + i))
+
+    # Reading the oldest entry makes it the most recently used
+    assert cache.load(keys[0]) is not None
+    sizes = {key: size_bytes for key, _, size_bytes, _ in cache.entries()}
+    cache.max_bytes = sizes[keys[0]] + sizes[keys[2]]
+    cache.evict()
+
+    assert [entry[0] for entry in cache.entries()] == [keys[2], keys[0]]
+    assert cache.clear() == 2
+    assert cache.entries() == []
+
+
+def test_convertFile_cache_hit(tmp_path, capsys):
+
+    pytest.importorskip("crdesigner")
+    from utils.batch import convertFile, outputPaths
+
+    cache_dir = tmp_path / "cache"
+    outputs = []
+    for run in ("miss", "hit"):
+        output_dir = tmp_path / run
+        output_dir.mkdir()
+        assert convertFile(str(SMALL_MAP), str(output_dir), cache_dir = str(cache_dir)) is not None
+        paths = outputPaths(SMALL_MAP, output_dir)
+        outputs.append((paths["osm"].read_bytes(), paths["mapping"].read_bytes()))
+        assert len(ConversionCache(cache_dir).entries()) == 1
+        assert ("Cache hit" in capsys.readouterr().out) == (run == "hit")
+
+    assert outputs[0] == outputs[1]
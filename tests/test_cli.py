@@ -0,0 +1,89 @@
+#! /usr/bin/env python3
+
+import io
+import sys
+import subprocess
+import pytest
+from lxml import etree
+from conftest import SAMPLE_DATA, INTEGRATION_MAP
+from utils.cli import main, buildParser, SIMPLIFY_MODES
+from utils.georef import PROJ_MET
+from utils import postprocess
+from utils.postprocess import postprocessDownsamplingOSM, BATCH_ANGLE_FRAME
+from utils.writer import writeOSM
+
+REPO_DIR = SAMPLE_DATA.parent
+SMALL_MAP = SAMPLE_DATA / "esmini" / "straight_500m.xodr"
+
+
+def runCLI(*args) -> str:
+    """
+    Run python -m utils in a fresh interpreter, so imports start from scratch.
+    """
+
+    completed = subprocess.run(
+        [sys.executable, "-m", "utils", *map(str, args)],
+        cwd = REPO_DIR,
+        capture_output = True,
+        text = True,
+        check = True
+    )
+
+    return completed.stdout
+
+
+def test_probe_georef_skips_commonroad():
+
+    output = runCLI("probe-georef", SAMPLE_DATA / "CARLA" / "Town02.xodr", INTEGRATION_MAP)
+
+    assert "Town02_no_georef.xodr: no geoReference" in output
+    assert "[valid]" in output or "[invalid" in output
+    assert "CommonRoad imported: False" in output
+
+
+def test_downsample_skips_commonroad(converted_model, tmp_path):
+
+    predown_path = tmp_path / "predown.osm"
+    predown_path.write_bytes(etree.tostring(converted_model.serialize_to_xml()))
+    output_path = tmp_path / "downsampled.osm"
+
+    output = runCLI("downsample", predown_path, "--output", output_path, "--binary-map")
+    assert "CommonRoad imported: False" in output
+
+    expected = postprocessDownsamplingOSM(
+        etree.parse(str(predown_path)).getroot(),
+        179.9,
+        3.0,
+        geostring = PROJ_MET,
+        latlon_output = False,
+        generator = "VMB",
+        angle_frame = BATCH_ANGLE_FRAME
+    )
+    buffer = io.BytesIO()
+    writeOSM(expected, buffer)
+    assert output_path.read_bytes() == buffer.getvalue()
+    assert (tmp_path / "downsampled.npz").exists()
+
+
+def test_convert(tmp_path):
+
+    pytest.importorskip("crdesigner")
+    from utils.batch import outputPaths
+
+    assert main(["convert", str(SMALL_MAP), "--output-dir", str(tmp_path), "--mode", "douglas_peucker"]) == 0
+    assert outputPaths(SMALL_MAP, tmp_path)["osm"].exists()
+
+    assert main(["convert", str(tmp_path / "missing.xodr"), "--output-dir", str(tmp_path)]) == 1
+
+
+def test_mode_choices(capsys):
+
+    assert SIMPLIFY_MODES == postprocess.SIMPLIFY_MODES
+
+    with pytest.raises(SystemExit):
+        main(["downsample", "map.osm", "--output", "out.osm", "--mode", "bezier"])
+    assert "invalid choice: 'bezier'" in capsys.readouterr().err
+
+    args = buildParser().parse_args(["downsample", "map.osm", "--output", "out.osm", "--mode", "auto", "--compress", "gzip"])
+    assert args.mode == "auto"
+    assert args.compress == "gzip"
@@ -0,0 +1,32 @@
+#! /usr/bin/env python3
+
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from lxml import etree
+from conftest import SAMPLE_DATA
+
+pytest.importorskip("crdesigner")
+
+from crdesigner.common.config.lanelet2_config import lanelet2_config
+from crdesigner.common.config.opendrive_config import OpenDriveConfig
+from crdesigner.map_conversion.lanelet2.cr2lanelet import CR2LaneletConverter
+from utils.conversion import PROJ_MET, prepConversionCRS, convertOpenDriveWithMapping, OSMLaneletConverter
+
+SMALL_MAP = SAMPLE_DATA / "esmini" / "straight_500m.xodr"
+
+
+def test_model_alongside_plain_converter():
+
+    scenario, _ = convertOpenDriveWithMapping(str(SMALL_MAP), OpenDriveConfig())
+    scenario.location = prepConversionCRS(PROJ_MET)
+    expected = etree.tostring(CR2LaneletConverter(lanelet2_config)(scenario))
+
+    # Plain converters running next to model-only ones still serialize
+    with ThreadPoolExecutor(max_workers = 4) as executor:
+        models = [executor.submit(OSMLaneletConverter(lanelet2_config), scenario) for _ in range(4)]
+        plain = [executor.submit(CR2LaneletConverter(lanelet2_config), scenario) for _ in range(4)]
+
+        for future in plain:
+            assert etree.tostring(future.result()) == expected
+        for future in models:
+            assert etree.tostring(future.result().serialize_to_xml()) == expected
@@ -0,0 +1,82 @@
+#! /usr/bin/env python3
+
+import pytest
+from conftest import buildOSM
+from utils.georef import DEFAULT_GEOSTRING, PROJ_MET
+from utils.projection import getTransformer
+from utils.sweep import WayArrays
+from utils.fidelity import fidelityReport
+
+# Way ID -> (original points, downsampled points), in meters of PROJ_MET
+WAYS = {
+    # Middle point 1 m off the chord: 1 m both ways, mean over the 3 original points
+    10: ([(0.0, 0.0), (5.0, 1.0), (10.0, 0.0)], [(0.0, 0.0), (10.0, 0.0)]),
+    # Output bulges 3 m away from a straight original: Hausdorff only, the original points lie on it
+    11: ([(0.0, 20.0), (10.0, 20.0)], [(0.0, 20.0), (5.0, 23.0), (10.0, 20.0)]),
+    # Unchanged
+    12: ([(0.0, 40.0), (4.0, 42.0), (8.0, 40.0)], [(0.0, 40.0), (4.0, 42.0), (8.0, 40.0)]),
+}
+
+
+def originalTree():
+    """
+    Pre-downsampling tree: lat/lon nodes, plus a way dropped by the downsampling
+    and a single point way.
+    """
+
+    to_latlon = getTransformer(PROJ_MET, DEFAULT_GEOSTRING, always_xy = True)
+    nodes, ways = [], []
+    for way_id, (points, _) in list(WAYS.items()) + [(13, ([(0.0, 60.0), (9.0, 60.0)], None)), (14, ([(0.0, 80.0)], None))]:
+        node_ids = []
+        for x, y in points:
+            lon, lat = to_latlon.transform(x, y)
+            node_ids.append(len(nodes) + 1)
+            nodes.append({"id": node_ids[-1], "lat": repr(lat), "lon": repr(lon)})
+        ways.append((way_id, node_ids, []))
+
+    return buildOSM(nodes, ways)
+
+
+def downsampledTree():
+    """
+    Downsampled tree, local_x/local_y only as the batch writes it.
+    """
+
+    nodes, ways = [], [(14, [], [])]
+    for way_id, (_, points) in WAYS.items():
+        node_ids = []
+        for x, y in points:
+            node_ids.append(1000 + len(nodes))
+            nodes.append({"id": node_ids[-1], "lat": "", "lon": "", "tags": [("local_x", f"{x:.4f}"), ("local_y", f"{y:.4f}")]})
+        ways.append((way_id, node_ids, []))
+
+    return buildOSM(nodes, ways)
+
+
+def test_known_deviations():
+
+    report = fidelityReport(WayArrays.fromOSM(originalTree(), PROJ_MET), downsampledTree())
+
+    assert report.way_ids.tolist() == [10, 11, 12]
+    assert report.hausdorff.tolist() == pytest.approx([1.0, 3.0, 0.0], abs = 1e-6)
+    assert report.max_deviation.tolist() == pytest.approx([1.0, 0.0, 0.0], abs = 1e-6)
+    assert report.mean_deviation.tolist() == pytest.approx([1.0 / 3, 0.0, 0.0], abs = 1e-6)
+    assert report.source_nodes.tolist() == [3, 2, 3]
+    assert report.nodes.tolist() == [2, 3, 3]
+    assert report.missing_ways == 1
+    assert report.skipped_ways == 1
+
+    summary = report.summary()
+    assert summary["max_hausdorff"] == pytest.approx(3.0, abs = 1e-6)
+    assert summary["median_hausdorff"] == pytest.approx(1.0, abs = 1e-6)
+    assert summary["mean_deviation"] == pytest.approx(1.0 / 8, abs = 1e-6)
+    assert [way["way_id"] for way in report.worst(2)] == [11, 10]
+
+
+def test_needs_way_ids():
+
+    arrays = WayArrays.fromOSM(originalTree(), PROJ_MET)
+    arrays.way_ids = None
+
+    with pytest.raises(ValueError):
+        fidelityReport(arrays, downsampledTree())
@@ -0,0 +1,56 @@
+#! /usr/bin/env python3
+
+import pytest
+from conftest import SAMPLE_DATA
+from utils.georef import DEFAULT_PROJ, probeGeoreference, extractGeorefString
+
+UTM_32 = "+proj=utm +zone=32 +ellps=WGS84 +datum=WGS84 +units=m +no_defs"
+
+# Malformed past the header: probing that reads further than the header fails on it
+BROKEN_TAIL = "<road id='1'><planView><geometry></road>"
+
+
+def writeXodr(tmp_path, header: str, tail: str = BROKEN_TAIL):
+
+    path = tmp_path / "map.xodr"
+    path.write_text(f"<?xml version='1.0' encoding='UTF-8'?>\n<OpenDRIVE>{header}{tail}")
+
+    return path
+
+
+def test_probe_stops_after_header(tmp_path):
+
+    path = writeXodr(tmp_path, f"<header revMajor='1'><geoReference><![CDATA[ {UTM_32} ]]></geoReference></header>")
+    assert probeGeoreference(path) == UTM_32
+
+    # No geoReference, header closed
+    path = writeXodr(tmp_path, "<header revMajor='1'><offset x='0'/></header>")
+    assert probeGeoreference(path) is None
+
+    # No header at all, first road
+    path = writeXodr(tmp_path, "", "<road id='1'><planView><geometry></road>")
+    assert probeGeoreference(path) is None
+
+
+def test_probe_empty_georeference(tmp_path):
+
+    path = writeXodr(tmp_path, "<header><geoReference>  </geoReference></header>")
+
+    assert probeGeoreference(path) is None
+
+
+def test_extractGeorefString(tmp_path):
+
+    path = writeXodr(tmp_path, f"<header><geoReference>{UTM_32}</geoReference></header>")
+    assert extractGeorefString(path) == (UTM_32, True)
+
+    path = writeXodr(tmp_path, "<header><geoReference>+proj=nonsense</geoReference></header>")
+    assert extractGeorefString(path) == (DEFAULT_PROJ, False)
+
+
+@pytest.mark.parametrize("name", ["Town02.xodr", "Town02_no_georef.xodr"])
+def test_probe_sample_maps(name):
+
+    raw_proj_str = probeGeoreference(SAMPLE_DATA / "CARLA" / name)
+
+    assert (raw_proj_str is not None) == (name == "Town02.xodr")
@@ -0,0 +1,114 @@
+#! /usr/bin/env python3
+
+import pytest
+from lxml import etree
+from conftest import laneGeometry, danglingRefs
+
+pytest.importorskip("crdesigner")
+
+from utils.batch import convertFile, outputPaths
+from utils.mapping import readIdMappingCSV
+from utils.incremental import (
+    convertIncremental,
+    spliceOSM,
+    xodrFingerprints,
+    diffFingerprints,
+    loadFingerprints
+)
+
+EDITED_ROAD = "1"
+
+
+def widenRoad(xodr_path, road_id: str, delta: float = 0.5):
+    """
+    Edit one road in place: widen every lane of it by delta meters.
+    """
+
+    tree = etree.parse(str(xodr_path))
+    road = tree.getroot().find(f"road[@id='{road_id}']")
+    for width in road.iter("width"):
+        width.set("a", str(float(width.get("a")) + delta))
+    tree.write(str(xodr_path))
+
+
+def readOutput(output_dir, xodr_path):
+
+    paths = outputPaths(xodr_path, output_dir)
+
+    return etree.parse(str(paths["osm"])).getroot(), readIdMappingCSV(paths["mapping"])
+
+
+def test_fingerprints_diff(xodr_copy):
+
+    old = xodrFingerprints(xodr_copy)
+    widenRoad(xodr_copy, EDITED_ROAD)
+    new = xodrFingerprints(xodr_copy)
+
+    assert old["global"] == new["global"]
+    assert diffFingerprints(old, new) == ({EDITED_ROAD}, set(), set())
+    assert diffFingerprints(old, old) == (set(), set(), set())
+
+
+def test_splice_matches_full_conversion(xodr_copy, tmp_path):
+
+    output_dir = tmp_path / "incremental"
+    output_dir.mkdir()
+    assert convertIncremental(str(xodr_copy), str(output_dir))["mode"] == "full"
+    _, previous_rows = readOutput(output_dir, xodr_copy)
+
+    widenRoad(xodr_copy, EDITED_ROAD)
+    summary = convertIncremental(str(xodr_copy), str(output_dir))
+    assert summary["mode"] == "incremental"
+    assert 0 < summary["reconverted_roads"] < summary["roads"]
+
+    full_dir = tmp_path / "full"
+    full_dir.mkdir()
+    assert convertFile(str(xodr_copy), str(full_dir)) is not None
+
+    spliced_osm, spliced_rows = readOutput(output_dir, xodr_copy)
+    full_osm, full_rows = readOutput(full_dir, xodr_copy)
+
+    assert laneGeometry(spliced_osm, spliced_rows) == laneGeometry(full_osm, full_rows)
+    assert danglingRefs(spliced_osm) == 0
+    assert len({child.get("id") for child in spliced_osm}) == len(spliced_osm)
+
+    # Lanes already there keep their relation IDs across the splice (the edit can add some)
+    spliced_ids = {tuple(row[ : 3]): row[3] for row in spliced_rows}
+    assert all(spliced_ids[tuple(row[ : 3])] == row[3] for row in previous_rows)
+
+
+def test_settings_change_forces_full_conversion(xodr_copy, tmp_path):
+
+    output_dir = tmp_path / "incremental"
+    output_dir.mkdir()
+    convertIncremental(str(xodr_copy), str(output_dir))
+
+    assert convertIncremental(str(xodr_copy), str(output_dir))["mode"] == "unchanged"
+    assert convertIncremental(str(xodr_copy), str(output_dir), straight_angle_threshold = 179.0)["mode"] == "full"
+
+    fingerprints = loadFingerprints(outputPaths(xodr_copy, output_dir)["fingerprints"])
+    assert fingerprints["settings"]["straight_angle_threshold"] == 179.0
+
+
+def test_spliceOSM_empty_replacement(converted_map):
+    """
+    Splicing nothing in place of some roads drops exactly their lanelets.
+    """
+
+    osm_root = etree.fromstring(etree.tostring(converted_map["osm_root"]))
+    mapping_rows = converted_map["mapping_rows"]
+    dropped_roads = {row[0] for row in mapping_rows[ : 10]}
+
+    spliced_osm, spliced_rows = spliceOSM(
+        osm_root,
+        mapping_rows,
+        dropped_roads,
+        etree.Element("osm"),
+        []
+    )
+
+    kept_rows = [tuple(row) for row in mapping_rows if row[0] not in dropped_roads]
+    assert [tuple(row) for row in spliced_rows] == sorted(kept_rows, key = lambda row: [int(part) for part in row[ : 3]])
+    expected = laneGeometry(converted_map["osm_root"], kept_rows)
+    assert laneGeometry(spliced_osm, spliced_rows) == expected
+    assert danglingRefs(spliced_osm) == 0
@@ -0,0 +1,100 @@
+#! /usr/bin/env python3
+
+import csv
+import json
+import pytest
+from conftest import buildOSM
+from utils.instrument import (
+    STAGES_CSV_HEADER,
+    FileRecord,
+    stage,
+    osmCounts,
+    writeJSONLines,
+    writeStagesCSV
+)
+
+
+def test_stage_without_record_is_noop():
+
+    with stage("parse", roads = 3) as stage_entry:
+        stage_entry["output"] = {"lanelets": 5}
+
+    assert "wall_secs" not in stage_entry
+
+
+def test_record_stages():
+
+    record = FileRecord("map.xodr", set_name = "CARLA")
+    with record.activate():
+        with stage("parse", roads = 3) as stage_entry:
+            stage_entry["output"] = {"lanelets": 5}
+        with pytest.raises(RuntimeError):
+            with stage("downsampling"):
+                raise RuntimeError("failed stage")
+    with stage("after"):
+        pass
+
+    record_dict = record.toDict()
+    assert record_dict["input_file"] == "map.xodr"
+    assert record_dict["set_name"] == "CARLA"
+    # A failing stage is still recorded, nothing once the record is inactive
+    assert [entry["stage"] for entry in record_dict["stages"]] == ["parse", "downsampling"]
+
+    parse = record_dict["stages"][0]
+    assert parse["input"] == {"roads": 3}
+    assert parse["output"] == {"lanelets": 5}
+    assert parse["wall_secs"] >= 0
+    assert parse["cpu_secs"] >= 0
+    assert parse["process_peak_rss_mb"] > 0
+    assert 0 <= parse["peak_rss_growth_mb"] <= parse["process_peak_rss_mb"]
+    assert "tracemalloc_peak_mb" not in parse
+
+
+def test_trace_memory():
+
+    record = FileRecord("map.xodr", trace_memory = True)
+    with record.activate():
+        with stage("small"):
+            data = bytearray(1024)
+        with stage("large"):
+            data = bytearray(32 * 1024 ** 2)
+    del data
+
+    small, large = record.stages
+    assert small["tracemalloc_peak_mb"] < 1
+    assert large["tracemalloc_peak_mb"] >= 32
+
+
+def test_writers(tmp_path):
+
+    record = FileRecord("map.xodr")
+    with record.activate():
+        with stage("parse", roads = 3) as stage_entry:
+            stage_entry["output"] = {"lanelets": 5}
+        with stage("serialization"):
+            pass
+
+    writeJSONLines(tmp_path / "stage_log.jsonl", [record.toDict()])
+    writeJSONLines(tmp_path / "stage_log.jsonl", [record.toDict()], append = True)
+    with open(tmp_path / "stage_log.jsonl") as f:
+        lines = [json.loads(line) for line in f]
+    assert lines == [record.toDict()] * 2
+
+    writeStagesCSV(tmp_path / "stage_log.csv", [record.toDict()])
+    with open(tmp_path / "stage_log.csv", newline = "") as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == STAGES_CSV_HEADER
+    assert [row[ : 2] for row in rows[1 : ]] == [["map.xodr", "parse"], ["map.xodr", "serialization"]]
+    assert json.loads(rows[1][-1]) == {"lanelets": 5}
+    assert rows[1][STAGES_CSV_HEADER.index("tracemalloc_peak_mb")] == ""
+
+
+def test_osmCounts():
+
+    osm_root = buildOSM(
+        [{"id": i, "lat": "0.0", "lon": "0.0"} for i in (1, 2, 3)],
+        [(10, [1, 2], []), (11, [2, 3], [])],
+        [(20, [("way", 10, "left"), ("way", 11, "right")], [("type", "lanelet")])]
+    )
+
+    assert osmCounts(osm_root) == {"nodes": 3, "ways": 2, "relations": 1}
@@ -0,0 +1,82 @@
+#! /usr/bin/env python3
+
+import pytest
+from utils.mapping import writeIdMappingCSV
+from utils.mapping_store import IdMappingStore
+
+MAP_NAME = "CARLA/Town01.xodr"
+MAPPING_ROWS = [
+    ("0", "0", "-1", 8003),
+    ("0", "0", "1", 8010),
+    ("0", "1", "-1", 8020),
+    ("12", "0", "-2", 9001),
+    ("12", "0", "-1", 9000),
+]
+
+
+@pytest.fixture
+def store(tmp_path):
+
+    with IdMappingStore(tmp_path / "mappings.db") as store:
+        store.writeMap(MAP_NAME, MAPPING_ROWS)
+        store.writeMap("other.xodr", [("0", "0", "-1", 1)])
+        yield store
+
+
+def test_lane_to_relation(store):
+
+    for road_id, section_id, lane_id, relation_id in MAPPING_ROWS:
+        assert store.relationId(MAP_NAME, road_id, section_id, lane_id) == relation_id
+
+    # Integer keys are looked up as strings, as in the CSV
+    assert store.relationId(MAP_NAME, 12, 0, -2) == 9001
+    assert store.relationId(MAP_NAME, "0", "0", "-3") is None
+    assert store.relationId("missing.xodr", "0", "0", "-1") is None
+
+
+def test_relation_to_lane(store):
+
+    for road_id, section_id, lane_id, relation_id in MAPPING_ROWS:
+        assert store.laneKey(MAP_NAME, relation_id) == (road_id, section_id, lane_id)
+
+    assert store.laneKey(MAP_NAME, 1) is None
+    assert store.laneKey("other.xodr", 1) == ("0", "0", "-1")
+
+
+def test_batch_lookups(store):
+
+    lane_keys = [row[ : 3] for row in MAPPING_ROWS] + [("99", "0", "-1")]
+    relation_ids = [row[3] for row in MAPPING_ROWS] + [12345]
+
+    assert store.relationIds(MAP_NAME, lane_keys) == {row[ : 3]: row[3] for row in MAPPING_ROWS}
+    assert store.laneKeys(MAP_NAME, relation_ids) == {row[3]: row[ : 3] for row in MAPPING_ROWS}
+    assert store.relationIds("missing.xodr", lane_keys) == {}
+    assert store.laneKeys("missing.xodr", relation_ids) == {}
+
+
+def test_roadLanes_sorted(store):
+
+    assert store.roadLanes(MAP_NAME, "12") == [("12", "0", "-2", 9001), ("12", "0", "-1", 9000)]
+
+
+def test_writeMap_replaces(store):
+
+    store.writeMap(MAP_NAME, MAPPING_ROWS[ : 2])
+
+    assert store.laneKey(MAP_NAME, 9000) is None
+    assert dict(store.maps()) == {MAP_NAME: 2, "other.xodr": 1}
+
+    store.removeMap(MAP_NAME)
+    assert store.relationId(MAP_NAME, "0", "0", "-1") is None
+    assert store.relationId("other.xodr", "0", "0", "-1") == 1
+
+
+def test_importCSV(tmp_path, store):
+
+    mapping_path = tmp_path / "id_mapping.csv"
+    writeIdMappingCSV(mapping_path, MAPPING_ROWS)
+    store.importCSV("imported.xodr", mapping_path)
+
+    assert store.laneKeys("imported.xodr", [row[3] for row in MAPPING_ROWS]) == {
+        row[3]: row[ : 3] for row in MAPPING_ROWS
+    }
@@ -0,0 +1,79 @@
+#! /usr/bin/env python3
+
+import math
+import numpy as np
+from conftest import buildOSM
+from utils.node_table import NodeTable
+
+
+def sampleTree(node_ids: list[int]):
+    """
+    Nodes with the given IDs: lat = row, lon = -row, every other node tagged.
+    """
+
+    nodes = []
+    for row, node_id in enumerate(node_ids):
+        tags = [("local_x", f"{row}.5"), ("ele", f"{row * 2}.0"), ("subtype", "anchor")] if (row % 2 == 0) else []
+        nodes.append({"id": node_id, "lat": str(float(row)), "lon": str(float(-row)), "tags": tags})
+
+    return buildOSM(nodes, [])
+
+
+def test_fromXML():
+
+    osm_root = sampleTree([5, 7, 9])
+    osm_root.find("node[@id='7']").set("lat", "")
+    table = NodeTable.fromXML(osm_root)
+
+    assert len(table) == 3
+    assert table.ids.tolist() == [5, 7, 9]
+    assert table.lat[0] == 0.0 and math.isnan(table.lat[1]) and table.lat[2] == 2.0
+    assert table.lon.tolist() == [0.0, -1.0, -2.0]
+    assert table.ele.tolist() == [0.0, 0.0, 4.0]
+    # ele goes to its column, the other tags stay in order
+    assert table.rowTags(0) == [("local_x", "0.5"), ("subtype", "anchor")]
+    assert table.rowTags(1) == []
+    assert table.idString(2) == "9"
+
+
+def test_rows_sorted_ids():
+
+    table = NodeTable.fromXML(sampleTree([10, 20, 30, 40]))
+
+    assert table.order is None
+    assert table.rows(["30", "10", "40"]).tolist() == [2, 0, 3]
+    assert table.rows([15, 20, 50, 5]).tolist() == [1]
+    assert table.rows([]).tolist() == []
+    assert table.row("40") == 3
+    assert table.row(41) is None
+
+
+def test_rows_unsorted_ids():
+
+    table = NodeTable.fromXML(sampleTree([40, 10, 30, 10, 20]))
+
+    assert table.order is not None
+    assert table.rows([40, 20, 30]).tolist() == [0, 4, 2]
+    # Duplicated ID resolves to its last row
+    assert table.row(10) == 3
+    assert table.nbytes > table.ids.nbytes + table.coords.nbytes + table.ele.nbytes
+
+
+def test_empty_table():
+
+    table = NodeTable.fromXML(buildOSM([], []))
+
+    assert len(table) == 0
+    assert table.rows([1, 2]).tolist() == []
+    assert table.coords.shape == (0, 2)
+
+
+def test_fromOSMLanelet_matches_fromXML(converted_model):
+
+    from_model = NodeTable.fromOSMLanelet(converted_model)
+    from_xml = NodeTable.fromXML(converted_model.serialize_to_xml())
+
+    assert np.array_equal(from_model.ids, from_xml.ids)
+    assert np.array_equal(from_model.coords, from_xml.coords)
+    assert np.array_equal(from_model.ele, from_xml.ele)
+    assert from_model.tags == from_xml.tags
@@ -0,0 +1,77 @@
+#! /usr/bin/env python3
+
+import numpy as np
+import pytest
+from conftest import SAMPLE_DATA
+
+pytest.importorskip("crdesigner")
+
+from crdesigner.common.config.opendrive_config import OpenDriveConfig
+from crdesigner.map_conversion.opendrive.odr2cr.opendrive_parser.parser import parse_opendrive
+from crdesigner.map_conversion.opendrive.odr2cr.opendrive_conversion import network
+from utils.conversion import convertOpenDriveWithMapping
+from utils.planview import AnalyticVertexSampler, checkCrdesignerInternals, _chordDeviation
+
+CURVED_MAPS = [SAMPLE_DATA / "esmini" / "curves.xodr", SAMPLE_DATA / "esmini" / "fabriksgatan.xodr"]
+PROBES_PER_SEGMENT = 16
+
+
+def loadNetwork(xodr_path):
+
+    road_network = network.Network()
+    road_network.load_opendrive(parse_opendrive(xodr_path))
+
+    return road_network
+
+
+def maxBorderDeviation(sampler: AnalyticVertexSampler, lane) -> float:
+    """
+    Largest distance of a lane border to the chord of the vertex segment spanning it,
+    the border being probed densely between every two vertices.
+    """
+
+    positions = sampler.lanePositions(lane)
+    deviation = 0.0
+    for border in ("inner", "outer"):
+        for start, end in zip(positions[ : -1], positions[1 : ]):
+            points = np.array([
+                lane.calc_border(border, s_pos, compute_curvature = False)[0]
+                for s_pos in np.linspace(start, end, PROBES_PER_SEGMENT + 1)
+            ])
+            deviation = max(deviation, _chordDeviation(points[0], points[-1], points[1 : -1, None, :]))
+
+    return deviation
+
+
+@pytest.mark.parametrize("xodr_path", CURVED_MAPS, ids = lambda path: path.stem)
+@pytest.mark.parametrize("chord_tolerance", [0.15, 0.05])
+def test_borders_within_chord_tolerance(xodr_path, chord_tolerance):
+
+    road_network = loadNetwork(xodr_path)
+    sampler = AnalyticVertexSampler(road_network._planes, chord_tolerance, OpenDriveConfig().min_delta_s)
+
+    lanes = [lane for group in road_network._planes for lane in group.parametric_lanes if lane.length > 0]
+    assert max(maxBorderDeviation(sampler, lane) for lane in lanes) <= chord_tolerance
+
+
+def test_analytic_conversion_vertices():
+
+    def numVertices(**kwargs) -> int:
+        scenario, _ = convertOpenDriveWithMapping(str(CURVED_MAPS[0]), OpenDriveConfig(), **kwargs)
+        return sum(len(lanelet.center_vertices) for lanelet in scenario.lanelet_network.lanelets)
+
+    dense = numVertices()
+    coarse = numVertices(sampling = "analytic", chord_tolerance = 0.15)
+    fine = numVertices(sampling = "analytic", chord_tolerance = 0.01)
+
+    assert coarse < fine < dense
+
+
+def test_crdesigner_internals_guard():
+
+    road_network = network.Network()
+    checkCrdesignerInternals(road_network)
+
+    del road_network._planes
+    with pytest.raises(RuntimeError, match = "Network._planes"):
+        checkCrdesignerInternals(road_network)
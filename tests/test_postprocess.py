@@ -0,0 +1,222 @@
+#! /usr/bin/env python3
+
+import math
+import numpy as np
+import pytest
+from lxml import etree
+from conftest import buildOSM, danglingRefs
+from utils.georef import DEFAULT_GEOSTRING, PROJ_MET
+from utils.projection import getTransformer
+from utils.postprocess import (
+    simplifyWayNodes,
+    simplifyWayNodesArray,
+    angleXYArray,
+    postprocessDownsamplingOSM,
+    postprocessDownsamplingOSMLanelet
+)
+
+METERS_PER_DEGREE = 111_320.0
+
+# (straight_angle_threshold, min_segment_dist) pairs, from the batch default outwards
+ANGLE_SETTINGS = [(179.9, 3.0), (179.0, 0.5), (175.0, 3.0), (170.0, 8.0), (179.99, 0.0)]
+
+
+def latLonWay(xy: np.ndarray, origin = (0.001, 0.002)) -> np.ndarray:
+    """
+    (lat, lon) rows of a polyline given in meters around origin, like crdesigner output.
+    """
+
+    lat = origin[0] + xy[:, 1] / METERS_PER_DEGREE
+    lon = origin[1] + xy[:, 0] / (METERS_PER_DEGREE * math.cos(math.radians(origin[0])))
+
+    return np.column_stack((lat, lon))
+
+
+def sampleXYWays() -> list[np.ndarray]:
+    """
+    Densely sampled ways like the converter's borders, in meters: straight lines, arcs,
+    an S-curve, noisy and degenerate (repeated point, 2 and 3 points) ways.
+    """
+
+    rng = np.random.default_rng(0)
+    step = np.arange(0.0, 60.0, 0.5)
+    angles = np.linspace(0.0, math.pi / 2, 80)
+    s_curve = np.column_stack((step, 5.0 * np.sin(step / 10.0)))
+    straight = np.column_stack((step, 0.2 * step))
+    arc = np.column_stack((30.0 * np.cos(angles), 30.0 * np.sin(angles)))
+    noisy = straight + rng.normal(scale = 0.02, size = straight.shape)
+    repeated = np.vstack((arc[ : 10], arc[9 : 10], arc[9 : ]))
+
+    return [straight, arc, s_curve, noisy, repeated, straight[ : 2], arc[ : 3]]
+
+
+def sampleWays() -> list[np.ndarray]:
+    """
+    sampleXYWays as (lat, lon) rows.
+    """
+
+    return [latLonWay(xy) for xy in sampleXYWays()]
+
+
+def maxDeviation(xy: np.ndarray, kept: np.ndarray) -> float:
+    """
+    Largest distance of a point of xy to the simplified segment spanning it.
+    """
+
+    deviation = 0.0
+    for start, end in zip(kept[ : -1], kept[1 : ]):
+        a, b = xy[start], xy[end]
+        ab = b - a
+        ap = xy[start : end + 1] - a
+        t = np.clip(ap @ ab / max(ab @ ab, 1e-18), 0.0, 1.0)
+        deviation = max(deviation, float(np.hypot(*(ap - t[:, None] * ab).T).max()))
+
+    return deviation
+
+
+@pytest.mark.parametrize("straight_angle_threshold, min_segment_dist", ANGLE_SETTINGS)
+def test_simplifyWayNodesArray_matches_scalar(straight_angle_threshold, min_segment_dist):
+
+    transformer = getTransformer(DEFAULT_GEOSTRING, PROJ_MET, always_xy = True)
+
+    for coords in sampleWays():
+        expected = simplifyWayNodes(
+            [tuple(point) for point in coords.tolist()],
+            straight_angle_threshold,
+            min_segment_dist,
+            transformer
+        )
+        simplified, kept = simplifyWayNodesArray(
+            coords,
+            straight_angle_threshold,
+            min_segment_dist,
+            transformer = transformer,
+            return_indices = True
+        )
+
+        assert [tuple(point) for point in simplified.tolist()] == [tuple(point) for point in expected]
+        assert np.array_equal(coords[kept], simplified)
+
+
+def test_simplifyWayNodesArray_keeps_ends():
+
+    transformer = getTransformer(DEFAULT_GEOSTRING, PROJ_MET, always_xy = True)
+
+    for coords in sampleWays():
+        for mode in ("angle", "douglas_peucker", "visvalingam"):
+            _, kept = simplifyWayNodesArray(coords, transformer = transformer, return_indices = True, mode = mode)
+            assert kept[0] == 0
+            assert kept[-1] == len(coords) - 1
+            assert np.all(np.diff(kept) > 0)
+
+
+@pytest.mark.parametrize("mode", ["douglas_peucker", "visvalingam"])
+@pytest.mark.parametrize("max_error", [0.01, 0.05, 0.5])
+def test_error_bounded_modes_stay_within_max_error(mode, max_error):
+
+    rng = np.random.default_rng(1)
+    random_walks = [np.cumsum(rng.normal(scale = 0.5, size = (200, 2)), axis = 0) for _ in range(5)]
+
+    for xy in sampleXYWays() + random_walks:
+        _, kept = simplifyWayNodesArray(latLonWay(xy), xy = xy, return_indices = True, mode = mode, max_error = max_error)
+
+        assert maxDeviation(xy, kept) <= max_error + 1e-9
+        if (len(xy) > 100):
+            assert len(kept) < len(xy)
+
+
+def test_angleXYArray_unknown_frame():
+
+    coords = sampleWays()[0]
+
+    with pytest.raises(ValueError):
+        angleXYArray(coords, coords, "mercator")
+
+
+def wayTree(coords: np.ndarray, node_tags = ()) -> etree.Element:
+    """
+    One way through coords, every node carrying node_tags besides ele.
+    """
+
+    nodes = [
+        {"id": i + 1, "lat": repr(lat), "lon": repr(lon), "tags": [("ele", "0.0"), *node_tags]}
+        for i, (lat, lon) in enumerate(coords.tolist())
+    ]
+
+    return buildOSM(nodes, [(100, list(range(1, len(coords) + 1)), [("type", "line_thin")])])
+
+
+def nodeTags(osm_root) -> list[list[str]]:
+
+    return [[tag.get("k") for tag in node.iterfind("tag")] for node in osm_root.iterfind("node")]
+
+
+def test_local_xy_written_once():
+
+    coords = sampleWays()[1]
+    osm_root = wayTree(coords, [("local_x", "17.86"), ("local_y", "-3.20"), ("subtype", "anchor")])
+
+    downsampled = postprocessDownsamplingOSM(osm_root, 179.9, 3.0, geostring = PROJ_MET, latlon_output = False)
+
+    assert len(downsampled.findall("node")) > 2
+    for tags in nodeTags(downsampled):
+        assert tags == ["subtype", "local_x", "local_y", "ele"]
+    for tag in downsampled.iterfind("node/tag[@k='local_x']"):
+        assert tag.get("v") != "17.86"
+
+
+def test_latlon_output_keeps_source_tags():
+
+    coords = sampleWays()[1]
+    osm_root = wayTree(coords, [("local_x", "17.86"), ("local_y", "-3.20")])
+
+    downsampled = postprocessDownsamplingOSM(osm_root, 179.9, 3.0, geostring = PROJ_MET, latlon_output = True)
+
+    for tags in nodeTags(downsampled):
+        assert tags == ["local_x", "local_y", "ele"]
+
+
+def test_missing_latlon_raises():
+
+    osm_root = wayTree(sampleWays()[1])
+    osm_root.find("node[@id='3']").set("lat", "")
+
+    with pytest.raises(ValueError, match = "without lat/lon"):
+        postprocessDownsamplingOSM(osm_root, 179.9, 3.0, geostring = PROJ_MET, latlon_output = False)
+
+
+def wayCoords(osm_root) -> dict[str, list]:
+    """
+    Way ID -> local_x/local_y of its nodes, in order.
+    """
+
+    nodes = {
+        node.get("id"): (node.find("tag[@k='local_x']").get("v"), node.find("tag[@k='local_y']").get("v"))
+        for node in osm_root.iterfind("node")
+    }
+
+    return {way.get("id"): [nodes[nd.get("ref")] for nd in way.iterfind("nd")] for way in osm_root.iterfind("way")}
+
+
+def test_share_nodes_converter_output(converted_model):
+    """
+    Ways of the converter meet end to end on shared nodes in junctions, written once.
+    """
+
+    separate = postprocessDownsamplingOSMLanelet(converted_model, 179.9, 3.0, geostring = PROJ_MET, latlon_output = False)
+    node_id_remap = {}
+    shared = postprocessDownsamplingOSMLanelet(
+        converted_model,
+        179.9,
+        3.0,
+        geostring = PROJ_MET,
+        share_nodes = True,
+        node_id_remap = node_id_remap,
+        latlon_output = False
+    )
+
+    assert len(shared.findall("node")) < len(separate.findall("node"))
+    assert danglingRefs(shared) == 0
+    assert wayCoords(shared) == wayCoords(separate)
+    output_ids = {node.get("id") for node in shared.iterfind("node")}
+    assert set(node_id_remap.values()) == output_ids
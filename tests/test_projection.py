@@ -0,0 +1,49 @@
+#! /usr/bin/env python3
+
+import threading
+from utils.georef import DEFAULT_GEOSTRING, PROJ_MET
+from utils.projection import TransformerRegistry
+
+
+def test_reuses_per_key():
+
+    registry = TransformerRegistry()
+
+    transformer = registry.get(DEFAULT_GEOSTRING, PROJ_MET)
+    assert registry.get(DEFAULT_GEOSTRING, PROJ_MET) is transformer
+    assert registry.get(DEFAULT_GEOSTRING, PROJ_MET, always_xy = False) is not transformer
+    assert registry.get(PROJ_MET, DEFAULT_GEOSTRING) is not transformer
+    assert registry.stats() == {"hits": 1, "misses": 3, "thread_size": 3}
+
+    # Same results as a fresh transformer, lon/lat order
+    x, y = transformer.transform(8.0, 49.0)
+    assert abs(x - 890555.93) < 0.01
+    assert abs(y - 6274861.39) < 0.01
+
+    registry.clear()
+    assert registry.stats() == {"hits": 0, "misses": 0, "thread_size": 0}
+    assert registry.get(DEFAULT_GEOSTRING, PROJ_MET) is not transformer
+
+
+def test_one_transformer_per_thread():
+
+    registry = TransformerRegistry()
+    main_transformer = registry.get(DEFAULT_GEOSTRING, PROJ_MET)
+
+    thread_transformers = [[], []]
+    def worker(transformers: list):
+        transformers.append(registry.get(DEFAULT_GEOSTRING, PROJ_MET))
+        transformers.append(registry.get(DEFAULT_GEOSTRING, PROJ_MET))
+
+    threads = [threading.Thread(target = worker, args = (transformers, )) for transformers in thread_transformers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    (first_a, first_b), (second_a, second_b) = thread_transformers
+    assert first_a is first_b
+    assert second_a is second_b
+    assert first_a is not second_a
+    assert all(transformer is not main_transformer for transformer in (first_a, second_a))
+    assert registry.stats() == {"hits": 2, "misses": 3, "thread_size": 1}
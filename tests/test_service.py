@@ -0,0 +1,91 @@
+#! /usr/bin/env python3
+
+import threading
+import pytest
+from http.server import ThreadingHTTPServer
+from conftest import SAMPLE_DATA
+
+pytest.importorskip("crdesigner")
+
+from utils.service import ConversionService, ConversionClient, _ServiceHandler
+
+SMALL_MAP = SAMPLE_DATA / "esmini" / "straight_500m.xodr"
+
+
+@pytest.fixture(scope = "module")
+def service():
+    """
+    One warm worker, no queue, served on a free localhost port.
+    """
+
+    service = ConversionService(workers = 1, queue_size = 0)
+    service.start()
+    handler = type("ServiceHandler", (_ServiceHandler, ), {"service": service})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target = server.serve_forever, daemon = True)
+    thread.start()
+
+    yield service, server.server_address[1]
+
+    server.shutdown()
+    server.server_close()
+    service.stop()
+
+
+def test_convert(service, tmp_path):
+
+    service, port = service
+    client = ConversionClient(port = port)
+
+    result = client.convertToDir(SMALL_MAP, tmp_path, mode = "douglas_peucker")
+
+    assert result["converted"]
+    assert (tmp_path / "converted_straight_500m.osm").exists()
+    assert [entry["stage"] for entry in result["record"]["stages"]][-1] == "downsampling_serialization"
+    assert client.health()["completed"] >= 1
+
+
+def test_full_queue_refused(service):
+
+    service, port = service
+    client = ConversionClient(port = port, busy_retries = 1)
+    refused = service.status()["refused"]
+
+    # Every slot taken, as by a running job
+    assert service.slots.acquire(blocking = False)
+    try:
+        with pytest.raises(RuntimeError, match = "busy"):
+            client.convert(SMALL_MAP)
+        status, headers, payload = client._request("POST", "/convert", SMALL_MAP.read_bytes(), {"X-File-Name": SMALL_MAP.name})
+    finally:
+        service.slots.release()
+
+    assert status == 503
+    assert headers["Retry-After"] == "1"
+    assert payload == {"error": "Job queue full"}
+    assert service.status()["refused"] == refused + 3
+    assert service.status()["in_flight"] == 0
+
+
+def test_client_retries_until_free(service):
+
+    service, port = service
+    client = ConversionClient(port = port, busy_retries = 5)
+
+    assert service.slots.acquire(blocking = False)
+    threading.Timer(0.5, service.slots.release).start()
+
+    assert client.convert(SMALL_MAP)["converted"]
+
+
+def test_bad_requests(service):
+
+    _, port = service
+    client = ConversionClient(port = port)
+
+    status, _, _ = client._request("POST", "/convert", b"<OpenDRIVE/>", {"X-File-Name": "map.txt"})
+    assert status == 400
+    status, _, _ = client._request("POST", "/convert?angle=wide", b"<OpenDRIVE/>", {"X-File-Name": "map.xodr"})
+    assert status == 400
+    status, _, _ = client._request("GET", "/unknown")
+    assert status == 404
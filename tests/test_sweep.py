@@ -0,0 +1,52 @@
+#! /usr/bin/env python3
+
+import pytest
+from lxml import etree
+from utils.georef import PROJ_MET
+from utils.sweep import WayArrays, sweepGrid, runSweep, materializeSetting
+
+
+@pytest.fixture(scope = "module")
+def predown_osm(converted_model):
+
+    return converted_model.serialize_to_xml()
+
+
+def test_rows_match_materialized_output(predown_osm):
+
+    settings = sweepGrid(
+        angles = [179.9, 175.0],
+        min_dists = [0.5, 3.0],
+        modes = ["angle", "douglas_peucker", "visvalingam"],
+        max_errors = [0.02, 0.2]
+    )
+    rows = runSweep(WayArrays.fromOSM(predown_osm, PROJ_MET), settings)
+    predown_bytes = etree.tostring(predown_osm)
+
+    assert [row.setting for row in rows] == settings
+    for row in rows:
+        downsampled = materializeSetting(predown_osm, row.setting)
+        assert row.nodes == len(downsampled.findall("node")), row.setting
+        if (row.setting.mode != "angle"):
+            assert row.max_deviation <= row.setting.max_error
+        assert row.mean_deviation <= row.max_deviation
+
+    # materializeSetting leaves the swept tree as it was
+    assert etree.tostring(predown_osm) == predown_bytes
+
+
+def test_workers_give_same_rows(predown_osm):
+
+    arrays = WayArrays.fromOSM(predown_osm, PROJ_MET)
+    settings = sweepGrid(angles = [179.9, 170.0], modes = ["angle", "douglas_peucker"], max_errors = [0.05])
+
+    serial = runSweep(arrays, settings)
+    parallel = runSweep(arrays, settings, workers = 2)
+
+    assert [row.toCSVRow()[ : -1] for row in parallel] == [row.toCSVRow()[ : -1] for row in serial]
+
+
+def test_unknown_mode():
+
+    with pytest.raises(ValueError):
+        sweepGrid(modes = ["angle", "bezier"])
@@ -0,0 +1,89 @@
+#! /usr/bin/env python3
+
+import pytest
+from lxml import etree
+from conftest import INTEGRATION_MAP, buildOSM, laneGeometry, danglingRefs
+
+pytest.importorskip("crdesigner")
+
+from utils.batch import outputPaths
+from utils.mapping import readIdMappingCSV
+from utils.tiling import stitchTiles, convertTiled
+
+
+def node(node_id: int, x: float, y: float) -> dict:
+
+    return {"id": node_id, "lat": "", "lon": "", "tags": [("local_x", f"{x:.4f}"), ("local_y", f"{y:.4f}")]}
+
+
+def tileOutput(offset: int, y: float, with_sign: bool):
+    """
+    Downsampled output of one tile, IDs local to its conversion: one lanelet, plus
+    the way of a virtual traffic sign near the tile border, which the context roads
+    of both tiles convert.
+    """
+
+    nodes = [node(offset + 1, 0.0, y), node(offset + 2, 10.0, y), node(offset + 3, 0.0, y + 3), node(offset + 4, 10.0, y + 3)]
+    ways = [
+        (offset + 10, [offset + 1, offset + 2], [("type", "line_thin")]),
+        (offset + 11, [offset + 3, offset + 4], [("type", "line_thin")]),
+    ]
+    relations = [(offset + 20, [("way", offset + 11, "left"), ("way", offset + 10, "right")], [("type", "lanelet")])]
+    if (with_sign):
+        nodes += [node(offset + 5, 50.0, 0.0), node(offset + 6, 50.0, 1.0)]
+        ways.append((offset + 12, [offset + 5, offset + 6], [("type", "traffic_sign"), ("subtype", "de205")]))
+
+    return buildOSM(nodes, ways, relations)
+
+
+def test_stitchTiles_renumbers_and_deduplicates():
+
+    tiles = [
+        (tileOutput(1000, 0.0, True), [("1", "0", "-1", 1020)]),
+        (tileOutput(1000, 20.0, True), [("2", "0", "-1", 1020)]),
+        (tileOutput(5000, 40.0, False), [("3", "0", "-1", 5020)]),
+    ]
+    geometries = [laneGeometry(osm_root, rows) for osm_root, rows in tiles]
+
+    osm_root, mapping_rows = stitchTiles(tiles)
+
+    # Every tile's lanelet survives with its geometry, under a fresh ID
+    expected = {}
+    for geometry in geometries:
+        expected.update(geometry)
+    assert laneGeometry(osm_root, mapping_rows) == expected
+    assert [row[ : 3] for row in mapping_rows] == [("1", "0", "-1"), ("2", "0", "-1"), ("3", "0", "-1")]
+
+    # One copy of the shared sign way and its nodes
+    signs = [way for way in osm_root.iterfind("way") if way.find("tag[@v='traffic_sign']") is not None]
+    assert len(signs) == 1
+    assert len(osm_root.findall("node")) == 3 * 4 + 2
+
+    # IDs 1, 2, 3... with no gap, ways, relations then nodes
+    assert sorted(int(child.get("id")) for child in osm_root) == list(range(1, len(osm_root) + 1))
+    assert [child.tag for child in osm_root] == sorted((child.tag for child in osm_root), key = ["way", "relation", "node"].index)
+    assert danglingRefs(osm_root) == 0
+    assert osm_root.get("generator") == "VMB"
+
+
+def test_stitchTiles_empty():
+
+    osm_root, mapping_rows = stitchTiles([])
+
+    assert len(osm_root) == 0
+    assert mapping_rows == []
+
+
+def test_convertTiled_matches_full_conversion(converted_map, tmp_path):
+
+    summary = convertTiled(str(INTEGRATION_MAP), str(tmp_path), tile_size = 100.0)
+    assert summary["tiles"] > 1
+
+    paths = outputPaths(INTEGRATION_MAP, tmp_path)
+    osm_root = etree.parse(str(paths["osm"])).getroot()
+    mapping_rows = readIdMappingCSV(paths["mapping"])
+
+    assert laneGeometry(osm_root, mapping_rows) == laneGeometry(converted_map["osm_root"], converted_map["mapping_rows"])
+    for tag in ("node", "way", "relation"):
+        assert len(osm_root.findall(tag)) == len(converted_map["osm_root"].findall(tag))
+    assert danglingRefs(osm_root) == 0
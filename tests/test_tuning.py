@@ -0,0 +1,59 @@
+#! /usr/bin/env python3
+
+import pytest
+from utils.georef import PROJ_MET
+from utils.postprocess import postprocessDownsamplingOSMLanelet, BATCH_ANGLE_FRAME
+from utils.tuning import tuneDownsamplingOSMLanelet, formatTuningResult
+
+
+def downsampledNodes(converted_model, result) -> int:
+
+    osm_root = postprocessDownsamplingOSMLanelet(
+        converted_model,
+        geostring = PROJ_MET,
+        latlon_output = False,
+        angle_frame = BATCH_ANGLE_FRAME,
+        **result.downsamplingKwargs()
+    )
+
+    return len(osm_root.findall("node"))
+
+
+@pytest.mark.parametrize("max_nodes_per_km", [150.0, 250.0])
+def test_budget_met(converted_model, max_nodes_per_km):
+
+    result = tuneDownsamplingOSMLanelet(
+        converted_model,
+        max_error = 0.1,
+        max_nodes_per_km = max_nodes_per_km,
+        geostring = PROJ_MET
+    )
+
+    assert result.within_budget and result.within_error
+    assert result.nodes <= result.node_cap == pytest.approx(max_nodes_per_km * result.boundary_km)
+    assert result.measured_error <= 0.1
+    # What the tuning counted is what the downsampling writes
+    assert downsampledNodes(converted_model, result) == result.nodes
+    assert f"budget {result.node_cap:.0f} met" in formatTuningResult(result)
+
+
+def test_budget_not_met(converted_model):
+
+    result = tuneDownsamplingOSMLanelet(converted_model, max_error = 0.01, max_nodes = 10, geostring = PROJ_MET)
+
+    # The fewest nodes within max_error, flagged over budget
+    assert not result.within_budget
+    assert result.within_error
+    assert result.nodes > 10
+    assert "budget 10 NOT met" in formatTuningResult(result)
+    assert downsampledNodes(converted_model, result) == result.nodes
+
+
+def test_without_budget(converted_model):
+
+    loose = tuneDownsamplingOSMLanelet(converted_model, max_error = 0.2, geostring = PROJ_MET)
+    tight = tuneDownsamplingOSMLanelet(converted_model, max_error = 0.02, geostring = PROJ_MET)
+
+    assert loose.node_cap is None and loose.within_budget
+    assert loose.nodes <= tight.nodes
+    assert tight.measured_error <= 0.02
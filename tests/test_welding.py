@@ -0,0 +1,94 @@
+#! /usr/bin/env python3
+
+import pytest
+from conftest import buildOSM
+from utils.welding import weldNodes
+
+
+def localNode(node_id: int, x: float, y: float, ele: float = 0.0) -> dict:
+    """
+    Node as the batch writes it: empty lat/lon, local_x/local_y/ele tags.
+    """
+
+    return {
+        "id": node_id,
+        "lat": "",
+        "lon": "",
+        "tags": [("ele", f"{ele:.4f}"), ("local_x", f"{x:.4f}"), ("local_y", f"{y:.4f}")],
+    }
+
+
+def weldingTree():
+    """
+    Two lanelet borders meeting end to start with 4 mm between them, a third way
+    crossing above the meeting point (stacked road), and a way ending on a node
+    3 mm from its previous one.
+    """
+
+    nodes = [
+        localNode(1, 0.0, 0.0),
+        localNode(2, 10.0, 0.0),
+        localNode(3, 10.004, 0.0),
+        localNode(4, 20.0, 0.0),
+        localNode(5, 10.0, 0.0, ele = 5.0),
+        localNode(6, 10.0, 10.0, ele = 5.0),
+        localNode(7, 30.0, 0.0),
+        localNode(8, 30.003, 0.0),
+    ]
+    ways = [
+        (11, [1, 2], []),
+        (12, [3, 4], []),
+        (13, [5, 6], []),
+        (14, [4, 7, 8], []),
+    ]
+
+    return buildOSM(nodes, ways)
+
+
+def wayRefs(osm_root) -> dict:
+
+    return {way.get("id"): [nd.get("ref") for nd in way.iterfind("nd")] for way in osm_root.iterfind("way")}
+
+
+def test_weldNodes_merges_close_nodes():
+
+    osm_root = weldingTree()
+    node_id_remap = {}
+
+    num_welded = weldNodes(osm_root, 0.01, node_id_remap)
+
+    assert num_welded == 2
+    assert node_id_remap == {"3": "2", "8": "7"}
+    assert [node.get("id") for node in osm_root.iterfind("node")] == ["1", "2", "4", "5", "6", "7"]
+    assert wayRefs(osm_root) == {
+        "11": ["1", "2"],
+        "12": ["2", "4"],
+        "13": ["5", "6"],               # 5 m above node 2, not welded
+        "14": ["4", "7"],               # Repeated 7 collapsed
+    }
+
+
+def test_weldNodes_keeps_degenerate_ways():
+
+    osm_root = buildOSM(
+        [localNode(1, 0.0, 0.0), localNode(2, 0.001, 0.0)],
+        [(11, [1, 2], [])]
+    )
+
+    assert weldNodes(osm_root, 0.01) == 1
+    assert wayRefs(osm_root) == {"11": ["1", "1"]}
+
+
+def test_weldNodes_below_epsilon_is_noop():
+
+    osm_root = weldingTree()
+
+    assert weldNodes(osm_root, 0.001) == 0
+    assert len(osm_root.findall("node")) == 8
+
+
+@pytest.mark.parametrize("epsilon", [0.0, -1.0, float("nan"), float("inf")])
+def test_weldNodes_rejects_bad_epsilon(epsilon):
+
+    with pytest.raises(ValueError):
+        weldNodes(weldingTree(), epsilon)
@@ -0,0 +1,648 @@
+#! /usr/bin/env python3
+
+import os
+import csv
+import argparse
+from datetime import date
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+
+from crdesigner.common.config.lanelet2_config import lanelet2_config
+from crdesigner.common.config.opendrive_config import OpenDriveConfig
+from .conversion import PROJ_MET, prepConversionCRS, convertOpenDriveWithMapping, OSMLaneletConverter
+from .mapping import buildIdMappingRows, writeIdMappingCSV, readIdMappingCSV
+from .mapping_store import IdMappingStore
+from .cache import ConversionCache, DEFAULT_CACHE_MAX_BYTES
+from .postprocess import (
+    iterDownsampledOSM,
+    iterDownsampledOSMLanelet,
+    osmLaneletRoot,
+    postprocessDownsamplingOSM,
+    postprocessDownsamplingOSMLanelet,
+    SIMPLIFY_MODES,
+    BATCH_ANGLE_FRAME,
+    DEFAULT_MAX_ERROR,
+    STRAIGHT_ANGLE_THRSH,
+    MIN_SEGMENT_DIST
+)
+from .writer import OSMOutputOptions, streamOSM, writeOSMWithOptions, addOutputArgs, outputOptionsFromArgs
+from .welding import weldNodes, writeNodeRemapCSV
+from .binary_map import writeBinaryMap
+from .tuning import AUTO_MODE, tuneDownsamplingWayArrays, formatTuningResult
+from .sweep import WayArrays
+from .fidelity import fidelityReport, writeFidelityReport, formatFidelitySummary
+from .planview import SAMPLING_MODES, DEFAULT_CHORD_TOLERANCE
+from .instrument import FileRecord, stage, osmCounts, osmLaneletCounts, countedElements, writeJSONLines, writeStagesCSV
+from .projection import TRANSFORMER_REGISTRY
+
+DEFAULT_SET_LIST = [
+    "naive",
+    "CARLA",
+    "esmini",
+    "SafetyPool_Emil",
+    "custom",
+]
+
+TIMES_LOG_HEADER = [
+    "set_name",
+    "input_file",
+    "conversion_time_secs",
+    "mapping_time_secs",
+    "downsampling_time_secs",
+    "total_time_secs"
+]
+
+
+def outputPaths(
+    input_file_path: str,
+    output_dir: str
+) -> dict[str, Path]:
+    """
+    Paths written for one input file: converted OSM, id mapping CSV, node remap CSV
+    when welding, binary map when asked for and, for incremental runs, the XODR fingerprints.
+    """
+
+    input_file_tail_trimmed = ".".join(Path(input_file_path).name.split(".")[ : -1])
+
+    return {
+        "osm": Path(output_dir) / f"converted_{input_file_tail_trimmed}.osm",
+        "mapping": Path(output_dir) / f"id_mapping_{input_file_tail_trimmed}.csv",
+        "node_remap": Path(output_dir) / f"node_remap_{input_file_tail_trimmed}.csv",
+        "binary": Path(output_dir) / f"converted_{input_file_tail_trimmed}.npz",
+        "fidelity": Path(output_dir) / f"fidelity_{input_file_tail_trimmed}.json",
+        "fingerprints": Path(output_dir) / f"fingerprints_{input_file_tail_trimmed}.json",
+    }
+
+
+def convertFile(
+    input_file_path: str,
+    output_dir: str,
+    straight_angle_threshold: float = STRAIGHT_ANGLE_THRSH,
+    min_segment_dist: float = MIN_SEGMENT_DIST,
+    concatenate_lanelets: bool = False,
+    georeference_string: str = PROJ_MET,
+    cache_dir: str = None,
+    cache_max_bytes: int = DEFAULT_CACHE_MAX_BYTES,
+    mode: str = "angle",
+    max_error: float = DEFAULT_MAX_ERROR,
+    weld_epsilon: float = None,
+    output_options: OSMOutputOptions = None,
+    binary_map: bool = False,
+    sampling: str = "dense",
+    chord_tolerance: float = DEFAULT_CHORD_TOLERANCE,
+    max_nodes_per_km: float = None,
+    max_nodes: int = None,
+    fidelity_report: bool = False
+):
+    """
+    Run the full chain on one file: parse -> export_commonroad_scenario -> CR2LaneletConverter
+    -> id mapping -> downsampling -> write. Self-contained so it can run in a worker process.
+    Freshly converted maps are downsampled straight from the converter's OSM model, the
+    pre-downsampling XML is only built when it has to go into the cache. Unless welding,
+    the fidelity report or the binary map need the downsampled tree, it is never built
+    either: downsampled elements are streamed into the output file as they come, and
+    the downsampling and serialization stages are recorded as one,
+    "downsampling_serialization".
+
+    Params
+    ------
+        input_file_path: str, path to the input XODR file.
+        output_dir: str, directory the converted OSM and the id mapping CSV are written to.
+        straight_angle_threshold: float, angle threshold, in degrees.
+        min_segment_dist: float, minimum distance between points, in meters.
+        concatenate_lanelets: bool, merge lane sections into single lanelets. Default False,
+            which preserves lane section boundaries in the output.
+        georeference_string: str, CRS of the scenario location. Default PROJ_MET.
+        cache_dir: str, optional, conversion cache directory. On a hit, conversion and
+            id mapping are loaded from the cache and only postprocessing runs.
+        cache_max_bytes: int, size cap of the conversion cache.
+        mode: str, simplification mode, one of SIMPLIFY_MODES, or AUTO_MODE to pick the mode
+            and its parameters with tuning.tuneDownsampling. Default "angle".
+        max_error: float, maximum deviation, in meters, error-bounded and auto modes only.
+        weld_epsilon: float, optional, merge output nodes closer than this, in meters,
+            and write the node remap CSV. Default None, no welding.
+        output_options: OSMOutputOptions, optional, precision, indentation and compression
+            of the converted OSM. Default the historical pretty printed, full precision output.
+        binary_map: bool, also write the binary map (see binary_map.writeBinaryMap) next to
+            the converted OSM. Default False.
+        sampling: str, lanelet vertex placement, one of SAMPLING_MODES. Default "dense", crdesigner's
+            ~0.5 m step. "analytic" places vertices from the plan view and lane width geometry.
+        chord_tolerance: float, max distance between a lane border and its polyline with analytic
+            sampling, in meters. OpenDriveConfig.error_tolerance, shared by the whole process,
+            is left alone.
+        max_nodes_per_km, max_nodes: optional, node budget of auto mode, per km of lane
+            boundary and in total. Default None, auto mode then only bounds the error.
+        fidelity_report: bool, compare the output ways with the converted ones and write the
+            per-way deviation summary and worst offenders (see fidelity.fidelityReport) next to
+            the converted OSM. Default False.
+
+    Returns
+    -------
+        times: dict[str, float] | None, per-stage processing times, None if conversion failed.
+    """
+
+    start_moment = os.times()
+
+    # Input handling
+    input_file_path = Path(input_file_path)
+    print(f"\nConverting {input_file_path}")
+
+    # Output handling
+    if (output_options is None):
+        output_options = OSMOutputOptions()
+    paths = outputPaths(input_file_path, output_dir)
+    output_path = paths["osm"].with_suffix(output_options.suffix)
+    mapping_path = paths["mapping"]
+
+    odr_conf = OpenDriveConfig()
+    odr_conf.concatenate_lanelets_flag = concatenate_lanelets
+    scenario_location = prepConversionCRS(georeference_string)
+
+    cache = None
+    cached = None
+    if (cache_dir is not None):
+        cache = ConversionCache(cache_dir, cache_max_bytes)
+        cache_key = cache.key(input_file_path, odr_conf, lanelet2_config, georeference_string, sampling, chord_tolerance)
+        with stage("cache_lookup") as cache_stage:
+            cached = cache.load(cache_key)
+            cache_stage["output"] = {"hit": cached is not None}
+
+    # Conversion, either the pre-downsampling XML (cache hit) or the converter's OSM model
+    converted_osm = None
+    osm_model = None
+    converter = None
+    scenario = None
+    cr_lanelet_to_odr_lane = {}
+    if (cached is not None):
+        print(f"Cache hit for {input_file_path}")
+        scenario = cached.scenario
+        converted_osm = cached.predown_osm
+    else:
+        try:
+            scenario, cr_lanelet_to_odr_lane = convertOpenDriveWithMapping(
+                input_file = input_file_path,
+                odr_conf = odr_conf,
+                sampling = sampling,
+                chord_tolerance = chord_tolerance
+            )
+            scenario.location = scenario_location
+            with stage(
+                "cr2lanelet", 
+                lanelets = len(scenario.lanelet_network.lanelets)
+            ) as cr2lanelet_stage:
+                converter = OSMLaneletConverter(lanelet2_config)
+                osm_model = converter(scenario)
+                cr2lanelet_stage["output"] = osmLaneletCounts(osm_model)
+        except Exception as e:
+            print(f"Error during conversion: {e}")
+
+    if (converted_osm is None) and (osm_model is None):
+        print(f"Conversion failed for {input_file_path}, skipping postprocessing and output.")
+        return None
+
+    done_conv_moment = os.times()
+    done_conv_time_secs = done_conv_moment.elapsed - start_moment.elapsed
+
+    # Save OpenDrive -> Lanelet2 ID mapping as CSV
+    start_mapping_moment = os.times()
+
+    with stage("id_mapping") as mapping_stage:
+        if (cached is not None):
+            mapping_rows = cached.mapping_rows
+        else:
+            mapping_rows = buildIdMappingRows(converter, cr_lanelet_to_odr_lane)
+        writeIdMappingCSV(mapping_path, mapping_rows)
+        mapping_stage["output"] = {"rows": len(mapping_rows)}
+
+    if (cached is None) and (cache is not None):
+        with stage("cache_store"):
+            cache.store(cache_key, scenario, osm_model.serialize_to_xml(), mapping_rows, input_file_path)
+    print(f"ID mapping saved to {mapping_path} ({len(mapping_rows)} entries)")
+
+    done_mapping_moment = os.times()
+    done_mapping_time_secs = done_mapping_moment.elapsed - start_mapping_moment.elapsed
+
+    if (osm_model is not None):
+        downsamp_input = osm_model
+        downsamp_func = postprocessDownsamplingOSMLanelet
+        input_counts = osmLaneletCounts(osm_model)
+    else:
+        downsamp_input = converted_osm
+        downsamp_func = postprocessDownsamplingOSM
+        input_counts = osmCounts(converted_osm)
+
+    # Downsampling works in place, ways are extracted before it for tuning and validation
+    way_arrays = None
+    if (mode == AUTO_MODE) or (fidelity_report):
+        with stage("way_extraction", **input_counts):
+            way_arrays_func = WayArrays.fromOSMLanelet if (osm_model is not None) else WayArrays.fromOSM
+            way_arrays = way_arrays_func(downsamp_input, georeference_string)
+
+    if (mode == AUTO_MODE):
+        with stage("tuning", **input_counts) as tuning_stage:
+            tuning = tuneDownsamplingWayArrays(
+                way_arrays,
+                max_error = max_error,
+                max_nodes_per_km = max_nodes_per_km,
+                max_nodes = max_nodes
+            )
+            tuning_stage["output"] = {
+                **tuning.downsamplingKwargs(),
+                "nodes": tuning.nodes,
+                "nodes_per_km": tuning.nodes_per_km,
+                "measured_error": tuning.measured_error,
+                "within_budget": tuning.within_budget,
+                "within_error": tuning.within_error,
+            }
+        print(f"Tuned downsampling: {formatTuningResult(tuning)}")
+        straight_angle_threshold = tuning.straight_angle_threshold
+        min_segment_dist = tuning.min_segment_dist
+        mode = tuning.mode
+        max_error = tuning.max_error
+
+    downsampling_kwargs = {
+        "geostring": georeference_string,
+        "latlon_output": False,
+        "mode": mode,
+        "max_error": max_error,
+        "angle_frame": BATCH_ANGLE_FRAME,
+    }
+
+    # Nothing else needs the downsampled tree: stream the downsampled elements straight
+    # into the output, downsampling then happens while writing, in a single stage
+    if (weld_epsilon is None) and (not fidelity_report) and (not binary_map):
+        with stage("downsampling_serialization", **input_counts) as downsamp_stage:
+            if (osm_model is not None):
+                output_root = osmLaneletRoot("VMB")
+                elements = iterDownsampledOSMLanelet(
+                    osm_model,
+                    straight_angle_threshold,
+                    min_segment_dist,
+                    **downsampling_kwargs
+                )
+            else:
+                output_root = converted_osm
+                elements = iterDownsampledOSM(
+                    converted_osm,
+                    straight_angle_threshold,
+                    min_segment_dist,
+                    generator = "VMB",
+                    **downsampling_kwargs
+                )
+            output_counts = {"nodes": 0, "ways": 0, "relations": 0}
+            # Fresh elements, no one else holds them: rounded and indented in place
+            streamOSM(
+                output_path,
+                output_root,
+                countedElements(elements, output_counts),
+                pretty_print = output_options.pretty_print,
+                latlon_decimals = output_options.latlon_decimals,
+                metric_decimals = output_options.metric_decimals,
+                compression = output_options.compression,
+                copy_elements = False
+            )
+            downsamp_stage["output"] = {
+                **output_counts,
+                "bytes": os.path.getsize(output_path),
+                "format": output_options.label,
+            }
+        done_downsamp_moment = os.times()
+
+    else:
+        with stage("downsampling", **input_counts) as downsamp_stage:
+            downsamp_osm = downsamp_func(
+                downsamp_input, 
+                straight_angle_threshold,
+                min_segment_dist,
+                generator = "VMB",
+                **downsampling_kwargs
+            )
+            downsamp_stage["output"] = osmCounts(downsamp_osm)
+
+        if (weld_epsilon is not None):
+            with stage("welding", **osmCounts(downsamp_osm)) as welding_stage:
+                node_id_remap = {}
+                num_welded = weldNodes(downsamp_osm, weld_epsilon, node_id_remap)
+                writeNodeRemapCSV(paths["node_remap"], node_id_remap)
+                welding_stage["output"] = {"welded": num_welded, **osmCounts(downsamp_osm)}
+            print(f"Welded {num_welded} nodes closer than {weld_epsilon} m, remap saved to {paths['node_remap']}")
+
+        if (fidelity_report):
+            with stage("fidelity", **osmCounts(downsamp_osm)) as fidelity_stage:
+                report = fidelityReport(way_arrays, downsamp_osm)
+                writeFidelityReport(paths["fidelity"], report)
+                fidelity_stage["output"] = report.summary()
+            print(f"Fidelity: {formatFidelitySummary(report)}, report saved to {paths['fidelity']}")
+
+        done_downsamp_moment = os.times()
+
+        with stage("serialization") as serialization_stage:
+            writeOSMWithOptions(downsamp_osm, output_path, output_options)
+            serialization_stage["output"] = {
+                "bytes": os.path.getsize(output_path),
+                "format": output_options.label,
+            }
+
+    done_downsamp_time_secs = done_downsamp_moment.elapsed - done_mapping_moment.elapsed
+
+    if (binary_map):
+        with stage("binary_export") as binary_stage:
+            writeBinaryMap(downsamp_osm, paths["binary"])
+            binary_stage["output"] = {"bytes": os.path.getsize(paths["binary"])}
+        print(f"Binary map saved to : {paths['binary']}")
+
+    total_time_secs = done_downsamp_moment.elapsed - start_moment.elapsed
+
+    print(f"Converted file saved to : {output_path}")
+    print(f"Conversion time: {done_conv_time_secs:.2f} secs")
+    print(f"Mapping time: {done_mapping_time_secs:.2f} secs")
+    print(f"Downsampling time: {done_downsamp_time_secs:.2f} secs")
+    print(f"Total processing time: {total_time_secs:.2f} secs")
+
+    return {
+        "conversion_time_secs": done_conv_time_secs,
+        "mapping_time_secs": done_mapping_time_secs,
+        "downsampling_time_secs": done_downsamp_time_secs,
+        "total_time_secs": total_time_secs
+    }
+
+
+def _convertJob(
+    set_name: str,
+    trace_memory: bool,
+    *args
+):
+    """
+    Worker entry point, runs convertFile under a FileRecord and returns both.
+    """
+
+    record = FileRecord(args[0], trace_memory = trace_memory, set_name = set_name)
+    with record.activate():
+        times = convertFile(*args)
+
+    record.meta["converted"] = times is not None
+    record.meta["transformer_registry"] = TRANSFORMER_REGISTRY.stats()
+
+    return times, record.toDict()
+
+
+def listBatchJobs(
+    input_dir: str,
+    set_list: list[str] = DEFAULT_SET_LIST
+) -> list[tuple[str, str]]:
+    """
+    List (set_name, input_file) pairs to convert, in a stable order.
+
+    Params
+    ------
+        input_dir: str, directory holding one sub-directory per set.
+        set_list: list[str], set names to convert.
+
+    Returns
+    -------
+        jobs: list[tuple[str, str]], (set_name, input_file) pairs.
+    """
+
+    return [
+        (set_name, input_file)
+        for set_name in set_list
+        for input_file in sorted(os.listdir(Path(input_dir) / set_name))
+    ]
+
+
+def writeTimesLog(
+    times_log_path: str,
+    process_time_log: dict[str, dict[str, dict]]
+):
+    """
+    Save processing times log as CSV.
+
+    Params
+    ------
+        times_log_path: str, output CSV path.
+        process_time_log: dict, set_name -> input_file -> times dict (None if conversion failed).
+    """
+
+    with open(
+        times_log_path, "w", 
+        newline = ""
+    ) as csv_file:
+        writer = csv.writer(csv_file)
+        writer.writerow(TIMES_LOG_HEADER)
+
+        for set_name, file_times in process_time_log.items():
+            for input_file, times in file_times.items():
+                if (times is not None):
+                    writer.writerow([
+                        set_name,
+                        input_file,
+                        f"{times['conversion_time_secs']:.2f}",
+                        f"{times['mapping_time_secs']:.2f}",
+                        f"{times['downsampling_time_secs']:.2f}",
+                        f"{times['total_time_secs']:.2f}"
+                    ])
+                else:
+                    writer.writerow([
+                        set_name, input_file, 
+                        "conversion_failed", "", "", ""
+                    ])
+
+
+def runBatch(
+    input_dir: str,
+    output_dir: str,
+    set_list: list[str] = DEFAULT_SET_LIST,
+    workers: int = 1,
+    straight_angle_threshold: float = STRAIGHT_ANGLE_THRSH,
+    min_segment_dist: float = MIN_SEGMENT_DIST,
+    concatenate_lanelets: bool = False,
+    cache_dir: str = None,
+    cache_max_bytes: int = DEFAULT_CACHE_MAX_BYTES,
+    trace_memory: bool = False,
+    mode: str = "angle",
+    max_error: float = DEFAULT_MAX_ERROR,
+    weld_epsilon: float = None,
+    mapping_db: str = None,
+    output_options: OSMOutputOptions = None,
+    binary_map: bool = False,
+    sampling: str = "dense",
+    chord_tolerance: float = DEFAULT_CHORD_TOLERANCE,
+    max_nodes_per_km: float = None,
+    max_nodes: int = None,
+    fidelity_report: bool = False
+):
+    """
+    Convert every file of every set, fanning files out to a process pool.
+    Each file is converted independently, so the outputs do not depend on the worker count.
+
+    Params
+    ------
+        input_dir: str, directory holding one sub-directory per set.
+        output_dir: str, output directory, one sub-directory per set is created in it.
+        set_list: list[str], set names to convert.
+        workers: int, number of worker processes. 1 runs everything in this process.
+        straight_angle_threshold: float, angle threshold, in degrees.
+        min_segment_dist: float, minimum distance between points, in meters.
+        concatenate_lanelets: bool, merge lane sections into single lanelets. Default False.
+        cache_dir: str, optional, conversion cache directory shared by all workers.
+        cache_max_bytes: int, size cap of the conversion cache.
+        trace_memory: bool, record per-stage tracemalloc peaks in the stage log. Default False.
+        mode: str, simplification mode, one of SIMPLIFY_MODES or AUTO_MODE. Default "angle".
+        max_error: float, maximum deviation, in meters, error-bounded and auto modes only.
+        weld_epsilon: float, optional, node welding distance, in meters. Default None, no welding.
+        mapping_db: str, optional, SQLite IdMappingStore the id mappings of every converted
+            file are also written to, keyed "set_name/input_file".
+        output_options: OSMOutputOptions, optional, format of the converted OSM files.
+        binary_map: bool, also write a binary map per converted file. Default False.
+        sampling: str, lanelet vertex placement, one of SAMPLING_MODES. Default "dense".
+        chord_tolerance: float, border to polyline tolerance of analytic sampling, in meters.
+        max_nodes_per_km, max_nodes: optional, node budget of auto mode, see convertFile.
+        fidelity_report: bool, also write a fidelity report per converted file. Default False.
+
+    Returns
+    -------
+        process_time_log: dict, set_name -> input_file -> times dict (None if conversion failed).
+    """
+
+    jobs = listBatchJobs(input_dir, set_list)
+    for set_name in set_list:
+        os.makedirs(Path(output_dir) / set_name, exist_ok = True)
+
+    job_args = [
+        (
+            set_name,
+            trace_memory,
+            Path(input_dir) / set_name / input_file,
+            Path(output_dir) / set_name,
+            straight_angle_threshold,
+            min_segment_dist,
+            concatenate_lanelets,
+            PROJ_MET,
+            cache_dir,
+            cache_max_bytes,
+            mode,
+            max_error,
+            weld_epsilon,
+            output_options,
+            binary_map,
+            sampling,
+            chord_tolerance,
+            max_nodes_per_km,
+            max_nodes,
+            fidelity_report
+        )
+        for set_name, input_file in jobs
+    ]
+
+    # A failing file is recorded as not converted and the batch goes on, with or without a pool
+    results = []
+    if (workers <= 1):
+        for (set_name, input_file), args in zip(jobs, job_args):
+            try:
+                results.append(_convertJob(*args))
+            except Exception as e:
+                print(f"Job failed on {set_name}/{input_file}: {e}")
+                results.append((None, None))
+    else:
+        with ProcessPoolExecutor(max_workers = workers) as executor:
+            futures = [executor.submit(_convertJob, *args) for args in job_args]
+            for (set_name, input_file), future in zip(jobs, futures):
+                try:
+                    results.append(future.result())
+                except Exception as e:
+                    print(f"Job failed on {set_name}/{input_file}: {e}")
+                    results.append((None, None))
+
+    # Gather in job order, regardless of completion order
+    process_time_log = {set_name: {} for set_name in set_list}
+    stage_records = []
+    for (set_name, input_file), (times, record) in zip(jobs, results):
+        process_time_log[set_name][input_file] = times
+        if (record is not None):
+            stage_records.append(record)
+
+    # Workers only write CSVs, the store is written from this process alone
+    if (mapping_db is not None):
+        with IdMappingStore(mapping_db) as store:
+            for set_name, input_file in jobs:
+                if (process_time_log[set_name][input_file] is not None):
+                    mapping_path = outputPaths(input_file, Path(output_dir) / set_name)["mapping"]
+                    store.writeMap(f"{set_name}/{input_file}", readIdMappingCSV(mapping_path))
+
+    writeTimesLog(Path(output_dir) / "processing_times_log.csv", process_time_log)
+    writeJSONLines(Path(output_dir) / "stage_log.jsonl", stage_records)
+    writeStagesCSV(Path(output_dir) / "stage_log.csv", stage_records)
+
+    return process_time_log
+
+
+def main(argv: list[str] = None):
+
+    parser = argparse.ArgumentParser(
+        description = "Batch convert OpenDRIVE files to downsampled Lanelet2 OSM."
+    )
+    parser.add_argument("--input-dir", default = "./sample_data")
+    parser.add_argument("--output-dir", default = f"./output/{date.today().isoformat()}")
+    parser.add_argument("--sets", nargs = "+", default = DEFAULT_SET_LIST)
+    parser.add_argument("--workers", type = int, default = os.cpu_count())
+    parser.add_argument("--angle", type = float, default = STRAIGHT_ANGLE_THRSH,
+                        help = "straight angle threshold, in degrees")
+    parser.add_argument("--min-dist", type = float, default = MIN_SEGMENT_DIST,
+                        help = "minimum segment length, in meters")
+    parser.add_argument("--mode", choices = SIMPLIFY_MODES + (AUTO_MODE,), default = "angle",
+                        help = "simplification mode, --angle/--min-dist only apply to angle mode, "
+                               "auto picks mode and parameters for the node budget")
+    parser.add_argument("--max-error", type = float, default = DEFAULT_MAX_ERROR,
+                        help = "max deviation in meters for douglas_peucker/visvalingam/auto")
+    parser.add_argument("--max-nodes-per-km", type = float, default = None,
+                        help = "auto mode node budget, per km of lane boundary")
+    parser.add_argument("--max-nodes", type = int, default = None,
+                        help = "auto mode node budget, in total per file")
+    parser.add_argument("--weld-epsilon", type = float, default = None,
+                        help = "merge output nodes closer than this, in meters")
+    parser.add_argument("--concatenate-lanelets", action = "store_true")
+    parser.add_argument("--sampling", choices = SAMPLING_MODES, default = "dense",
+                        help = "analytic: place lanelet vertices from the plan view geometry")
+    parser.add_argument("--chord-tolerance", type = float, default = DEFAULT_CHORD_TOLERANCE,
+                        help = "max border to polyline distance of analytic sampling, in meters")
+    parser.add_argument("--cache-dir", default = None,
+                        help = "reuse conversion artifacts across runs, e.g. when retuning downsampling")
+    parser.add_argument("--cache-max-mb", type = float, default = DEFAULT_CACHE_MAX_BYTES / 1024 ** 2)
+    parser.add_argument("--mapping-db", default = None,
+                        help = "also write every id mapping to this SQLite store")
+    parser.add_argument("--trace-memory", action = "store_true",
+                        help = "record per-stage tracemalloc peaks, slower")
+    parser.add_argument("--binary-map", action = "store_true",
+                        help = "also write converted_*.npz binary maps, see utils.binary_map")
+    parser.add_argument("--fidelity-report", action = "store_true",
+                        help = "also write fidelity_*.json, per-way deviation of the output from the converted ways")
+    addOutputArgs(parser)
+    args = parser.parse_args(argv)
+
+    runBatch(
+        input_dir = args.input_dir,
+        output_dir = args.output_dir,
+        set_list = args.sets,
+        workers = args.workers,
+        straight_angle_threshold = args.angle,
+        min_segment_dist = args.min_dist,
+        concatenate_lanelets = args.concatenate_lanelets,
+        cache_dir = args.cache_dir,
+        cache_max_bytes = int(args.cache_max_mb * 1024 ** 2),
+        trace_memory = args.trace_memory,
+        mode = args.mode,
+        max_error = args.max_error,
+        weld_epsilon = args.weld_epsilon,
+        mapping_db = args.mapping_db,
+        output_options = outputOptionsFromArgs(args),
+        binary_map = args.binary_map,
+        sampling = args.sampling,
+        chord_tolerance = args.chord_tolerance,
+        max_nodes_per_km = args.max_nodes_per_km,
+        max_nodes = args.max_nodes,
+        fidelity_report = args.fidelity_report
+    )
+
+
+if __name__ == "__main__":
+    main()
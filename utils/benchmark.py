@@ -0,0 +1,396 @@
+#! /usr/bin/env python3
+
+import sys
+import copy
+import json
+import time
+import argparse
+import statistics
+import tracemalloc
+from pathlib import Path
+from lxml import etree
+
+from crdesigner.common.config.lanelet2_config import lanelet2_config
+from crdesigner.common.config.opendrive_config import OpenDriveConfig
+from .conversion import PROJ_MET, prepConversionCRS, convertOpenDriveWithMapping, convertToOSMLanelet
+from .postprocess import postprocessDownsamplingOSM, postprocessDownsamplingOSMLanelet, BATCH_ANGLE_FRAME
+from .instrument import osmCounts, osmLaneletCounts
+from .cache import ConversionCache
+from .batch import DEFAULT_SET_LIST, STRAIGHT_ANGLE_THRSH, MIN_SEGMENT_DIST, listBatchJobs
+
+# "downsampling" is convertFile's path on a fresh conversion (converter's OSM model),
+# "downsampling_xml" its path on a cache hit (pre-downsampling XML)
+BENCHMARK_STAGES = ["conversion", "downsampling", "downsampling_xml"]
+DEFAULT_TOLERANCE = 0.20                # Allowed slowdown vs. baseline median, 20%
+DEFAULT_MIN_DELTA_SECS = 0.05           # Slowdowns below this are noise, whatever the ratio
+
+
+def countRoads(xodr_path: str) -> int:
+    """
+    Count <road> elements of an XODR file, streaming.
+    """
+
+    num_roads = 0
+    for _, elem in etree.iterparse(str(xodr_path), events = ("end",), tag = "road"):
+        num_roads += 1
+        elem.clear()
+
+    return num_roads
+
+
+def _convert(
+    input_file: str,
+    odr_conf: OpenDriveConfig
+):
+
+    scenario, _ = convertOpenDriveWithMapping(input_file, odr_conf)
+    scenario.location = prepConversionCRS(PROJ_MET)
+    return convertToOSMLanelet(scenario), scenario
+
+
+def _downsample(
+    downsamp_func,
+    predown_osm,
+    straight_angle_threshold: float,
+    min_segment_dist: float
+):
+
+    return downsamp_func(
+        predown_osm,
+        straight_angle_threshold,
+        min_segment_dist,
+        geostring = PROJ_MET,
+        latlon_output = False,
+        angle_frame = BATCH_ANGLE_FRAME
+    )
+
+
+def _summarize(runs: list[float]) -> dict:
+
+    return {
+        "runs": runs,
+        "median_secs": statistics.median(runs),
+        "min_secs": min(runs),
+    }
+
+
+def _tracemallocPeak(func, *args) -> float:
+    """
+    Peak traced memory of one untimed call, in MB.
+    """
+
+    tracemalloc.start()
+    try:
+        func(*args)
+        return tracemalloc.get_traced_memory()[1] / 1024 ** 2
+    finally:
+        tracemalloc.stop()
+
+
+def _benchmarkDownsampling(
+    downsamp_func,
+    predown_osm,
+    input_counts: dict[str, int],
+    in_place: bool,
+    warmup: int,
+    repeat: int,
+    straight_angle_threshold: float,
+    min_segment_dist: float,
+    measure_memory: bool
+) -> dict:
+    """
+    Time one downsampling path. Inputs downsampled in place are copied outside timing.
+    """
+
+    def prepInput():
+        return copy.deepcopy(predown_osm) if (in_place) else predown_osm
+
+    for _ in range(warmup):
+        _downsample(downsamp_func, prepInput(), straight_angle_threshold, min_segment_dist)
+
+    runs = []
+    for _ in range(repeat):
+        osm_input = prepInput()
+        start = time.perf_counter()
+        downsamp_osm = _downsample(downsamp_func, osm_input, straight_angle_threshold, min_segment_dist)
+        runs.append(time.perf_counter() - start)
+
+    output_counts = osmCounts(downsamp_osm)
+    result = _summarize(runs)
+    result.update({
+        "input_nodes": input_counts["nodes"],
+        "output_nodes": output_counts["nodes"],
+        "nodes_per_sec": input_counts["nodes"] / result["median_secs"],
+        "node_reduction_ratio": 1 - output_counts["nodes"] / max(input_counts["nodes"], 1),
+    })
+    if (measure_memory):
+        result["tracemalloc_peak_mb"] = _tracemallocPeak(
+            _downsample,
+            downsamp_func,
+            prepInput(),
+            straight_angle_threshold,
+            min_segment_dist
+        )
+
+    return result
+
+
+def benchmarkFile(
+    input_file: str,
+    stages: list[str] = BENCHMARK_STAGES,
+    warmup: int = 1,
+    repeat: int = 3,
+    straight_angle_threshold: float = STRAIGHT_ANGLE_THRSH,
+    min_segment_dist: float = MIN_SEGMENT_DIST,
+    concatenate_lanelets: bool = False,
+    measure_memory: bool = True,
+    cache_dir: str = None
+) -> dict:
+    """
+    Benchmark conversion and/or downsampling of one file, with warmup and repeated runs.
+    Peak memory is measured with tracemalloc in one extra, untimed run per stage.
+
+    Params
+    ------
+        input_file: str, path to the input XODR file.
+        stages: list[str], subset of BENCHMARK_STAGES.
+        warmup: int, untimed runs per stage.
+        repeat: int, timed runs per stage.
+        straight_angle_threshold: float, angle threshold, in degrees.
+        min_segment_dist: float, minimum distance between points, in meters.
+        concatenate_lanelets: bool, merge lane sections into single lanelets. Default False.
+        measure_memory: bool, run the extra tracemalloc pass. Default True.
+        cache_dir: str, optional, conversion cache to take the pre-downsampling XML from
+            when only "downsampling_xml" is benchmarked.
+
+    Returns
+    -------
+        result: dict, per-stage timings and throughput, or {"error": ...} if conversion failed.
+    """
+
+    odr_conf = OpenDriveConfig()
+    odr_conf.concatenate_lanelets_flag = concatenate_lanelets
+
+    result = {"roads": countRoads(input_file)}
+
+    # Converter's OSM model and pre-downsampling XML, converted once outside any timing if not benchmarked
+    osm_model = None
+    predown_osm = None
+    try:
+        if ("conversion" in stages):
+            for _ in range(warmup):
+                _convert(input_file, odr_conf)
+
+            runs = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                osm_model, _ = _convert(input_file, odr_conf)
+                runs.append(time.perf_counter() - start)
+
+            result["conversion"] = _summarize(runs)
+            result["conversion"]["roads_per_sec"] = result["roads"] / result["conversion"]["median_secs"]
+            if (measure_memory):
+                result["conversion"]["tracemalloc_peak_mb"] = _tracemallocPeak(_convert, input_file, odr_conf)
+
+        elif ("downsampling" not in stages) and (cache_dir is not None):
+            cache = ConversionCache(cache_dir)
+            cached = cache.load(cache.key(input_file, odr_conf, lanelet2_config, PROJ_MET))
+            if (cached is not None):
+                predown_osm = cached.predown_osm
+
+        if (osm_model is None) and (predown_osm is None):
+            osm_model, _ = _convert(input_file, odr_conf)
+        if (predown_osm is None) and ("downsampling_xml" in stages):
+            predown_osm = osm_model.serialize_to_xml()
+
+    except Exception as e:
+        result["error"] = str(e)
+        return result
+
+    downsampling_kwargs = {
+        "warmup": warmup,
+        "repeat": repeat,
+        "straight_angle_threshold": straight_angle_threshold,
+        "min_segment_dist": min_segment_dist,
+        "measure_memory": measure_memory,
+    }
+    if ("downsampling" in stages):
+        # The model is left untouched, no copy needed
+        result["downsampling"] = _benchmarkDownsampling(
+            postprocessDownsamplingOSMLanelet,
+            osm_model,
+            osmLaneletCounts(osm_model),
+            in_place = False,
+            **downsampling_kwargs
+        )
+    if ("downsampling_xml" in stages):
+        result["downsampling_xml"] = _benchmarkDownsampling(
+            postprocessDownsamplingOSM,
+            predown_osm,
+            osmCounts(predown_osm),
+            in_place = True,
+            **downsampling_kwargs
+        )
+
+    return result
+
+
+def runBenchmark(
+    input_dir: str = "./sample_data",
+    set_list: list[str] = DEFAULT_SET_LIST,
+    **kwargs
+) -> dict[str, dict]:
+    """
+    Run benchmarkFile over every file of every set.
+
+    Params
+    ------
+        input_dir: str, directory holding one sub-directory per set.
+        set_list: list[str], set names to benchmark.
+        kwargs: forwarded to benchmarkFile.
+
+    Returns
+    -------
+        results: dict, "set_name/input_file" -> benchmarkFile result.
+    """
+
+    results = {}
+    for set_name, input_file in listBatchJobs(input_dir, set_list):
+        print(f"Benchmarking {set_name}/{input_file}")
+        results[f"{set_name}/{input_file}"] = benchmarkFile(
+            Path(input_dir) / set_name / input_file,
+            **kwargs
+        )
+
+    return results
+
+
+def compareToBaseline(
+    results: dict[str, dict],
+    baseline: dict[str, dict],
+    tolerance: float = DEFAULT_TOLERANCE,
+    min_delta_secs: float = DEFAULT_MIN_DELTA_SECS
+) -> list[str]:
+    """
+    List every (file, stage) whose median time got slower than the baseline by more
+    than tolerance (relative) and min_delta_secs (absolute).
+
+    Returns
+    -------
+        regressions: list[str], human-readable regression descriptions, empty if none.
+    """
+
+    regressions = []
+    for key, result in results.items():
+        for stage_name in BENCHMARK_STAGES:
+            current = result.get(stage_name)
+            reference = baseline.get(key, {}).get(stage_name)
+            if (current is None) or (reference is None):
+                continue
+
+            current_secs = current["median_secs"]
+            reference_secs = reference["median_secs"]
+            if (
+                (current_secs > reference_secs * (1 + tolerance)) and
+                (current_secs - reference_secs > min_delta_secs)
+            ):
+                regressions.append(
+                    f"{key} {stage_name}: {current_secs:.3f}s vs baseline {reference_secs:.3f}s "
+                    f"(+{(current_secs / reference_secs - 1) * 100:.0f}%)"
+                )
+
+    return regressions
+
+
+def printSummary(results: dict[str, dict]):
+
+    for key, result in results.items():
+        if ("error" in result):
+            print(f"{key}: conversion failed ({result['error']})")
+            continue
+
+        line = f"{key}: {result['roads']} roads"
+        if ("conversion" in result):
+            conversion = result["conversion"]
+            line += f" | conversion {conversion['median_secs']:.3f}s ({conversion['roads_per_sec']:.1f} roads/s"
+            if ("tracemalloc_peak_mb" in conversion):
+                line += f", peak {conversion['tracemalloc_peak_mb']:.1f} MB"
+            line += ")"
+        for stage_name in ("downsampling", "downsampling_xml"):
+            if (stage_name not in result):
+                continue
+            downsampling = result[stage_name]
+            line += (
+                f" | {stage_name} {downsampling['median_secs']:.3f}s "
+                f"({downsampling['nodes_per_sec']:.0f} nodes/s, "
+                f"{downsampling['input_nodes']} -> {downsampling['output_nodes']} nodes, "
+                f"-{downsampling['node_reduction_ratio'] * 100:.1f}%"
+            )
+            if ("tracemalloc_peak_mb" in downsampling):
+                line += f", peak {downsampling['tracemalloc_peak_mb']:.1f} MB"
+            line += ")"
+        print(line)
+
+
+def main(argv: list[str] = None) -> int:
+
+    parser = argparse.ArgumentParser(description = "Benchmark conversion and downsampling over sample_data.")
+    parser.add_argument("--input-dir", default = "./sample_data")
+    parser.add_argument("--sets", nargs = "+", default = DEFAULT_SET_LIST)
+    parser.add_argument("--stages", nargs = "+", choices = BENCHMARK_STAGES, default = BENCHMARK_STAGES)
+    parser.add_argument("--warmup", type = int, default = 1)
+    parser.add_argument("--repeat", type = int, default = 3)
+    parser.add_argument("--angle", type = float, default = STRAIGHT_ANGLE_THRSH)
+    parser.add_argument("--min-dist", type = float, default = MIN_SEGMENT_DIST)
+    parser.add_argument("--no-memory", action = "store_true", help = "skip the tracemalloc pass")
+    parser.add_argument("--cache-dir", default = None,
+                        help = "take pre-downsampling OSM from the conversion cache when possible")
+    parser.add_argument("--output", default = None, help = "write results as JSON")
+    parser.add_argument("--baseline", default = None, help = "baseline JSON to compare against")
+    parser.add_argument("--save-baseline", action = "store_true",
+                        help = "write results to --baseline instead of comparing")
+    parser.add_argument("--tolerance", type = float, default = DEFAULT_TOLERANCE)
+    parser.add_argument("--min-delta-secs", type = float, default = DEFAULT_MIN_DELTA_SECS)
+    args = parser.parse_args(argv)
+
+    results = runBenchmark(
+        input_dir = args.input_dir,
+        set_list = args.sets,
+        stages = args.stages,
+        warmup = args.warmup,
+        repeat = args.repeat,
+        straight_angle_threshold = args.angle,
+        min_segment_dist = args.min_dist,
+        measure_memory = not args.no_memory,
+        cache_dir = args.cache_dir
+    )
+    printSummary(results)
+
+    if (args.output is not None):
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent = 2)
+
+    if (args.baseline is None):
+        return 0
+
+    if (args.save_baseline):
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent = 2)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+
+    regressions = compareToBaseline(results, baseline, args.tolerance, args.min_delta_secs)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    if (regressions):
+        return 1
+
+    print(f"No regression beyond {args.tolerance * 100:.0f}% vs {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
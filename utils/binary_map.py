@@ -0,0 +1,542 @@
+#! /usr/bin/env python3
+
+import io
+import time
+import argparse
+import numpy as np
+from pathlib import Path
+from lxml import etree
+from .node_table import NodeTable
+from .writer import writeOSM
+
+BINARY_MAP_FORMAT_VERSION = 1
+BINARY_MAP_SUFFIX = ".npz"
+
+# Kinds of <osm> children and of their children, stored as uint8 codes
+ELEMENT_KINDS = ("node", "way", "relation")
+CHILD_KINDS = ("tag", "nd", "member")
+
+# Attribute names every child kind is written with, in order
+CHILD_ATTRS = {
+    "tag": ("k", "v"),
+    "nd": ("ref", ),
+    "member": ("type", "ref", "role"),
+}
+
+# Node attributes / tags whose values are stored in the numeric node columns
+NODE_COLUMNS = {
+    "lat": ("node_latlon", 0),
+    "lon": ("node_latlon", 1),
+    "local_x": ("node_local_xy", 0),
+    "local_y": ("node_local_xy", 1),
+    "ele": ("node_ele", None),
+}
+
+# Value codes: >= 0 is a string table index, negative codes are rebuilt from the element
+NO_STRING = -1                          # Absent value (<nd> key and value)
+OWN_ID = -2                             # The element's own ID
+COLUMN_REPR = -3                        # repr() of the node column value
+COLUMN_FIXED = -10                      # COLUMN_FIXED - d: node column value formatted with d decimals
+MAX_FIXED_DECIMALS = 17
+
+
+class _StringTable:
+    """
+    Deduplicating string -> ID table, encoded as one UTF-8 blob plus offsets.
+    """
+
+    def __init__(self):
+        self.ids = {}
+        self.strings = []
+
+    def id(self, string: str) -> int:
+
+        string_id = self.ids.get(string)
+        if (string_id is None):
+            string_id = len(self.strings)
+            self.ids[string] = string_id
+            self.strings.append(string)
+
+        return string_id
+
+    def encode(self) -> tuple[np.ndarray, np.ndarray]:
+
+        encoded = [string.encode() for string in self.strings]
+        offsets = np.zeros(len(encoded) + 1, dtype = np.int64)
+        np.cumsum([len(data) for data in encoded], out = offsets[1 : ])
+
+        return np.frombuffer(b"".join(encoded), dtype = np.uint8), offsets
+
+
+def _decodeStrings(
+    string_data: np.ndarray,
+    string_offsets: np.ndarray
+) -> list[str]:
+
+    data = string_data.tobytes()
+    offsets = string_offsets.tolist()
+
+    return [data[start : end].decode() for start, end in zip(offsets[ : -1], offsets[1 : ])]
+
+
+def _compactInts(values) -> np.ndarray:
+    """
+    Integer array in the smallest signed dtype holding all values.
+    """
+
+    values = np.asarray(values, dtype = np.int64)
+    if (len(values) == 0):
+        return values.astype(np.int8)
+
+    low, high = values.min(), values.max()
+    for dtype in (np.int8, np.int16, np.int32):
+        if (np.iinfo(dtype).min <= low) and (high <= np.iinfo(dtype).max):
+            return values.astype(dtype)
+
+    return values
+
+
+def _columnCode(
+    value: str,
+    column_value: float
+) -> int:
+    """
+    Code rebuilding value exactly from its numeric column, None if there is none.
+    """
+
+    if (repr(column_value) == value):
+        return COLUMN_REPR
+
+    _, dot, decimals = value.partition(".")
+    num_decimals = len(decimals) if (dot) else 0
+    if (num_decimals <= MAX_FIXED_DECIMALS) and (f"{column_value:.{num_decimals}f}" == value):
+        return COLUMN_FIXED - num_decimals
+
+    return None
+
+
+def _columnValue(
+    code: int,
+    column_value: float
+) -> str:
+
+    if (code == COLUMN_REPR):
+        return repr(column_value)
+
+    return f"{column_value:.{COLUMN_FIXED - code}f}"
+
+
+def _idRows(
+    ids: np.ndarray,
+    queries: np.ndarray
+) -> np.ndarray:
+    """
+    Rows of queries in ids, -1 where unknown.
+    """
+
+    queries = np.asarray(queries, dtype = np.int64)
+    rows = np.full(len(queries), -1, dtype = np.int64)
+    if (len(ids) == 0) or (len(queries) == 0):
+        return rows
+
+    order = np.argsort(ids, kind = "stable")
+    sorted_ids = ids[order]
+    positions = np.minimum(np.searchsorted(sorted_ids, queries), len(ids) - 1)
+    found = sorted_ids[positions] == queries
+    rows[found] = order[positions[found]]
+
+    return rows
+
+
+def _csr(
+    owners: np.ndarray,
+    num_owners: int
+) -> np.ndarray:
+    """
+    CSR offsets of rows grouped by (sorted) owner index.
+    """
+
+    offsets = np.zeros(num_owners + 1, dtype = np.int64)
+    np.cumsum(np.bincount(owners, minlength = num_owners), out = offsets[1 : ])
+
+    return offsets
+
+
+def osmToArrays(osm_root: etree.Element) -> dict[str, np.ndarray]:
+    """
+    Encode an OSM tree as flat arrays:
+        - typed columns consumers use directly: node IDs and lat/lon, local x/y and
+          ele columns, way -> node rows (CSR offsets + rows) and relation member
+          tables (kind, row in that kind's arrays, role);
+        - the exact document structure on top: every <osm> child (kind, attributes in
+          order) with its <tag>/<nd>/<member> children in order, strings deduplicated
+          in one table. Node coordinates are not repeated as strings when the numeric
+          columns format back to them exactly, which is the case for writer output.
+    Together they rebuild the XML byte for byte (indentation aside).
+
+    Raises
+    ------
+        ValueError, if the tree holds something the format cannot store losslessly
+        (unknown element, attribute layout or text content).
+
+    Returns
+    -------
+        arrays: dict[str, np.ndarray], ready for np.savez.
+    """
+
+    node_table = NodeTable.fromXML(osm_root)
+    local_xy = np.full((len(node_table), 2), np.nan, dtype = np.float64)
+    for row, tags in node_table.tags.items():
+        tags = dict(tags)
+        if ("local_x" in tags) and ("local_y" in tags):
+            local_xy[row] = (float(tags["local_x"]), float(tags["local_y"]))
+    columns = {
+        "node_latlon": node_table.coords.tolist(),
+        "node_local_xy": local_xy.tolist(),
+        "node_ele": node_table.ele.tolist(),
+    }
+
+    def nodeColumnValue(name: str, node_row: int) -> float:
+        column, index = NODE_COLUMNS[name]
+        value = columns[column][node_row]
+        return value if (index is None) else value[index]
+
+    strings = _StringTable()
+    element_kind = []
+    element_ids = []
+    attr_offsets = [0]
+    attr_keys = []
+    attr_values = []
+    child_offsets = [0]
+    child_kind = []
+    child_key = []
+    child_value = []
+    child_ref = []
+    node_row = -1
+
+    for element in osm_root:
+        if (element.tag not in ELEMENT_KINDS) or ((element.text or "").strip()):
+            raise ValueError(f"Cannot store <{element.tag}> element losslessly")
+
+        is_node = element.tag == "node"
+        node_row += is_node
+        element_kind.append(ELEMENT_KINDS.index(element.tag))
+        element_ids.append(int(element.get("id")))
+
+        for key, value in element.attrib.items():
+            code = None
+            if (key == "id") and (value == str(element_ids[-1])):
+                code = OWN_ID
+            elif (is_node) and (key in NODE_COLUMNS):
+                code = _columnCode(value, nodeColumnValue(key, node_row))
+            attr_keys.append(strings.id(key))
+            attr_values.append(strings.id(value) if (code is None) else code)
+        attr_offsets.append(len(attr_keys))
+
+        for child in element:
+            if (child.tag not in CHILD_KINDS) or (tuple(child.attrib) != CHILD_ATTRS[child.tag]):
+                raise ValueError(f"Cannot store <{child.tag}> of {element.tag} {element.get('id')} losslessly")
+
+            child_kind.append(CHILD_KINDS.index(child.tag))
+            if (child.tag == "tag"):
+                key, value = child.get("k"), child.get("v")
+                code = None
+                if (is_node) and (key in NODE_COLUMNS):
+                    code = _columnCode(value, nodeColumnValue(key, node_row))
+                child_key.append(strings.id(key))
+                child_value.append(strings.id(value) if (code is None) else code)
+                child_ref.append(0)
+            elif (child.tag == "nd"):
+                child_key.append(NO_STRING)
+                child_value.append(NO_STRING)
+                child_ref.append(int(child.get("ref")))
+            else:
+                child_key.append(strings.id(child.get("type")))
+                child_value.append(strings.id(child.get("role")))
+                child_ref.append(int(child.get("ref")))
+        child_offsets.append(len(child_kind))
+
+    root_keys = [strings.id(key) for key in osm_root.attrib]
+    root_values = [strings.id(value) for value in osm_root.attrib.values()]
+    string_data, string_offsets = strings.encode()
+
+    element_kind = np.array(element_kind, dtype = np.uint8)
+    element_ids = np.array(element_ids, dtype = np.int64)
+    child_offsets = np.array(child_offsets, dtype = np.int64)
+    child_kind = np.array(child_kind, dtype = np.uint8)
+    child_key = np.array(child_key, dtype = np.int64)
+    child_value = np.array(child_value, dtype = np.int64)
+    child_ref = np.array(child_ref, dtype = np.int64)
+
+    arrays = {
+        "format_version": np.array([BINARY_MAP_FORMAT_VERSION], dtype = np.int64),
+        "string_data": string_data,
+        "string_offsets": string_offsets,
+        "root_attr_keys": _compactInts(root_keys),
+        "root_attr_values": _compactInts(root_values),
+        "element_kind": element_kind,
+        "element_attr_offsets": np.array(attr_offsets, dtype = np.int64),
+        "attr_keys": _compactInts(attr_keys),
+        "attr_values": _compactInts(attr_values),
+        "element_child_offsets": child_offsets,
+        "child_kind": child_kind,
+        "child_key": _compactInts(child_key),
+        "child_value": _compactInts(child_value),
+        "child_ref": _compactInts(child_ref),
+        "node_latlon": node_table.coords,
+        "node_local_xy": local_xy,
+        "node_ele": node_table.ele,
+    }
+
+    kind_rows = np.zeros(len(element_kind), dtype = np.int64)
+    for kind, name in enumerate(ELEMENT_KINDS):
+        elements = np.flatnonzero(element_kind == kind)
+        kind_rows[elements] = np.arange(len(elements))
+        arrays[f"{name}_ids"] = element_ids[elements]
+
+    # Way -> node rows and relation -> member rows, grouped per owner as CSR
+    child_owner = np.repeat(np.arange(len(element_kind)), np.diff(child_offsets))
+
+    way_children = np.flatnonzero(child_kind == CHILD_KINDS.index("nd"))
+    arrays["way_node_offsets"] = _csr(kind_rows[child_owner[way_children]], len(arrays["way_ids"]))
+    arrays["way_node_rows"] = _compactInts(_idRows(arrays["node_ids"], child_ref[way_children]))
+
+    member_children = np.flatnonzero(child_kind == CHILD_KINDS.index("member"))
+    type_names = np.array(strings.strings + [""], dtype = object)
+    member_kind = np.array(
+        [ELEMENT_KINDS.index(name) for name in type_names[child_key[member_children]]],
+        dtype = np.uint8
+    )
+    member_rows = np.full(len(member_children), -1, dtype = np.int64)
+    for kind, name in enumerate(ELEMENT_KINDS):
+        is_kind = member_kind == kind
+        member_rows[is_kind] = _idRows(arrays[f"{name}_ids"], child_ref[member_children[is_kind]])
+    arrays["relation_member_offsets"] = _csr(kind_rows[child_owner[member_children]], len(arrays["relation_ids"]))
+    arrays["relation_member_kind"] = member_kind
+    arrays["relation_member_rows"] = _compactInts(member_rows)
+    arrays["relation_member_role"] = _compactInts(child_value[member_children])
+
+    return arrays
+
+
+def writeBinaryMap(
+    osm_root: etree.Element,
+    output,
+    compressed: bool = False
+):
+    """
+    Write the binary form of an OSM tree (see osmToArrays) as .npz.
+
+    Params
+    ------
+        osm_root: lxml.etree.Element, <osm> root, e.g. the downsampled output.
+        output: str | Path | binary file-like, where to write, written as given (no suffix added).
+        compressed: bool, deflate the arrays, smaller but slower to load. Default False.
+    """
+
+    arrays = osmToArrays(osm_root)
+    save = np.savez_compressed if (compressed) else np.savez
+    if hasattr(output, "write"):
+        save(output, **arrays)
+    else:
+        with open(output, "wb") as file_out:
+            save(file_out, **arrays)
+
+
+class BinaryMap:
+    """
+    Converted map loaded from its binary form. Every array of osmToArrays is an
+    attribute (node_ids, node_latlon, node_local_xy, node_ele, way_ids,
+    way_node_offsets, way_node_rows, relation_member_rows...), strings are only
+    decoded when asked for.
+    """
+
+    def __init__(self, arrays: dict[str, np.ndarray]):
+
+        version = int(arrays["format_version"][0])
+        if (version != BINARY_MAP_FORMAT_VERSION):
+            raise ValueError(f"Unsupported binary map format version {version}, expected {BINARY_MAP_FORMAT_VERSION}")
+
+        self.__dict__.update(arrays)
+        self._strings = None
+
+    @classmethod
+    def load(cls, path) -> "BinaryMap":
+
+        with np.load(path) as npz:
+            return cls({name: npz[name] for name in npz.files})
+
+    @property
+    def strings(self) -> list[str]:
+
+        if (self._strings is None):
+            self._strings = _decodeStrings(self.string_data, self.string_offsets)
+
+        return self._strings
+
+    def elements(self, kind: str) -> np.ndarray:
+        """
+        Document positions of the elements of one kind, in row order.
+        """
+
+        return np.flatnonzero(self.element_kind == ELEMENT_KINDS.index(kind))
+
+    def wayNodeRows(self, way_row: int) -> np.ndarray:
+        """
+        Node rows of one way, in order, -1 for refs to missing nodes.
+        """
+
+        return self.way_node_rows[self.way_node_offsets[way_row] : self.way_node_offsets[way_row + 1]]
+
+    def relationMembers(self, relation_row: int) -> list[tuple[str, int, str]]:
+        """
+        (kind, row in that kind's arrays, role) of every member of one relation.
+        """
+
+        start, end = self.relation_member_offsets[relation_row : relation_row + 2]
+
+        return [
+            (ELEMENT_KINDS[kind], row, self.strings[role])
+            for kind, row, role in zip(
+                self.relation_member_kind[start : end].tolist(),
+                self.relation_member_rows[start : end].tolist(),
+                self.relation_member_role[start : end].tolist()
+            )
+        ]
+
+    def _value(
+        self,
+        code: int,
+        key: str,
+        node_row: int
+    ) -> str:
+
+        if (code >= 0):
+            return self.strings[code]
+
+        column, index = NODE_COLUMNS[key]
+        column_value = getattr(self, column)[node_row]
+        if (index is not None):
+            column_value = column_value[index]
+
+        return _columnValue(code, float(column_value))
+
+    def tags(
+        self,
+        kind: str,
+        row: int
+    ) -> dict[str, str]:
+        """
+        Tags of the row-th element of a kind ("node", "way" or "relation").
+        """
+
+        element = int(self.elements(kind)[row])
+        start, end = self.element_child_offsets[element : element + 2]
+
+        tags = {}
+        for child_kind, key, value in zip(
+            self.child_kind[start : end].tolist(),
+            self.child_key[start : end].tolist(),
+            self.child_value[start : end].tolist()
+        ):
+            if (child_kind == CHILD_KINDS.index("tag")):
+                tags[self.strings[key]] = self._value(value, self.strings[key], row)
+
+        return tags
+
+    def toOSM(self) -> etree.Element:
+        """
+        Rebuild the OSM tree the binary map was written from.
+        """
+
+        strings = self.strings
+        osm_root = etree.Element("osm", {
+            strings[key]: strings[value]
+            for key, value in zip(self.root_attr_keys.tolist(), self.root_attr_values.tolist())
+        })
+
+        columns = {
+            "node_latlon": self.node_latlon.tolist(),
+            "node_local_xy": self.node_local_xy.tolist(),
+            "node_ele": self.node_ele.tolist(),
+        }
+        ids = {name: getattr(self, f"{name}_ids").tolist() for name in ELEMENT_KINDS}
+        attr_offsets = self.element_attr_offsets.tolist()
+        attr_keys = self.attr_keys.tolist()
+        attr_values = self.attr_values.tolist()
+        child_offsets = self.element_child_offsets.tolist()
+        child_kind = self.child_kind.tolist()
+        child_key = self.child_key.tolist()
+        child_value = self.child_value.tolist()
+        child_ref = self.child_ref.tolist()
+        kind_rows = [0] * len(ELEMENT_KINDS)
+
+        def value(code: int, key: str, row: int) -> str:
+            if (code >= 0):
+                return strings[code]
+            column, index = NODE_COLUMNS[key]
+            column_value = columns[column][row] if (index is None) else columns[column][row][index]
+            return _columnValue(code, column_value)
+
+        for element, kind in enumerate(self.element_kind.tolist()):
+            name = ELEMENT_KINDS[kind]
+            row = kind_rows[kind]
+            kind_rows[kind] += 1
+
+            attrib = {}
+            for i in range(attr_offsets[element], attr_offsets[element + 1]):
+                key = strings[attr_keys[i]]
+                attrib[key] = str(ids[name][row]) if (attr_values[i] == OWN_ID) else value(attr_values[i], key, row)
+            elem = etree.SubElement(osm_root, name, attrib)
+
+            for i in range(child_offsets[element], child_offsets[element + 1]):
+                if (child_kind[i] == 0):
+                    key = strings[child_key[i]]
+                    etree.SubElement(elem, "tag", k = key, v = value(child_value[i], key, row))
+                elif (child_kind[i] == 1):
+                    etree.SubElement(elem, "nd", ref = str(child_ref[i]))
+                else:
+                    etree.SubElement(
+                        elem, "member",
+                        type = strings[child_key[i]], ref = str(child_ref[i]), role = strings[child_value[i]]
+                    )
+
+        return osm_root
+
+
+def main(argv: list[str] = None):
+
+    parser = argparse.ArgumentParser(description = "Export converted OSM files to binary maps, and check them.")
+    parser.add_argument("input_files", nargs = "+", help = "converted .osm files")
+    parser.add_argument("--output-dir", default = None, help = "default next to each input")
+    parser.add_argument("--compressed", action = "store_true", help = "deflate the arrays")
+    args = parser.parse_args(argv)
+
+    for input_file in args.input_files:
+        input_file = Path(input_file)
+        output_dir = input_file.parent if (args.output_dir is None) else Path(args.output_dir)
+        output_path = output_dir / (input_file.name.split(".")[0] + BINARY_MAP_SUFFIX)
+        output_dir.mkdir(parents = True, exist_ok = True)
+
+        osm_root = etree.parse(str(input_file)).getroot()
+        writeBinaryMap(osm_root, output_path, compressed = args.compressed)
+
+        start = time.perf_counter()
+        binary_map = BinaryMap.load(output_path)
+        load_secs = time.perf_counter() - start
+
+        # Indentation is not stored, compare what the writer makes of both trees
+        original = io.BytesIO()
+        writeOSM(osm_root, original)
+        rebuilt = io.BytesIO()
+        writeOSM(binary_map.toOSM(), rebuilt)
+
+        print(
+            f"{input_file} -> {output_path}: {output_path.stat().st_size / 1024:.1f} KiB "
+            f"(osm {input_file.stat().st_size / 1024:.1f} KiB), load {load_secs * 1000:.1f} ms, "
+            f"lossless: {rebuilt.getvalue() == original.getvalue()}"
+        )
+
+
+if __name__ == "__main__":
+    main()
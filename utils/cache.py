@@ -0,0 +1,315 @@
+#! /usr/bin/env python3
+
+import os
+import json
+import time
+import shutil
+import pickle
+import hashlib
+import argparse
+import tempfile
+from pathlib import Path
+from dataclasses import dataclass
+from importlib.metadata import version, PackageNotFoundError
+from lxml import etree
+
+CACHE_FORMAT_VERSION = 1
+DEFAULT_CACHE_DIR = "./.conversion_cache"
+DEFAULT_CACHE_MAX_BYTES = 2 * 1024 ** 3     # 2 GiB
+
+# Libraries whose version can change the converted output
+VERSIONED_LIBS = [
+    "commonroad-scenario-designer",
+    "commonroad-io",
+    "lxml",
+    "pyproj",
+]
+
+SCENARIO_FILE = "scenario.pkl"
+PREDOWN_FILE = "predown.osm"
+MAPPING_FILE = "id_mapping.json"
+META_FILE = "meta.json"
+
+
+@dataclass
+class CachedConversion:
+    """
+    Intermediate artifacts of one conversion, everything before downsampling.
+    """
+
+    scenario: object
+    predown_osm: etree.Element
+    mapping_rows: list[tuple[str, str, str, int]]
+
+
+def configContents(config) -> dict[str, str]:
+    """
+    Snapshot the attribute values of a crdesigner config (OpenDriveConfig, lanelet2_config, ...).
+    Attributes live on the config class, so they are read from there.
+
+    Params
+    ------
+        config: crdesigner BaseConfig instance.
+
+    Returns
+    -------
+        contents: dict[str, str], attribute name -> repr of its current value.
+    """
+
+    contents = {}
+    for name, attr in sorted(vars(type(config)).items()):
+        if hasattr(attr, "value") and hasattr(attr, "default"):
+            contents[name] = repr(attr.value)
+
+    return contents
+
+
+def libraryVersions() -> dict[str, str]:
+
+    versions = {}
+    for lib in VERSIONED_LIBS:
+        try:
+            versions[lib] = version(lib)
+        except PackageNotFoundError:
+            versions[lib] = "missing"
+
+    return versions
+
+
+class ConversionCache:
+    """
+    On-disk, content-addressed cache of intermediate conversion artifacts:
+    the CommonRoad scenario, the pre-downsampling OSM and the lanelet ID mapping.
+
+    One entry is one directory named after its key. Loading an entry refreshes
+    its access time, and entries are evicted least recently used first once
+    the cache grows over max_bytes.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str = DEFAULT_CACHE_DIR,
+        max_bytes: int = DEFAULT_CACHE_MAX_BYTES
+    ):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        os.makedirs(self.cache_dir, exist_ok = True)
+
+    def key(
+        self,
+        input_file: str,
+        odr_conf,
+        ll2_conf,
+        georeference_string: str,
+        sampling: str = "dense",
+        chord_tolerance: float = None
+    ) -> str:
+        """
+        Hash of the input XODR content, both config contents, the scenario CRS, the lanelet
+        vertex sampling mode (and chord_tolerance, analytic sampling only) and the library versions.
+        """
+
+        # Dense sampling keys are left as they were, existing entries stay valid
+        extra = {} if (sampling == "dense") else {"sampling": sampling, "chord_tolerance": chord_tolerance}
+
+        hasher = hashlib.sha256()
+        with open(input_file, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                hasher.update(chunk)
+
+        hasher.update(json.dumps(
+            {
+                "format": CACHE_FORMAT_VERSION,
+                "opendrive_config": configContents(odr_conf),
+                "lanelet2_config": configContents(ll2_conf),
+                "georeference_string": georeference_string,
+                "versions": libraryVersions(),
+                **extra,
+            },
+            sort_keys = True
+        ).encode())
+
+        return hasher.hexdigest()
+
+    def load(self, key: str) -> CachedConversion:
+        """
+        Load a cache entry, None on miss.
+        """
+
+        entry_dir = self.cache_dir / key
+        try:
+            with open(entry_dir / SCENARIO_FILE, "rb") as f:
+                scenario = pickle.load(f)
+            predown_osm = etree.parse(str(entry_dir / PREDOWN_FILE)).getroot()
+            with open(entry_dir / MAPPING_FILE) as f:
+                mapping_rows = [tuple(row) for row in json.load(f)]
+        except (OSError, pickle.UnpicklingError, etree.XMLSyntaxError, ValueError, EOFError):
+            return None
+
+        # Refresh LRU position
+        try:
+            os.utime(entry_dir / META_FILE)
+        except OSError:
+            pass
+
+        return CachedConversion(scenario, predown_osm, mapping_rows)
+
+    def store(
+        self,
+        key: str,
+        scenario,
+        predown_osm: etree.Element,
+        mapping_rows: list[tuple[str, str, str, int]],
+        input_file: str = None
+    ):
+        """
+        Store a cache entry. Written to a temporary directory first and moved in place,
+        so concurrent workers never see half-written entries.
+        """
+
+        entry_dir = self.cache_dir / key
+        if (entry_dir.exists()):
+            return
+
+        tmp_dir = Path(tempfile.mkdtemp(prefix = f".{key}.", dir = self.cache_dir))
+        try:
+            with open(tmp_dir / SCENARIO_FILE, "wb") as f:
+                pickle.dump(scenario, f, protocol = pickle.HIGHEST_PROTOCOL)
+            with open(tmp_dir / PREDOWN_FILE, "wb") as f:
+                f.write(etree.tostring(predown_osm, xml_declaration = True, encoding = "UTF-8"))
+            with open(tmp_dir / MAPPING_FILE, "w") as f:
+                json.dump([list(row) for row in mapping_rows], f)
+            with open(tmp_dir / META_FILE, "w") as f:
+                json.dump(
+                    {
+                        "input_file": str(Path(input_file).resolve()) if input_file else None,
+                        "created": time.time(),
+                    },
+                    f
+                )
+            os.replace(tmp_dir, entry_dir)
+        except OSError:
+            # Another worker stored the same key first
+            shutil.rmtree(tmp_dir, ignore_errors = True)
+            return
+
+        self.evict()
+
+    def entries(self) -> list[tuple[str, float, int, dict]]:
+        """
+        List cache entries as (key, last_access, size_bytes, meta), least recently used first.
+        """
+
+        entries = []
+        for entry_dir in self.cache_dir.iterdir():
+            if (entry_dir.name.startswith(".")) or not (entry_dir.is_dir()):
+                continue
+            try:
+                meta_path = entry_dir / META_FILE
+                with open(meta_path) as f:
+                    meta = json.load(f)
+                last_access = meta_path.stat().st_mtime
+                size_bytes = sum(
+                    file.stat().st_size
+                    for file in entry_dir.iterdir()
+                )
+            except (OSError, ValueError):
+                continue
+            entries.append((entry_dir.name, last_access, size_bytes, meta))
+
+        return sorted(entries, key = lambda entry: entry[1])
+
+    def evict(self):
+        """
+        Drop least recently used entries until the cache fits in max_bytes.
+        """
+
+        entries = self.entries()
+        total_bytes = sum(entry[2] for entry in entries)
+        for key, _, size_bytes, _ in entries:
+            if (total_bytes <= self.max_bytes):
+                break
+            shutil.rmtree(self.cache_dir / key, ignore_errors = True)
+            total_bytes -= size_bytes
+
+    def invalidate(
+        self,
+        key: str = None,
+        input_file: str = None
+    ) -> int:
+        """
+        Drop one entry by key, or every entry converted from input_file.
+
+        Returns
+        -------
+            num_removed: int, number of entries removed.
+        """
+
+        if (key is not None):
+            keys = [key] if (self.cache_dir / key).is_dir() else []
+        elif (input_file is not None):
+            input_file = str(Path(input_file).resolve())
+            keys = [
+                entry[0]
+                for entry in self.entries()
+                if entry[3].get("input_file") == input_file
+            ]
+        else:
+            keys = []
+
+        for k in keys:
+            shutil.rmtree(self.cache_dir / k, ignore_errors = True)
+
+        return len(keys)
+
+    def clear(self) -> int:
+        """
+        Drop every entry.
+        """
+
+        keys = [entry[0] for entry in self.entries()]
+        for k in keys:
+            shutil.rmtree(self.cache_dir / k, ignore_errors = True)
+
+        return len(keys)
+
+
+def main(argv: list[str] = None):
+
+    parser = argparse.ArgumentParser(description = "Inspect or invalidate the conversion cache.")
+    parser.add_argument("--cache-dir", default = DEFAULT_CACHE_DIR)
+    subparsers = parser.add_subparsers(dest = "command", required = True)
+
+    subparsers.add_parser("list", help = "list cache entries, least recently used first")
+
+    invalidate_parser = subparsers.add_parser("invalidate", help = "drop cache entries")
+    invalidate_parser.add_argument("input_files", nargs = "*", help = "drop entries converted from these files")
+    invalidate_parser.add_argument("--key", action = "append", default = [], help = "drop the entry with this key")
+    invalidate_parser.add_argument("--all", action = "store_true", help = "drop every entry")
+
+    prune_parser = subparsers.add_parser("prune", help = "evict entries down to a size cap")
+    prune_parser.add_argument("--max-mb", type = float, default = DEFAULT_CACHE_MAX_BYTES / 1024 ** 2)
+
+    args = parser.parse_args(argv)
+    cache = ConversionCache(args.cache_dir)
+
+    if (args.command == "list"):
+        for key, last_access, size_bytes, meta in cache.entries():
+            print(f"{key}  {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(last_access))}  "
+                  f"{size_bytes / 1024 ** 2:8.2f} MB  {meta.get('input_file')}")
+
+    elif (args.command == "invalidate"):
+        if (args.all):
+            num_removed = cache.clear()
+        else:
+            num_removed = sum(cache.invalidate(key = key) for key in args.key)
+            num_removed += sum(cache.invalidate(input_file = f) for f in args.input_files)
+        print(f"Removed {num_removed} cache entries")
+
+    elif (args.command == "prune"):
+        cache.max_bytes = int(args.max_mb * 1024 ** 2)
+        cache.evict()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+#! /usr/bin/env python3
+
+import os
+import sys
+import time
+import argparse
+import importlib
+from pathlib import Path
+from .writer import addOutputArgs
+
+# Only the standard library and writer (stdlib + lxml) are imported up front, every
+# stage module is imported by the command that needs it: crdesigner (and through it
+# CommonRoad, PyQt6, matplotlib...) takes seconds to import and only convert needs it.
+
+# Same as postprocess.SIMPLIFY_MODES, spelled out since postprocess imports NumPy
+SIMPLIFY_MODES = ("angle", "douglas_peucker", "visvalingam")
+
+
+class LazyImporter:
+    """
+    Imports utils modules on demand and keeps track of the time spent doing so.
+    """
+
+    def __init__(self):
+        self.import_secs = 0.0
+        self.modules = []
+
+    def load(self, module_name: str):
+        """
+        Import utils.<module_name>, timed. Modules it pulls in are included in the time.
+        """
+
+        start = time.perf_counter()
+        module = importlib.import_module(f".{module_name}", __package__)
+        self.import_secs += time.perf_counter() - start
+        self.modules.append(module_name)
+
+        return module
+
+
+def convert(
+    args: argparse.Namespace,
+    importer: LazyImporter
+) -> int:
+    """
+    Full chain on XODR files, same as batch.convertFile.
+    """
+
+    batch = importer.load("batch")
+    writer = importer.load("writer")
+    os.makedirs(args.output_dir, exist_ok = True)
+
+    num_failed = 0
+    for input_file in args.input_files:
+        times = batch.convertFile(
+            input_file,
+            args.output_dir,
+            straight_angle_threshold = batch.STRAIGHT_ANGLE_THRSH if (args.angle is None) else args.angle,
+            min_segment_dist = batch.MIN_SEGMENT_DIST if (args.min_dist is None) else args.min_dist,
+            concatenate_lanelets = args.concatenate_lanelets,
+            cache_dir = args.cache_dir,
+            mode = args.mode,
+            max_error = batch.DEFAULT_MAX_ERROR if (args.max_error is None) else args.max_error,
+            weld_epsilon = args.weld_epsilon,
+            output_options = writer.outputOptionsFromArgs(args),
+            binary_map = args.binary_map,
+            sampling = args.sampling,
+            chord_tolerance = batch.DEFAULT_CHORD_TOLERANCE if (args.chord_tolerance is None) else args.chord_tolerance,
+            max_nodes_per_km = args.max_nodes_per_km,
+            max_nodes = args.max_nodes,
+            fidelity_report = args.fidelity_report
+        )
+        num_failed += times is None
+
+    return 1 if (num_failed) else 0
+
+
+def downsample(
+    args: argparse.Namespace,
+    importer: LazyImporter
+) -> int:
+    """
+    Downsampling (and optional welding) of an already converted, pre-downsampling
+    OSM file, e.g. the predown.osm of a conversion cache entry. No CommonRoad import.
+    """
+
+    georef = importer.load("georef")
+    postprocess = importer.load("postprocess")
+    writer = importer.load("writer")
+    welding = importer.load("welding") if (args.weld_epsilon is not None) else None
+    from lxml import etree
+
+    osm_root = etree.parse(str(args.input_file)).getroot()
+    geostring = georef.PROJ_MET if (args.geostring is None) else args.geostring
+    downsampling_kwargs = {
+        "straight_angle_threshold": postprocess.STRAIGHT_ANGLE_THRSH if (args.angle is None) else args.angle,
+        "min_segment_dist": postprocess.MIN_SEGMENT_DIST if (args.min_dist is None) else args.min_dist,
+        "mode": args.mode,
+        "max_error": postprocess.DEFAULT_MAX_ERROR if (args.max_error is None) else args.max_error,
+    }
+
+    # Downsampling works in place, ways are extracted before it for tuning and validation
+    way_arrays = None
+    if (args.mode == "auto") or (args.fidelity_report):
+        way_arrays = importer.load("sweep").WayArrays.fromOSM(osm_root, geostring)
+
+    if (args.mode == "auto"):
+        tuning = importer.load("tuning")
+        result = tuning.tuneDownsamplingWayArrays(
+            way_arrays,
+            max_error = downsampling_kwargs["max_error"],
+            max_nodes_per_km = args.max_nodes_per_km,
+            max_nodes = args.max_nodes
+        )
+        print(f"Tuned downsampling: {tuning.formatTuningResult(result)}")
+        downsampling_kwargs = result.downsamplingKwargs()
+
+    downsamp_osm = postprocess.postprocessDownsamplingOSM(
+        osm_root,
+        geostring = geostring,
+        latlon_output = args.latlon_output,
+        generator = "VMB",
+        angle_frame = postprocess.BATCH_ANGLE_FRAME,
+        **downsampling_kwargs
+    )
+
+    if (welding is not None):
+        num_welded = welding.weldNodes(downsamp_osm, args.weld_epsilon)
+        print(f"Welded {num_welded} nodes closer than {args.weld_epsilon} m")
+
+    writer.writeOSMWithOptions(downsamp_osm, args.output, writer.outputOptionsFromArgs(args))
+    print(f"Downsampled file saved to : {args.output}")
+
+    if (args.fidelity_report):
+        fidelity = importer.load("fidelity")
+        output = Path(args.output)
+        report_path = output.parent / (output.name.split(".")[0] + "_fidelity.json")
+        report = fidelity.fidelityReport(way_arrays, downsamp_osm)
+        fidelity.writeFidelityReport(report_path, report)
+        print(f"Fidelity: {fidelity.formatFidelitySummary(report)}, report saved to {report_path}")
+
+    if (args.binary_map):
+        binary_map = importer.load("binary_map")
+        output = Path(args.output)
+        binary_path = output.parent / (output.name.split(".")[0] + binary_map.BINARY_MAP_SUFFIX)
+        binary_map.writeBinaryMap(downsamp_osm, binary_path)
+        print(f"Binary map saved to : {binary_path}")
+
+    return 0
+
+
+def probeGeoref(
+    args: argparse.Namespace,
+    importer: LazyImporter
+) -> int:
+    """
+    Print the <geoReference> of XODR files and whether pyproj accepts it,
+    reading only their headers. No CommonRoad import.
+    """
+
+    georef = importer.load("georef")
+
+    for input_file in args.input_files:
+        raw_proj_str = georef.probeGeoreference(input_file)
+        if (raw_proj_str is None):
+            print(f"{input_file}: no geoReference")
+            continue
+
+        _, error = georef.validateCRS(raw_proj_str)
+        status = "valid" if (error is None) else f"invalid ({error})"
+        print(f"{input_file}: {raw_proj_str} [{status}]")
+
+    return 0
+
+
+COMMANDS = {
+    "convert": convert,
+    "downsample": downsample,
+    "probe-georef": probeGeoref,
+}
+
+
+def buildParser() -> argparse.ArgumentParser:
+
+    parser = argparse.ArgumentParser(
+        prog = "python -m utils",
+        description = "OpenDRIVE -> Lanelet2 converter. Heavy dependencies are only imported by the commands using them."
+    )
+    subparsers = parser.add_subparsers(dest = "command", required = True)
+
+    # Defaults left to None are resolved from the lazily imported module
+    def addDownsamplingArgs(subparser: argparse.ArgumentParser):
+        subparser.add_argument("--angle", type = float, default = None,
+                               help = "straight angle threshold, in degrees")
+        subparser.add_argument("--min-dist", type = float, default = None,
+                               help = "minimum segment length, in meters")
+        subparser.add_argument("--mode", choices = SIMPLIFY_MODES + ("auto", ), default = "angle",
+                               help = "simplification mode: angle, douglas_peucker, visvalingam, "
+                                      "or auto to pick mode and parameters for the node budget")
+        subparser.add_argument("--max-error", type = float, default = None,
+                               help = "max deviation in meters for douglas_peucker/visvalingam/auto")
+        subparser.add_argument("--max-nodes-per-km", type = float, default = None,
+                               help = "auto mode node budget, per km of lane boundary")
+        subparser.add_argument("--max-nodes", type = int, default = None,
+                               help = "auto mode node budget, in total per file")
+        subparser.add_argument("--weld-epsilon", type = float, default = None,
+                               help = "merge output nodes closer than this, in meters")
+
+        addOutputArgs(subparser)
+        subparser.add_argument("--binary-map", action = "store_true",
+                               help = "also write the .npz binary map next to the OSM output")
+        subparser.add_argument("--fidelity-report", action = "store_true",
+                               help = "also write the per-way deviation of the output from the converted ways")
+
+    convert_parser = subparsers.add_parser("convert", help = "convert XODR files to downsampled Lanelet2 OSM")
+    convert_parser.add_argument("input_files", nargs = "+", type = Path)
+    convert_parser.add_argument("--output-dir", required = True)
+    convert_parser.add_argument("--concatenate-lanelets", action = "store_true")
+    convert_parser.add_argument("--cache-dir", default = None)
+    convert_parser.add_argument("--sampling", choices = ["dense", "analytic"], default = "dense",
+                                help = "analytic: place lanelet vertices from the plan view geometry")
+    convert_parser.add_argument("--chord-tolerance", type = float, default = None,
+                                help = "max border to polyline distance of analytic sampling, in meters")
+    addDownsamplingArgs(convert_parser)
+
+    downsample_parser = subparsers.add_parser("downsample", help = "downsample a pre-downsampling Lanelet2 OSM file")
+    downsample_parser.add_argument("input_file", type = Path)
+    downsample_parser.add_argument("--output", required = True)
+    downsample_parser.add_argument("--geostring", default = None,
+                                   help = "target CRS of the local_x/local_y tags, default EPSG:3857")
+    downsample_parser.add_argument("--latlon-output", action = "store_true",
+                                   help = "write lat/lon instead of local_x/local_y")
+    addDownsamplingArgs(downsample_parser)
+
+    probe_parser = subparsers.add_parser("probe-georef", help = "print the geoReference of XODR files")
+    probe_parser.add_argument("input_files", nargs = "+", type = Path)
+
+    return parser
+
+
+def main(argv: list[str] = None) -> int:
+
+    args = buildParser().parse_args(argv)
+    importer = LazyImporter()
+
+    start = time.perf_counter()
+    exit_code = COMMANDS[args.command](args, importer)
+    total_secs = time.perf_counter() - start
+
+    print(
+        f"{args.command}: imports {importer.import_secs:.3f}s ({', '.join(importer.modules)}), "
+        f"work {total_secs - importer.import_secs:.3f}s, total {total_secs:.3f}s, "
+        f"CommonRoad imported: {'commonroad' in sys.modules}"
+    )
+
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,49 +1,24 @@
 #! /usr/bin/env python3
 
-from crdesigner.common.config.lanelet2_config import lanelet2_config
+from pathlib import Path
+from crdesigner.common.config.lanelet2_config import Lanelet2Config, lanelet2_config
+from crdesigner.common.config.opendrive_config import OpenDriveConfig
 from crdesigner.map_conversion.lanelet2.cr2lanelet import CR2LaneletConverter
-from commonroad.scenario.scenario import Location, GeoTransformation
+from crdesigner.map_conversion.lanelet2.lanelet2 import OSMLanelet
+from commonroad.scenario.scenario import Location, GeoTransformation, Scenario
 from crdesigner.map_conversion.map_conversion_interface import opendrive_to_commonroad
-from lxml import etree
-from pyproj import CRS
-
-DEFAULT_GEOSTRING = "EPSG:4326"     # WGS84
-DEFAULT_PROJ = "EPSG:32654"         # Tokyo, Japan
-
-
-def extractGeorefString(xodr_path: str) -> tuple[str, bool]:
-    """
-    Extracts <geoReference> string from input XODR file.
-
-    Params
-    ------
-        xodr_path: str, path to file.
-
-    Returns
-    -------
-        - proj_string: str | None — CRS proj4 string or None if not found/invalid.
-        - a bool flag, True means lat/lon output, False means local_x, local_y output.
-    """
-    try:
-        with open(xodr_path, "rb") as f:
-            tree = etree.parse(f)
-            geo_elem = tree.find(".//geoReference")
-
-            if ((geo_elem is not None) and (geo_elem.text)):
-                raw_proj_str = geo_elem.text.strip()
-                print(f"Proj found in input: {raw_proj_str}")
-
-                # Validate
-                try:
-                    _ = CRS.from_proj4(raw_proj_str)
-                    return raw_proj_str, True
-                except Exception as e:
-                    print(f"Invalid CRS string: {e}")
-
-    except Exception as e:
-        print(f"Error parsing geoReference from {xodr_path}: {e}")
-
-    return DEFAULT_PROJ, False
+from crdesigner.map_conversion.opendrive.odr2cr.opendrive_parser.parser import parse_opendrive
+from crdesigner.map_conversion.opendrive.odr2cr.opendrive_conversion import network
+from .instrument import stage
+from .planview import SAMPLING_MODES, DEFAULT_CHORD_TOLERANCE, analyticVertexSampling
+from .georef import (
+    DEFAULT_GEOSTRING,
+    DEFAULT_PROJ,
+    PROJ_MET,
+    probeGeoreference,
+    validateCRS,
+    extractGeorefString
+)
 
 
 def prepConversionCRS(
@@ -115,4 +90,135 @@ def conductConversion(
     except Exception as e:
         print(f"Error during conversion: {e}")
         
-    return None
\ No newline at end of file
+    return None
+
+
+def convertOpenDriveWithMapping(
+    input_file: str,
+    odr_conf: OpenDriveConfig,
+    sampling: str = "dense",
+    chord_tolerance: float = DEFAULT_CHORD_TOLERANCE
+) -> tuple[Scenario, dict[int, str]]:
+    """
+    Convert an OpenDRIVE file to a CommonRoad scenario, keeping track of which
+    OpenDRIVE lane every CommonRoad lanelet came from.
+
+    Params
+    ------
+        input_file: str, path to the input XODR file.
+        odr_conf: OpenDriveConfig, OpenDRIVE conversion config.
+        sampling: str, lanelet vertex placement, one of SAMPLING_MODES. "dense" (default) is
+            crdesigner's fixed ~0.5 m step, "analytic" places vertices from the plan view and
+            lane width geometry within chord_tolerance (see planview.AnalyticVertexSampler).
+        chord_tolerance: float, max distance between a lane border and its polyline with
+            analytic sampling, in meters. Handed to the sampler only: crdesigner config
+            attributes are shared by every OpenDriveConfig of the process, so
+            odr_conf.error_tolerance, which dense sampling uses, is left alone.
+
+    Returns
+    -------
+        - scenario: Scenario, the converted CommonRoad scenario.
+        - cr_lanelet_to_odr_lane: dict[int, str], CommonRoad lanelet ID -> encoded OpenDRIVE lane ID.
+    """
+
+    if (sampling not in SAMPLING_MODES):
+        raise ValueError(f"Unknown sampling {sampling}, expected one of {SAMPLING_MODES}")
+
+    # Capture the OpenDRIVE-based lanelet id (stored in lanelet.description)
+    # before the conversion utility strips it when creating a base LaneletNetwork.
+    cr_lanelet_to_odr_lane = {}
+    original_convert_to_base = network.convert_to_base_lanelet_network
+
+    def _capture_and_convert(conv_lanelet_network):
+        for lanelet in conv_lanelet_network.lanelets:
+            odr_encoded = getattr(lanelet, "description", None)
+            if odr_encoded is not None:
+                cr_lanelet_to_odr_lane[int(lanelet.lanelet_id)] = str(odr_encoded)
+        return original_convert_to_base(conv_lanelet_network)
+
+    network.convert_to_base_lanelet_network = _capture_and_convert
+
+    try:
+        with stage("parse_opendrive") as parse_stage:
+            opendrive = parse_opendrive(Path(input_file))
+            parse_stage["output"] = {
+                "roads": len(opendrive.roads),
+                "junctions": len(opendrive.junctions),
+            }
+
+        with stage("load_opendrive", roads = len(opendrive.roads)):
+            road_network = network.Network()
+            road_network.load_opendrive(opendrive)
+
+        with stage("export_commonroad_scenario", sampling = sampling) as export_stage:
+            if (sampling == "analytic"):
+                with analyticVertexSampling(road_network, chord_tolerance, odr_conf.min_delta_s):
+                    scenario = road_network.export_commonroad_scenario(od_config = odr_conf)
+            else:
+                scenario = road_network.export_commonroad_scenario(od_config = odr_conf)
+            export_stage["output"] = {
+                "lanelets": len(scenario.lanelet_network.lanelets),
+                "vertices": sum(len(lanelet.center_vertices) for lanelet in scenario.lanelet_network.lanelets),
+            }
+    finally:
+        network.convert_to_base_lanelet_network = original_convert_to_base
+
+    return (scenario, cr_lanelet_to_odr_lane)
+
+
+def _skipSerialization():
+    return None
+
+
+class OSMLaneletConverter(CR2LaneletConverter):
+    """
+    CR2LaneletConverter that stops at its in-memory OSM model, skipping the XML
+    serialization CR2LaneletConverter.__call__ always ends with. Per instance,
+    no crdesigner module state is touched, so converters can run on several threads.
+    """
+
+    def _add_regulatory_element_for_traffic_lights(self):
+        # Last conversion step before serialization, self.osm exists from here on
+        super()._add_regulatory_element_for_traffic_lights()
+        self.osm.serialize_to_xml = _skipSerialization
+
+    def __call__(self, scenario: Scenario) -> OSMLanelet:
+        """
+        Convert a scenario to its OSMLanelet model.
+
+        Params
+        ------
+            scenario: Scenario, the CommonRoad scenario to convert.
+
+        Returns
+        -------
+            osm: OSMLanelet, self.osm, nodes, ways and relations of the converted map.
+        """
+
+        super().__call__(scenario)
+        # Plain OSMLanelet again, serialize_to_xml works as usual from here on
+        self.osm.__dict__.pop("serialize_to_xml", None)
+
+        return self.osm
+
+
+def convertToOSMLanelet(
+    scenario: Scenario,
+    config: Lanelet2Config = lanelet2_config
+) -> OSMLanelet:
+    """
+    Run an OSMLaneletConverter on a scenario and return its in-memory OSM model.
+    Feed the result to postprocess.postprocessDownsamplingOSMLanelet, or call its
+    serialize_to_xml() for the usual pre-downsampling tree.
+
+    Params
+    ------
+        scenario: Scenario, the CommonRoad scenario to convert.
+        config: Lanelet2Config, crdesigner lanelet2 config.
+
+    Returns
+    -------
+        osm: OSMLanelet, nodes, ways and relations of the converted map.
+    """
+
+    return OSMLaneletConverter(config)(scenario)
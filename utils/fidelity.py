@@ -0,0 +1,267 @@
+#! /usr/bin/env python3
+
+import json
+import time
+import argparse
+import numpy as np
+import shapely
+from dataclasses import dataclass
+from lxml import etree
+from .georef import DEFAULT_GEOSTRING, PROJ_MET
+from .geometry import coords2XYArray, coords2LocalXYArray
+from .node_table import NodeTable
+from .projection import getTransformer
+from .sweep import WayArrays
+
+FIDELITY_WORST_N = 10                   # Ways listed in the worst offenders of a report
+
+
+def _outputWayXY(
+    downsamp_osm: etree.Element,
+    arrays: WayArrays
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Ways of a downsampled OSM tree in the metric frame of arrays: local_x/local_y tags
+    when present (they are in the downsampling CRS), otherwise lat/lon projected the
+    same way as the original ways.
+
+    Returns
+    -------
+        - way_ids: np.ndarray, (w,) int64 way IDs.
+        - xy: np.ndarray, (n, 2) float64 points of all ways, in way order.
+        - offsets: np.ndarray, (w + 1,) int64 CSR offsets of each way in xy.
+    """
+
+    node_table = NodeTable.fromXML(downsamp_osm)
+    transformer = getTransformer(DEFAULT_GEOSTRING, arrays.geostring, always_xy = True)
+    with np.errstate(invalid = "ignore"):
+        node_xy = coords2XYArray(node_table.coords, transformer)
+    for row, tags in node_table.tags.items():
+        tags = dict(tags)
+        if ("local_x" in tags) and ("local_y" in tags):
+            node_xy[row] = (float(tags["local_x"]), float(tags["local_y"]))
+
+    # Geographic CRS, node_xy are (lon, lat) and the original ways use a local frame
+    if (transformer.target_crs.is_geographic):
+        node_xy = coords2LocalXYArray(node_xy[:, ::-1], arrays.metric_origin)
+
+    ways = list(downsamp_osm.iterfind("way"))
+    way_rows = [node_table.rows(nd.get("ref") for nd in way.iterfind("nd")) for way in ways]
+    way_lengths = np.array([len(rows) for rows in way_rows], dtype = np.int64)
+    rows = np.concatenate(way_rows).astype(np.int64) if (way_rows) else np.empty(0, dtype = np.int64)
+
+    return (
+        np.array([int(way.get("id")) for way in ways], dtype = np.int64),
+        node_xy[rows],
+        np.concatenate(([0], np.cumsum(way_lengths)))
+    )
+
+
+def _wayPoints(
+    offsets: np.ndarray,
+    ways: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Indices of the points of the given ways of a CSR point array, in way order,
+    and the index of the way (in ways) each point belongs to.
+    """
+
+    lengths = offsets[ways + 1] - offsets[ways]
+    point_ways = np.repeat(np.arange(len(ways)), lengths)
+    way_starts = np.concatenate(([0], np.cumsum(lengths)[ : -1]))
+
+    return offsets[ways][point_ways] + np.arange(len(point_ways)) - way_starts[point_ways], point_ways
+
+
+@dataclass
+class FidelityReport:
+    """
+    Per-way deviation between the original and the downsampled ways, in meters of the
+    downsampling CRS (a local metric frame for geographic CRS), one entry per way found
+    on both sides with at least 2 points.
+    """
+
+    way_ids: np.ndarray
+    hausdorff: np.ndarray               # Discrete Hausdorff distance, both directions
+    max_deviation: np.ndarray           # Max distance of an original point to the downsampled way
+    mean_deviation: np.ndarray          # Mean distance of the original points to the downsampled way
+    source_nodes: np.ndarray            # Original points of the way
+    nodes: np.ndarray                   # Downsampled points of the way
+    missing_ways: int                   # Original ways absent from the output
+    skipped_ways: int                   # Ways with less than 2 points on either side
+    secs: float
+
+    def summary(self) -> dict:
+
+        if (len(self.way_ids) == 0):
+            return {"ways": 0, "missing_ways": self.missing_ways, "skipped_ways": self.skipped_ways}
+
+        return {
+            "ways": len(self.way_ids),
+            "missing_ways": self.missing_ways,
+            "skipped_ways": self.skipped_ways,
+            "source_nodes": int(self.source_nodes.sum()),
+            "nodes": int(self.nodes.sum()),
+            "max_hausdorff": float(self.hausdorff.max()),
+            "p95_hausdorff": float(np.percentile(self.hausdorff, 95)),
+            "median_hausdorff": float(np.median(self.hausdorff)),
+            "mean_deviation": float(
+                (self.mean_deviation * self.source_nodes).sum() / max(self.source_nodes.sum(), 1)
+            ),
+            "secs": self.secs,
+        }
+
+    def worst(self, n: int = FIDELITY_WORST_N) -> list[dict]:
+        """
+        The n ways with the largest Hausdorff distance, largest first.
+        """
+
+        order = np.argsort(-self.hausdorff, kind = "stable")[ : n]
+
+        return [
+            {
+                "way_id": int(self.way_ids[index]),
+                "hausdorff": float(self.hausdorff[index]),
+                "max_deviation": float(self.max_deviation[index]),
+                "mean_deviation": float(self.mean_deviation[index]),
+                "source_nodes": int(self.source_nodes[index]),
+                "nodes": int(self.nodes[index]),
+            }
+            for index in order
+        ]
+
+    def toDict(self, worst_n: int = FIDELITY_WORST_N) -> dict:
+
+        return {"summary": self.summary(), "worst": self.worst(worst_n)}
+
+
+def fidelityReport(
+    original: WayArrays,
+    downsamp_osm: etree.Element
+) -> FidelityReport:
+    """
+    Compare the ways of a downsampled OSM tree with the original ones, matched by way ID.
+    Every way pair gets its discrete Hausdorff distance, and every original point its
+    distance to the downsampled way, all in a few vectorized shapely calls.
+
+    Params
+    ------
+        original: WayArrays, extracted with way IDs before downsampling, e.g.
+            WayArrays.fromOSM(predown_osm, geostring). postprocessDownsamplingOSM works in place,
+            so they have to be extracted before it runs.
+        downsamp_osm: lxml.etree.Element, downsampled (and possibly welded) OSM tree.
+
+    Returns
+    -------
+        report: FidelityReport.
+    """
+
+    if (original.way_ids is None):
+        raise ValueError("Original way arrays hold no way IDs, build them with fromOSM or fromOSMLanelet")
+
+    start = time.perf_counter()
+    output_way_ids, output_xy, output_offsets = _outputWayXY(downsamp_osm, original)
+
+    # Match original ways to output ways by ID
+    output_order = np.argsort(output_way_ids, kind = "stable")
+    positions = np.searchsorted(output_way_ids[output_order], original.way_ids)
+    positions = np.minimum(positions, max(len(output_way_ids) - 1, 0))
+    found = np.zeros(len(original.way_ids), dtype = bool)
+    if (len(output_way_ids)):
+        found = output_way_ids[output_order][positions] == original.way_ids
+    original_ways = np.flatnonzero(found)
+    output_ways = output_order[positions[found]] if (len(original_ways)) else np.empty(0, dtype = np.int64)
+
+    source_nodes = np.diff(original.way_offsets)[original_ways]
+    nodes = np.diff(output_offsets)[output_ways]
+    valid = (source_nodes >= 2) & (nodes >= 2)
+    original_ways, output_ways = original_ways[valid], output_ways[valid]
+    source_nodes, nodes = source_nodes[valid], nodes[valid]
+    if (len(original_ways) == 0):
+        return FidelityReport(
+            *(np.empty(0, dtype = dtype) for dtype in (np.int64, np.float64, np.float64, np.float64, np.int64, np.int64)),
+            missing_ways = int((~found).sum()),
+            skipped_ways = int((~valid).sum()),
+            secs = time.perf_counter() - start
+        )
+
+    # One LineString per way on both sides, built in a single call each
+    original_points, point_ways = _wayPoints(original.way_offsets, original_ways)
+    output_points, output_point_ways = _wayPoints(output_offsets, output_ways)
+    original_lines = shapely.linestrings(original.metric_xy[original_points], indices = point_ways)
+    output_lines = shapely.linestrings(output_xy[output_points], indices = output_point_ways)
+    hausdorff = shapely.hausdorff_distance(original_lines, output_lines)
+
+    # Every original point against the downsampled way it belongs to
+    distances = shapely.distance(shapely.points(original.metric_xy[original_points]), output_lines[point_ways])
+    way_starts = np.concatenate(([0], np.cumsum(source_nodes)[ : -1]))
+    max_deviation = np.maximum.reduceat(distances, way_starts)
+    mean_deviation = np.add.reduceat(distances, way_starts) / source_nodes
+
+    return FidelityReport(
+        way_ids = original.way_ids[original_ways],
+        hausdorff = hausdorff,
+        max_deviation = max_deviation,
+        mean_deviation = mean_deviation,
+        source_nodes = source_nodes,
+        nodes = nodes,
+        missing_ways = int((~found).sum()),
+        skipped_ways = int((~valid).sum()),
+        secs = time.perf_counter() - start
+    )
+
+
+def formatFidelitySummary(report: FidelityReport) -> str:
+
+    summary = report.summary()
+    if (summary["ways"] == 0):
+        return f"no way to compare ({summary['missing_ways']} missing, {summary['skipped_ways']} skipped)"
+
+    return (
+        f"{summary['ways']} ways, Hausdorff max {summary['max_hausdorff']:.4f} m "
+        f"p95 {summary['p95_hausdorff']:.4f} m median {summary['median_hausdorff']:.4f} m, "
+        f"mean deviation {summary['mean_deviation']:.4f} m, "
+        f"{summary['missing_ways']} missing, {summary['skipped_ways']} skipped, {summary['secs']:.2f}s"
+    )
+
+
+def writeFidelityReport(
+    path: str,
+    report: FidelityReport,
+    worst_n: int = FIDELITY_WORST_N
+):
+
+    with open(path, "w") as json_file:
+        json.dump(report.toDict(worst_n), json_file, indent = 2)
+
+
+def main(argv: list[str] = None):
+
+    parser = argparse.ArgumentParser(
+        description = "Deviation of downsampled ways from the original ones, per way, summary and worst offenders."
+    )
+    parser.add_argument("original", help = "pre-downsampling .osm file, e.g. a cache entry's predown.osm")
+    parser.add_argument("downsampled", help = "downsampled .osm file of the same map")
+    parser.add_argument("--geostring", default = PROJ_MET,
+                        help = "CRS the downsampling used, as in the batch downsampling")
+    parser.add_argument("--worst", type = int, default = FIDELITY_WORST_N, help = "worst offenders to list")
+    parser.add_argument("--output", default = None, help = "also write the report to this JSON file")
+    args = parser.parse_args(argv)
+
+    original = WayArrays.fromOSM(etree.parse(args.original).getroot(), args.geostring)
+    report = fidelityReport(original, etree.parse(args.downsampled).getroot())
+
+    print(f"{args.downsampled}: {formatFidelitySummary(report)}")
+    for entry in report.worst(args.worst):
+        print(
+            f"  way {entry['way_id']}: Hausdorff {entry['hausdorff']:.4f} m, max deviation {entry['max_deviation']:.4f} m, "
+            f"mean {entry['mean_deviation']:.4f} m, {entry['source_nodes']} -> {entry['nodes']} nodes"
+        )
+
+    if (args.output is not None):
+        writeFidelityReport(args.output, report, args.worst)
+        print(f"Fidelity report saved to : {args.output}")
+
+
+if __name__ == "__main__":
+    main()
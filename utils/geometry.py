@@ -1,6 +1,7 @@
 #! /usr/bin/env python3
 
 import math
+import numpy as np
 
 PointCoords = tuple[float, float]
 R = 6378000                             # Earth radius, in meters
@@ -113,4 +114,230 @@ def calAngleTriplePoints(
         )
     )
 
-    return angle
\ No newline at end of file
+    return angle
+
+
+def coords2XYArray(
+    coords: np.ndarray,
+    transformer
+):
+    """
+    Vectorized counterpart of coords2XY, projecting a whole array of points
+    with a single batched transformer call.
+
+    Params
+    ------
+        coords: np.ndarray, (n, 2) float64 array of (lat, lon) rows.
+        transformer: pyproj.Transformer, built with always_xy = True.
+
+    Returns
+    -------
+        xy: np.ndarray, (n, 2) float64 array of (x, y) rows, in meters.
+    """
+
+    coords = np.asarray(coords, dtype = np.float64).reshape(-1, 2)
+
+    x, y = transformer.transform(coords[:, 1], coords[:, 0])
+
+    return np.column_stack((
+        np.asarray(x, dtype = np.float64),
+        np.asarray(y, dtype = np.float64)
+    ))
+
+def coords2EquirectXYArray(
+    coords: np.ndarray
+):
+    """
+    Per-point equirectangular (x, y) of (lat, lon) rows, the frame coords2XY used before
+    it switched to pyproj (see its commented-out lines): x = lon * R * cos(lat), y = lat * R.
+    Only angles are measured in it, distances are not meaningful across far apart points.
+
+    Params
+    ------
+        coords: np.ndarray, (n, 2) float64 array of (lat, lon) rows.
+
+    Returns
+    -------
+        xy: np.ndarray, (n, 2) float64 array of (x, y) rows, in meters.
+    """
+
+    coords = np.asarray(coords, dtype = np.float64).reshape(-1, 2)
+    lat = np.radians(coords[:, 0])
+
+    return np.column_stack((np.radians(coords[:, 1]) * R * np.cos(lat), lat * R))
+
+def dist2NodesArray(
+    p1: np.ndarray,
+    p2: np.ndarray
+):
+    """
+    Vectorized counterpart of dist_2nodes (Haversine distance).
+    Both inputs are broadcast against each other, so one point vs. many works.
+
+    Params
+    ------
+        p1, p2: np.ndarray, (..., 2) float64 arrays of (lat, lon).
+
+    Returns
+    -------
+        dist: np.ndarray, distances in meters.
+    """
+
+    p1 = np.asarray(p1, dtype = np.float64)
+    p2 = np.asarray(p2, dtype = np.float64)
+
+    lat1, lon1 = p1[..., 0], p1[..., 1]
+    lat2, lon2 = p2[..., 0], p2[..., 1]
+
+    dlat = np.radians(lat2 - lat1)
+    dlon = np.radians(lon2 - lon1)
+
+    angle = np.sin(dlat / 2) ** 2 + \
+            np.cos(np.radians(lat1)) * np.cos(np.radians(lat2)) * np.sin(dlon / 2) ** 2
+
+    dist = 2 * R * np.arcsin(np.sqrt(angle))
+
+    return dist
+
+def calAngleTriplePointsArray(
+    xy: np.ndarray
+):
+    """
+    Vectorized counterpart of calAngleTriplePoints, computing the angle at every
+    interior vertex of an already projected polyline, in degrees.
+    Degenerate vertices (zero-length neighbour segment) get 180, same as the scalar version.
+
+    Params
+    ------
+        xy: np.ndarray, (n, 2) float64 array of projected (x, y) rows.
+
+    Returns
+    -------
+        angles: np.ndarray, (n - 2,) float64 array, angles[i - 1] is the angle at xy[i].
+    """
+
+    xy = np.asarray(xy, dtype = np.float64)
+    if (len(xy) < 3):
+        return np.empty(0, dtype = np.float64)
+
+    v1 = xy[:-2] - xy[1:-1]
+    v2 = xy[2:] - xy[1:-1]
+
+    norm_v1 = np.hypot(v1[:, 0], v1[:, 1])
+    norm_v2 = np.hypot(v2[:, 0], v2[:, 1])
+    degenerate = (norm_v1 == 0) | (norm_v2 == 0)
+
+    dot_prod = v1[:, 0] * v2[:, 0] + v1[:, 1] * v2[:, 1]
+
+    with np.errstate(divide = "ignore", invalid = "ignore"):
+        cos_angle = np.clip(dot_prod / (norm_v1 * norm_v2), -1.0, 1.0)
+
+    angles = np.degrees(np.arccos(cos_angle))
+    angles[degenerate] = 180.0
+
+    return angles
+
+
+def coords2LocalXYArray(
+    coords: np.ndarray,
+    origin: PointCoords = None
+):
+    """
+    Local equirectangular projection of (lat, lon) rows, in meters around origin.
+    Only meant for metric error checks on geographic input, where it stays
+    accurate to well under a millimeter over a few kilometers.
+
+    Params
+    ------
+        coords: np.ndarray, (n, 2) float64 array of (lat, lon) rows.
+        origin: PointCoords, projection origin. Default the mean of coords.
+
+    Returns
+    -------
+        xy: np.ndarray, (n, 2) float64 array of (x, y) rows, in meters.
+    """
+
+    coords = np.asarray(coords, dtype = np.float64).reshape(-1, 2)
+    if (len(coords) == 0):
+        return np.empty((0, 2), dtype = np.float64)
+
+    if (origin is None):
+        origin = coords.mean(axis = 0)
+
+    x = np.radians(coords[:, 1] - origin[1]) * R * math.cos(math.radians(origin[0]))
+    y = np.radians(coords[:, 0] - origin[0]) * R
+
+    return np.column_stack((x, y))
+
+def distPointsToSegmentArray(
+    points: np.ndarray,
+    a: np.ndarray,
+    b: np.ndarray
+):
+    """
+    Distance of every projected point to the segment [a, b].
+    Never smaller than the perpendicular distance to the line (a, b), so bounding it
+    bounds the perpendicular error too.
+
+    Params
+    ------
+        points: np.ndarray, (n, 2) float64 array of projected (x, y) rows.
+        a, b: np.ndarray, (2,) segment ends.
+
+    Returns
+    -------
+        dist: np.ndarray, (n,) distances, in projected units.
+    """
+
+    ab = b - a
+    ap = points - a
+    seg_len_sq = ab[0] * ab[0] + ab[1] * ab[1]
+
+    if (seg_len_sq == 0):
+        return np.hypot(ap[:, 0], ap[:, 1])
+
+    t = np.clip((ap[:, 0] * ab[0] + ap[:, 1] * ab[1]) / seg_len_sq, 0.0, 1.0)
+    dx = ap[:, 0] - t * ab[0]
+    dy = ap[:, 1] - t * ab[1]
+
+    return np.hypot(dx, dy)
+
+def spanDeviationArray(
+    xy: np.ndarray,
+    kept: np.ndarray
+):
+    """
+    Distance of every point of a polyline to the segment of its simplified version
+    spanning it, i.e. how far each vertex lies from the simplified way. Kept points
+    are at distance 0.
+
+    Params
+    ------
+        xy: np.ndarray, (n, 2) float64 array of projected (x, y) rows.
+        kept: np.ndarray, sorted indices of the kept points, first and last included.
+
+    Returns
+    -------
+        dist: np.ndarray, (n,) distances, in projected units.
+    """
+
+    n = len(xy)
+    if (len(kept) < 2):
+        return np.zeros(n, dtype = np.float64)
+
+    span = np.clip(np.searchsorted(kept, np.arange(n), side = "right") - 1, 0, len(kept) - 2)
+    a = xy[kept[span]]
+    ab = xy[kept[span + 1]] - a
+    ap = xy - a
+    seg_len_sq = ab[:, 0] * ab[:, 0] + ab[:, 1] * ab[:, 1]
+
+    t = np.zeros(n, dtype = np.float64)
+    nonzero = seg_len_sq > 0
+    t[nonzero] = np.clip(
+        (ap[nonzero, 0] * ab[nonzero, 0] + ap[nonzero, 1] * ab[nonzero, 1]) / seg_len_sq[nonzero],
+        0.0, 1.0
+    )
+    dx = ap[:, 0] - t * ab[:, 0]
+    dy = ap[:, 1] - t * ab[:, 1]
+
+    return np.hypot(dx, dy)
@@ -0,0 +1,94 @@
+#! /usr/bin/env python3
+
+import functools
+from lxml import etree
+from pyproj import CRS
+
+DEFAULT_GEOSTRING = "EPSG:4326"     # WGS84
+DEFAULT_PROJ = "EPSG:32654"         # Tokyo, Japan
+PROJ_MET = "EPSG:3857"              # WGS84 / Pseudo-Mercator (Meter)
+
+# Elements that can only come after <header>, probing stops there
+HEADER_STOP_TAGS = ("road", "junction", "controller")
+
+
+def probeGeoreference(xodr_path: str) -> str:
+    """
+    Read the <header><geoReference> text of an XODR file without parsing the whole file.
+    Parsing stops as soon as the header is closed (or the first road starts).
+
+    Params
+    ------
+        xodr_path: str, path to file.
+
+    Returns
+    -------
+        raw_proj_str: str | None, stripped geoReference text, None if there is none.
+    """
+
+    for event, elem in etree.iterparse(str(xodr_path), events = ("start", "end")):
+        tag = etree.QName(elem).localname
+
+        if (event == "end") and (tag == "geoReference"):
+            return (elem.text or "").strip() or None
+
+        if (
+            ((event == "end") and (tag == "header")) or 
+            ((event == "start") and (tag in HEADER_STOP_TAGS))
+        ):
+            return None
+
+    return None
+
+
+@functools.lru_cache(maxsize = None)
+def validateCRS(proj_string: str) -> tuple[CRS, str]:
+    """
+    Validate a proj4 string once per process, batch runs over many files
+    sharing a georeference hit the cache.
+
+    Params
+    ------
+        proj_string: str, proj4 string.
+
+    Returns
+    -------
+        - crs: CRS | None, the validated CRS, None if invalid.
+        - error: str | None, validation error message, None if valid.
+    """
+
+    try:
+        return CRS.from_proj4(proj_string), None
+    except Exception as e:
+        return None, str(e)
+
+
+def extractGeorefString(xodr_path: str) -> tuple[str, bool]:
+    """
+    Extracts <geoReference> string from input XODR file.
+
+    Params
+    ------
+        xodr_path: str, path to file.
+
+    Returns
+    -------
+        - proj_string: str | None — CRS proj4 string or None if not found/invalid.
+        - a bool flag, True means lat/lon output, False means local_x, local_y output.
+    """
+    try:
+        raw_proj_str = probeGeoreference(xodr_path)
+
+        if (raw_proj_str is not None):
+            print(f"Proj found in input: {raw_proj_str}")
+
+            # Validate
+            _, error = validateCRS(raw_proj_str)
+            if (error is None):
+                return raw_proj_str, True
+            print(f"Invalid CRS string: {error}")
+
+    except Exception as e:
+        print(f"Error parsing geoReference from {xodr_path}: {e}")
+
+    return DEFAULT_PROJ, False
@@ -0,0 +1,756 @@
+#! /usr/bin/env python3
+
+import os
+import copy
+import json
+import hashlib
+import argparse
+import tempfile
+from pathlib import Path
+from dataclasses import asdict
+from lxml import etree
+
+from crdesigner.common.config.lanelet2_config import lanelet2_config
+from crdesigner.common.config.opendrive_config import OpenDriveConfig
+from .conversion import PROJ_MET, prepConversionCRS, convertOpenDriveWithMapping, OSMLaneletConverter
+from .mapping import buildIdMappingRows, readIdMappingCSV, writeIdMappingCSV, sortIdMappingRows
+from .postprocess import postprocessDownsamplingOSMLanelet, SIMPLIFY_MODES, DEFAULT_MAX_ERROR, BATCH_ANGLE_FRAME
+from .writer import OSMOutputOptions, readOSM, writeOSMWithOptions, addOutputArgs, outputOptionsFromArgs
+from .batch import STRAIGHT_ANGLE_THRSH, MIN_SEGMENT_DIST, convertFile, outputPaths
+
+FINGERPRINT_FORMAT_VERSION = 2
+
+
+def _hashElement(elem: etree.Element) -> str:
+
+    return hashlib.sha256(etree.tostring(elem, method = "c14n")).hexdigest()
+
+
+def xodrFingerprints(xodr_path: str) -> dict:
+    """
+    Content hash of every top-level element of an XODR file: one per <road> and
+    <junction> by ID, one for everything else (header, controllers, ...) together.
+
+    Params
+    ------
+        xodr_path: str, path to the XODR file.
+
+    Returns
+    -------
+        fingerprints: dict, {"format", "global", "roads": {id: hash}, "junctions": {id: hash}}.
+    """
+
+    roads = {}
+    junctions = {}
+    global_hasher = hashlib.sha256()
+
+    root = etree.parse(str(xodr_path)).getroot()
+    for child in root:
+        if not (isinstance(child.tag, str)):
+            continue
+        if (child.tag == "road"):
+            roads[child.get("id")] = _hashElement(child)
+        elif (child.tag == "junction"):
+            junctions[child.get("id")] = _hashElement(child)
+        else:
+            global_hasher.update(etree.tostring(child, method = "c14n"))
+
+    return {
+        "format": FINGERPRINT_FORMAT_VERSION,
+        "global": global_hasher.hexdigest(),
+        "roads": roads,
+        "junctions": junctions,
+    }
+
+
+def conversionSettings(
+    straight_angle_threshold: float = STRAIGHT_ANGLE_THRSH,
+    min_segment_dist: float = MIN_SEGMENT_DIST,
+    concatenate_lanelets: bool = False,
+    georeference_string: str = PROJ_MET,
+    mode: str = "angle",
+    max_error: float = DEFAULT_MAX_ERROR,
+    output_options: OSMOutputOptions = None
+) -> dict:
+    """
+    Everything besides the XODR content that shapes an output, stored with its
+    fingerprints: splicing a re-converted subset into an output made with other
+    settings would mix both.
+
+    Params
+    ------
+        Same as batch.convertFile.
+
+    Returns
+    -------
+        settings: dict, JSON-serializable, compared as is.
+    """
+
+    if (output_options is None):
+        output_options = OSMOutputOptions()
+
+    return {
+        "straight_angle_threshold": straight_angle_threshold,
+        "min_segment_dist": min_segment_dist,
+        "concatenate_lanelets": concatenate_lanelets,
+        "georeference_string": georeference_string,
+        "mode": mode,
+        "max_error": max_error,
+        "output": asdict(output_options),
+    }
+
+
+def writeFingerprints(
+    path: str,
+    fingerprints: dict
+):
+
+    with open(path, "w") as f:
+        json.dump(fingerprints, f, indent = 1, sort_keys = True)
+
+
+def loadFingerprints(path: str) -> dict:
+    """
+    Load fingerprints written by writeFingerprints, None if missing or from another format
+    (format 1 files hold no conversion settings).
+    """
+
+    try:
+        with open(path) as f:
+            fingerprints = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if (fingerprints.get("format") != FINGERPRINT_FORMAT_VERSION):
+        return None
+
+    return fingerprints
+
+
+def diffFingerprints(
+    old: dict,
+    new: dict
+) -> tuple[set[str], set[str], set[str]]:
+    """
+    Compare two fingerprints at road/junction level.
+
+    Returns
+    -------
+        - changed_roads: set[str], road IDs added or modified in new.
+        - removed_roads: set[str], road IDs only in old.
+        - changed_junctions: set[str], junction IDs added, modified or removed.
+    """
+
+    changed_roads = {
+        road_id
+        for road_id, road_hash in new["roads"].items()
+        if old["roads"].get(road_id) != road_hash
+    }
+    removed_roads = set(old["roads"]) - set(new["roads"])
+    changed_junctions = {
+        junction_id
+        for junction_id in set(old["junctions"]) | set(new["junctions"])
+        if old["junctions"].get(junction_id) != new["junctions"].get(junction_id)
+    }
+
+    return changed_roads, removed_roads, changed_junctions
+
+
+class RoadGraph:
+    """
+    Road adjacency of an XODR file: road links plus junction membership.
+    Two roads are neighbours if one links to the other, or if both take part
+    (as incoming or connecting road) in the same junction.
+
+    Roads outside junctions linked directly to each other form a chain, and
+    crdesigner can merge lanelets all along it, so chains are re-converted whole.
+    """
+
+    def __init__(self, xodr_root: etree.Element):
+
+        self.junction_roads = {}
+        for junction in xodr_root.findall("junction"):
+            roads = set()
+            for connection in junction.findall("connection"):
+                roads.add(connection.get("incomingRoad"))
+                roads.add(connection.get("connectingRoad"))
+            roads.discard(None)
+            self.junction_roads[junction.get("id")] = roads
+
+        self.road_links = {}
+        self.road_junctions = {}
+        self.junction_interior = set()
+        for road in xodr_root.findall("road"):
+            road_id = road.get("id")
+            links = set()
+            junctions = set()
+            if (road.get("junction", "-1") != "-1"):
+                junctions.add(road.get("junction"))
+                self.junction_interior.add(road_id)
+            for link in road.findall("link/*"):
+                if (link.get("elementType") == "junction"):
+                    junctions.add(link.get("elementId"))
+                elif (link.get("elementId") is not None):
+                    links.add(link.get("elementId"))
+            self.road_links[road_id] = links
+            self.road_junctions[road_id] = junctions
+
+        for junction_id, roads in self.junction_roads.items():
+            for road_id in roads:
+                if (road_id in self.road_junctions):
+                    self.road_junctions[road_id].add(junction_id)
+
+        # Links are not always declared on both ends
+        for road_id, links in list(self.road_links.items()):
+            for linked_id in links:
+                if (linked_id in self.road_links):
+                    self.road_links[linked_id].add(road_id)
+
+    def chains(self, road_ids: set[str]) -> set[str]:
+        """
+        road_ids plus every road reachable from them through direct links
+        between roads outside junctions.
+        """
+
+        chained = set(road_ids) & set(self.road_links)
+        stack = list(chained - self.junction_interior)
+        while (stack):
+            for linked_id in self.road_links[stack.pop()]:
+                if (
+                    (linked_id in self.road_links) and 
+                    (linked_id not in self.junction_interior) and 
+                    (linked_id not in chained)
+                ):
+                    chained.add(linked_id)
+                    stack.append(linked_id)
+
+        return chained
+
+    def neighbours(self, road_ids: set[str]) -> set[str]:
+        """
+        Road IDs adjacent to any of road_ids, road_ids excluded.
+        """
+
+        neighbours = set()
+        for road_id in road_ids:
+            neighbours |= self.road_links.get(road_id, set())
+            for junction_id in self.road_junctions.get(road_id, ()):
+                neighbours |= self.junction_roads.get(junction_id, set())
+
+        return (neighbours & set(self.road_links)) - set(road_ids)
+
+
+def extractRoads(
+    xodr_root: etree.Element,
+    road_ids: set[str]
+) -> etree.Element:
+    """
+    Copy of an XODR tree restricted to road_ids. Junctions only keep connections
+    whose incoming and connecting roads are both kept, and are dropped when none is left.
+    Everything else (header, controllers, ...) is copied as is.
+    """
+
+    sub_root = etree.Element(xodr_root.tag, xodr_root.attrib, nsmap = xodr_root.nsmap)
+    for child in xodr_root:
+        if (child.tag == "road") and (child.get("id") not in road_ids):
+            continue
+
+        child = copy.deepcopy(child)
+        if (child.tag == "junction"):
+            connections = child.findall("connection")
+            for connection in connections:
+                if (
+                    (connection.get("incomingRoad") not in road_ids) or
+                    (connection.get("connectingRoad") not in road_ids)
+                ):
+                    child.remove(connection)
+            if (len(child.findall("connection")) == 0):
+                continue
+
+        sub_root.append(child)
+
+    return sub_root
+
+
+def _maxElementId(osm_root: etree.Element) -> int:
+
+    max_id = 0
+    for child in osm_root:
+        try:
+            max_id = max(max_id, int(child.get("id")))
+        except (TypeError, ValueError):
+            continue
+
+    return max_id
+
+
+def wayGeometryKey(
+    way: etree.Element,
+    nodes: dict[str, etree.Element]
+) -> tuple:
+    """
+    Hashable content of a way, ID-free: its tags and the lat/lon and tags of its nodes.
+    """
+
+    return (
+        tuple(sorted((tag.get("k"), tag.get("v")) for tag in way.findall("tag"))),
+        tuple(
+            (
+                nodes[nd.get("ref")].get("lat"),
+                nodes[nd.get("ref")].get("lon"),
+                tuple((tag.get("k"), tag.get("v")) for tag in nodes[nd.get("ref")].findall("tag"))
+            )
+            for nd in way.findall("nd")
+            if nd.get("ref") in nodes
+        )
+    )
+
+
+def spliceOSM(
+    prev_osm: etree.Element,
+    prev_mapping_rows: list[tuple[str, str, str, int]],
+    replaced_roads: set[str],
+    new_osm: etree.Element,
+    new_mapping_rows: list[tuple[str, str, str, int]]
+) -> tuple[etree.Element, list[tuple[str, str, str, int]]]:
+    """
+    Replace the lanelets of replaced_roads in a previous downsampled Lanelet2 output
+    with those of a partial conversion, driven by both id mappings.
+
+    - Lanelet relations of replaced_roads are dropped from prev_osm, with the ways,
+      nodes and regulatory elements only they used.
+    - Every element of new_osm is added with a fresh ID, except lanelet relations
+      whose (road, section, lane) existed before, which get their previous ID back.
+    - Elements of untouched roads keep their IDs.
+    - Ways no relation refers to (e.g. virtual traffic sign ways) cannot be traced back
+      to a road, so previous ones are kept and new ones only added when no identical
+      way (same tags, same node coordinates) is already there.
+
+    Params
+    ------
+        prev_osm: lxml.etree.Element, previous downsampled <osm> root.
+        prev_mapping_rows: list, previous (road, section, lane, relation_id) rows.
+        replaced_roads: set[str], road IDs whose lanelets are replaced (or removed).
+        new_osm: lxml.etree.Element, downsampled <osm> root of the partial conversion,
+            restricted to lanelets of replaced_roads.
+        new_mapping_rows: list, (road, section, lane, relation_id) rows of new_osm.
+
+    Returns
+    -------
+        - osm_root: lxml.etree.Element, spliced <osm> root.
+        - mapping_rows: list, spliced, sorted mapping rows.
+    """
+
+    def _members(relation):
+        return [
+            (member.get("type"), member.get("ref"))
+            for member in relation.findall("member")
+        ]
+
+    prev_ways = {way.get("id"): way for way in prev_osm.findall("way")}
+    prev_relations = {rel.get("id"): rel for rel in prev_osm.findall("relation")}
+
+    # Lanelet relations to drop, and the keys they were mapped from
+    removed_relations = set()
+    reusable_ids = {}
+    kept_mapping_rows = []
+    for row in prev_mapping_rows:
+        if (row[0] in replaced_roads):
+            removed_relations.add(str(row[3]))
+            reusable_ids[tuple(row[:3])] = int(row[3])
+        else:
+            kept_mapping_rows.append(tuple(row))
+
+    # Regulatory elements only referenced by dropped lanelets go too
+    regulatory_users = {}
+    for relation_id, relation in prev_relations.items():
+        for member_type, ref in _members(relation):
+            if (member_type == "relation"):
+                regulatory_users.setdefault(ref, set()).add(relation_id)
+    for ref, users in regulatory_users.items():
+        if (users <= removed_relations):
+            removed_relations.add(ref)
+
+    # Ways only referenced by dropped relations, then nodes only referenced by dropped ways
+    way_users = {}
+    for relation_id, relation in prev_relations.items():
+        for member_type, ref in _members(relation):
+            if (member_type == "way"):
+                way_users.setdefault(ref, set()).add(relation_id)
+    removed_ways = {
+        way_id
+        for way_id, users in way_users.items()
+        if users <= removed_relations
+    }
+
+    node_users = {}
+    for way_id, way in prev_ways.items():
+        for nd in way.findall("nd"):
+            node_users.setdefault(nd.get("ref"), set()).add(way_id)
+    removed_nodes = {
+        node_id
+        for node_id, users in node_users.items()
+        if users <= removed_ways
+    }
+
+    # Unreferenced new ways that duplicate a previous one, with their nodes
+    prev_nodes = {node.get("id"): node for node in prev_osm.findall("node")}
+    prev_way_keys = {
+        wayGeometryKey(way, prev_nodes)
+        for way_id, way in prev_ways.items()
+        if way_id not in way_users
+    }
+
+    new_nodes = {node.get("id"): node for node in new_osm.findall("node")}
+    new_referenced_ways = {
+        member.get("ref")
+        for member in new_osm.iter("member")
+        if member.get("type") == "way"
+    }
+    duplicate_ways = {
+        way.get("id")
+        for way in new_osm.findall("way")
+        if (way.get("id") not in new_referenced_ways) and (wayGeometryKey(way, new_nodes) in prev_way_keys)
+    }
+    new_node_users = {}
+    for way in new_osm.findall("way"):
+        for nd in way.findall("nd"):
+            new_node_users.setdefault(nd.get("ref"), set()).add(way.get("id"))
+    duplicate_nodes = {
+        node_id
+        for node_id, users in new_node_users.items()
+        if users <= duplicate_ways
+    }
+
+    removed = {
+        "way": removed_ways,
+        "relation": removed_relations,
+        "node": removed_nodes,
+    }
+    skipped = {
+        "way": duplicate_ways,
+        "relation": set(),
+        "node": duplicate_nodes,
+    }
+
+    # Fresh IDs above anything the previous output ever used
+    next_id = max(_maxElementId(prev_osm), max((int(row[3]) for row in prev_mapping_rows), default = 0)) + 1
+    id_remap = {}
+
+    new_relation_keys = {
+        str(row[3]): tuple(row[:3])
+        for row in new_mapping_rows
+    }
+    for relation in new_osm.findall("relation"):
+        key = new_relation_keys.get(relation.get("id"))
+        if (key is not None) and (key in reusable_ids):
+            id_remap[relation.get("id")] = str(reusable_ids[key])
+
+    for child in new_osm:
+        if (child.get("id") not in id_remap):
+            id_remap[child.get("id")] = str(next_id)
+            next_id += 1
+
+    def _remapped(elem):
+        elem = copy.deepcopy(elem)
+        elem.set("id", id_remap[elem.get("id")])
+        for nd in elem.findall("nd"):
+            nd.set("ref", id_remap.get(nd.get("ref"), nd.get("ref")))
+        for member in elem.findall("member"):
+            member.set("ref", id_remap.get(member.get("ref"), member.get("ref")))
+        return elem
+
+    # Same layout as the downsampled output: ways, relations, then nodes
+    osm_root = etree.Element(prev_osm.tag, prev_osm.attrib)
+    for tag in ("way", "relation", "node"):
+        osm_root.extend(
+            copy.deepcopy(child)
+            for child in prev_osm
+            if (child.tag == tag) and (child.get("id") not in removed[tag])
+        )
+        osm_root.extend(
+            _remapped(child)
+            for child in new_osm
+            if (child.tag == tag) and (child.get("id") not in skipped[tag])
+        )
+
+    mapping_rows = kept_mapping_rows + [
+        (road_id, section_id, lane_id, int(id_remap[str(relation_id)]))
+        for road_id, section_id, lane_id, relation_id in new_mapping_rows
+    ]
+
+    return osm_root, sortIdMappingRows(mapping_rows)
+
+
+def _restrictToRoads(
+    osm_root: etree.Element,
+    mapping_rows: list[tuple[str, str, str, int]],
+    road_ids: set[str]
+) -> tuple[etree.Element, list[tuple[str, str, str, int]]]:
+    """
+    Drop the lanelets of every road not in road_ids from a downsampled output,
+    by splicing "nothing" in their place.
+    """
+
+    dropped_roads = {row[0] for row in mapping_rows} - set(road_ids)
+    empty = etree.Element(osm_root.tag, osm_root.attrib)
+
+    osm_root, _ = spliceOSM(osm_root, mapping_rows, dropped_roads, empty, [])
+    kept_rows = [tuple(row) for row in mapping_rows if row[0] in road_ids]
+
+    return osm_root, kept_rows
+
+
+def convertRoadSubset(
+    sub_xodr_root: etree.Element,
+    road_ids: set[str],
+    straight_angle_threshold: float = STRAIGHT_ANGLE_THRSH,
+    min_segment_dist: float = MIN_SEGMENT_DIST,
+    concatenate_lanelets: bool = False,
+    georeference_string: str = PROJ_MET,
+    generator: str = "VMB",
+    mode: str = "angle",
+    max_error: float = DEFAULT_MAX_ERROR
+) -> tuple[etree.Element, list[tuple[str, str, str, int]]]:
+    """
+    Convert and downsample an extracted XODR subset (see extractRoads), keeping only
+    the lanelets of road_ids. Roads of the subset outside road_ids are context: they
+    are converted so the lanelets of road_ids join up as in a full conversion, then dropped.
+
+    Params
+    ------
+        sub_xodr_root: lxml.etree.Element, <OpenDRIVE> root of the subset.
+        road_ids: set[str], roads whose lanelets are kept.
+        Others: same as batch.convertFile, generator is set on the <osm> root.
+
+    Returns
+    -------
+        - osm_root: lxml.etree.Element, downsampled <osm> root, IDs local to this conversion.
+        - mapping_rows: list of (road_id, section_id, lane_id, lanelet2_relation_id).
+        None if conversion failed.
+    """
+
+    odr_conf = OpenDriveConfig()
+    odr_conf.concatenate_lanelets_flag = concatenate_lanelets
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        sub_xodr_path = Path(tmp_dir) / "subset.xodr"
+        etree.ElementTree(sub_xodr_root).write(
+            str(sub_xodr_path),
+            xml_declaration = True,
+            encoding = "UTF-8"
+        )
+
+        try:
+            scenario, cr_lanelet_to_odr_lane = convertOpenDriveWithMapping(sub_xodr_path, odr_conf)
+            scenario.location = prepConversionCRS(georeference_string)
+            converter = OSMLaneletConverter(lanelet2_config)
+            osm_model = converter(scenario)
+        except Exception as e:
+            print(f"Error during conversion: {e}")
+            return None
+
+    mapping_rows = buildIdMappingRows(converter, cr_lanelet_to_odr_lane)
+    osm_root = postprocessDownsamplingOSMLanelet(
+        osm_model,
+        straight_angle_threshold,
+        min_segment_dist,
+        geostring = georeference_string,
+        latlon_output = False,
+        generator = generator,
+        mode = mode,
+        max_error = max_error,
+        angle_frame = BATCH_ANGLE_FRAME
+    )
+
+    return _restrictToRoads(osm_root, mapping_rows, road_ids)
+
+
+def convertIncremental(
+    input_file_path: str,
+    output_dir: str,
+    straight_angle_threshold: float = STRAIGHT_ANGLE_THRSH,
+    min_segment_dist: float = MIN_SEGMENT_DIST,
+    concatenate_lanelets: bool = False,
+    georeference_string: str = PROJ_MET,
+    mode: str = "angle",
+    max_error: float = DEFAULT_MAX_ERROR,
+    output_options: OSMOutputOptions = None
+) -> dict:
+    """
+    Re-convert an edited XODR file, reusing the previous output in output_dir.
+
+    The file is diffed against the fingerprints of the previous run at road/junction
+    level. Changed roads and their neighbours are re-converted, with one more ring of
+    neighbours as context so the lanelets at their ends join up as in a full conversion,
+    and spliced into the previous output (see spliceOSM). Falls back to a full
+    conversion when there is no previous run, the conversion settings differ from
+    the previous run's (see conversionSettings) or anything outside roads/junctions changed.
+
+    Params
+    ------
+        Same as batch.convertFile. mode is one of SIMPLIFY_MODES, tuned parameters
+        could differ between the subset and the previous output.
+
+    Returns
+    -------
+        summary: dict, {"mode": "full" | "incremental" | "unchanged", road counts...},
+            None if conversion failed.
+    """
+
+    if (mode not in SIMPLIFY_MODES):
+        raise ValueError(f"Incremental conversion needs a fixed simplification mode, one of {SIMPLIFY_MODES}")
+    if (output_options is None):
+        output_options = OSMOutputOptions()
+
+    paths = outputPaths(input_file_path, output_dir)
+    osm_path = paths["osm"].with_suffix(output_options.suffix)
+    new_fingerprints = xodrFingerprints(input_file_path)
+    new_fingerprints["settings"] = conversionSettings(
+        straight_angle_threshold,
+        min_segment_dist,
+        concatenate_lanelets,
+        georeference_string,
+        mode,
+        max_error,
+        output_options
+    )
+    old_fingerprints = loadFingerprints(paths["fingerprints"])
+
+    def _fullConversion(reason):
+        print(f"Full conversion of {input_file_path}: {reason}")
+        times = convertFile(
+            input_file_path,
+            output_dir,
+            straight_angle_threshold,
+            min_segment_dist,
+            concatenate_lanelets,
+            georeference_string,
+            mode = mode,
+            max_error = max_error,
+            output_options = output_options
+        )
+        if (times is None):
+            return None
+        writeFingerprints(paths["fingerprints"], new_fingerprints)
+        return {"mode": "full", "roads": len(new_fingerprints["roads"])}
+
+    if (old_fingerprints is None):
+        return _fullConversion("no previous run")
+    if (old_fingerprints.get("settings") != new_fingerprints["settings"]):
+        return _fullConversion("conversion settings changed")
+    if not (osm_path.exists()) or not (paths["mapping"].exists()):
+        return _fullConversion("previous output missing")
+    if (old_fingerprints["global"] != new_fingerprints["global"]):
+        return _fullConversion("header or other global elements changed")
+
+    changed_roads, removed_roads, changed_junctions = diffFingerprints(old_fingerprints, new_fingerprints)
+    if not (changed_roads or removed_roads or changed_junctions):
+        print(f"{input_file_path} unchanged since the previous run")
+        return {"mode": "unchanged", "roads": len(new_fingerprints["roads"])}
+
+    xodr_root = etree.parse(str(input_file_path)).getroot()
+    graph = RoadGraph(xodr_root)
+
+    # Roads of changed junctions count as changed, removed roads' neighbours are affected too
+    seed_roads = set(changed_roads)
+    for junction_id in changed_junctions:
+        seed_roads |= graph.junction_roads.get(junction_id, set())
+    seed_roads &= set(graph.road_links)
+
+    removed_neighbours = {
+        road_id
+        for road_id, links in graph.road_links.items()
+        if links & removed_roads
+    }
+
+    seed_roads = graph.chains(seed_roads | removed_neighbours)
+    affected_roads = graph.chains(seed_roads | graph.neighbours(seed_roads))
+    context_roads = graph.chains(affected_roads | graph.neighbours(affected_roads))
+    print(
+        f"Incremental conversion of {input_file_path}: {len(changed_roads)} changed, "
+        f"{len(removed_roads)} removed, {len(changed_junctions)} junctions changed -> "
+        f"re-converting {len(affected_roads)} of {len(graph.road_links)} roads "
+        f"({len(context_roads)} with context)"
+    )
+
+    prev_osm = readOSM(osm_path)
+    prev_mapping_rows = readIdMappingCSV(paths["mapping"])
+
+    if (affected_roads):
+        converted = convertRoadSubset(
+            extractRoads(xodr_root, context_roads),
+            affected_roads,
+            straight_angle_threshold,
+            min_segment_dist,
+            concatenate_lanelets = concatenate_lanelets,
+            georeference_string = georeference_string,
+            generator = prev_osm.get("generator"),
+            mode = mode,
+            max_error = max_error
+        )
+        if (converted is None):
+            return None
+        new_osm, new_mapping_rows = converted
+    else:
+        new_osm = etree.Element(prev_osm.tag, prev_osm.attrib)
+        new_mapping_rows = []
+
+    osm_root, mapping_rows = spliceOSM(
+        prev_osm,
+        prev_mapping_rows,
+        affected_roads | removed_roads,
+        new_osm,
+        new_mapping_rows
+    )
+
+    writeOSMWithOptions(osm_root, osm_path, output_options)
+    writeIdMappingCSV(paths["mapping"], mapping_rows)
+    writeFingerprints(paths["fingerprints"], new_fingerprints)
+    print(f"Spliced output saved to : {osm_path}")
+
+    return {
+        "mode": "incremental",
+        "roads": len(graph.road_links),
+        "changed_roads": len(changed_roads),
+        "removed_roads": len(removed_roads),
+        "changed_junctions": len(changed_junctions),
+        "reconverted_roads": len(affected_roads),
+        "context_roads": len(context_roads),
+    }
+
+
+def main(argv: list[str] = None):
+
+    parser = argparse.ArgumentParser(
+        description = "Re-convert edited XODR files, only redoing changed roads and their neighbours."
+    )
+    parser.add_argument("input_files", nargs = "+")
+    parser.add_argument("--output-dir", required = True,
+                        help = "directory holding the previous run's output, updated in place")
+    parser.add_argument("--angle", type = float, default = STRAIGHT_ANGLE_THRSH)
+    parser.add_argument("--min-dist", type = float, default = MIN_SEGMENT_DIST)
+    parser.add_argument("--mode", choices = SIMPLIFY_MODES, default = "angle",
+                        help = "simplification mode, --angle/--min-dist only apply to angle mode")
+    parser.add_argument("--max-error", type = float, default = DEFAULT_MAX_ERROR,
+                        help = "max deviation in meters for douglas_peucker/visvalingam")
+    parser.add_argument("--concatenate-lanelets", action = "store_true")
+    addOutputArgs(parser)
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.output_dir, exist_ok = True)
+    for input_file in args.input_files:
+        convertIncremental(
+            input_file,
+            args.output_dir,
+            straight_angle_threshold = args.angle,
+            min_segment_dist = args.min_dist,
+            concatenate_lanelets = args.concatenate_lanelets,
+            mode = args.mode,
+            max_error = args.max_error,
+            output_options = outputOptionsFromArgs(args)
+        )
+
+
+if __name__ == "__main__":
+    main()
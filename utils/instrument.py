@@ -0,0 +1,229 @@
+#! /usr/bin/env python3
+
+import csv
+import json
+import time
+import resource
+import tracemalloc
+import contextvars
+from contextlib import contextmanager
+from lxml import etree
+
+# Record stages are written to, None means instrumentation is off
+_ACTIVE_RECORD = contextvars.ContextVar("active_record", default = None)
+
+STAGES_CSV_HEADER = [
+    "input_file",
+    "stage",
+    "wall_secs",
+    "cpu_secs",
+    "process_peak_rss_mb",
+    "peak_rss_growth_mb",
+    "tracemalloc_peak_mb",
+    "input",
+    "output",
+]
+
+
+def peakRSSMegabytes() -> float:
+    """
+    Peak resident set size of this process so far, in MB (ru_maxrss is in KB on Linux).
+    """
+
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def osmCounts(osm_root: etree.Element) -> dict[str, int]:
+    """
+    Count nodes, ways and relations of an OSM tree.
+    """
+
+    counts = {"nodes": 0, "ways": 0, "relations": 0}
+    for child in osm_root:
+        if (child.tag == "node"):
+            counts["nodes"] += 1
+        elif (child.tag == "way"):
+            counts["ways"] += 1
+        elif (child.tag == "relation"):
+            counts["relations"] += 1
+
+    return counts
+
+
+def countedElements(
+    elements,
+    counts: dict[str, int]
+):
+    """
+    Pass OSM elements through, adding them to counts as osmCounts would count them.
+    For streamed output, whose tree is never built.
+    """
+
+    for element in elements:
+        if (element.tag in ("node", "way", "relation")):
+            counts[element.tag + "s"] += 1
+        yield element
+
+
+def osmLaneletCounts(osm) -> dict[str, int]:
+    """
+    Same as osmCounts, for a crdesigner OSMLanelet object model.
+    """
+
+    return {
+        "nodes": len(osm.nodes),
+        "ways": len(osm.ways),
+        "relations": len(osm.way_relations) + len(osm.multipolygons) + len(osm.regulatory_elements),
+    }
+
+
+class FileRecord:
+    """
+    Per-file instrumentation record: one entry per stage with wall and CPU time,
+    memory high-water marks and input/output element counts.
+
+    Stages are recorded through the module-level stage() context manager while the
+    record is active, so library code can mark its stages without being handed the record.
+    """
+
+    def __init__(
+        self,
+        input_file: str,
+        trace_memory: bool = False,
+        **meta
+    ):
+        """
+        Params
+        ------
+            input_file: str, file the record is about.
+            trace_memory: bool, also record the tracemalloc peak per stage. Accurate,
+                but slows Python allocations down noticeably. Default False.
+            meta: extra fields stored as-is in the record (e.g. set_name).
+        """
+
+        self.input_file = str(input_file)
+        self.trace_memory = trace_memory
+        self.meta = meta
+        self.stages = []
+
+    @contextmanager
+    def activate(self):
+        """
+        Make this record the one stage() writes to, for the duration of the block.
+        """
+
+        started_tracing = False
+        if (self.trace_memory) and not (tracemalloc.is_tracing()):
+            tracemalloc.start()
+            started_tracing = True
+
+        token = _ACTIVE_RECORD.set(self)
+        try:
+            yield self
+        finally:
+            _ACTIVE_RECORD.reset(token)
+            if (started_tracing):
+                tracemalloc.stop()
+
+    def toDict(self) -> dict:
+
+        return {
+            "input_file": self.input_file,
+            **self.meta,
+            "stages": self.stages,
+        }
+
+
+@contextmanager
+def stage(
+    name: str,
+    **input_counts
+):
+    """
+    Time one pipeline stage into the active FileRecord, no-op if none is active.
+
+    Memory is read from ru_maxrss, the process-lifetime peak RSS, which never goes down:
+        - process_peak_rss_mb: that peak when the stage ends, earlier stages (and, in a
+          reused worker, earlier files) included.
+        - peak_rss_growth_mb: how much the stage raised it. 0 when the stage stayed under
+          an earlier peak, so it is a lower bound of the stage's own footprint; use
+          trace_memory for an exact per-stage (Python allocations only) peak.
+
+    Params
+    ------
+        name: str, stage name, e.g. "parse_opendrive".
+        input_counts: counts describing the stage input, e.g. nodes = 1000.
+
+    Yields
+    ------
+        stage_entry: dict, put output counts in stage_entry["output"].
+    """
+
+    record = _ACTIVE_RECORD.get()
+    stage_entry = {
+        "stage": name,
+        "input": dict(input_counts),
+        "output": {},
+    }
+
+    if (record is None):
+        yield stage_entry
+        return
+
+    if (record.trace_memory):
+        tracemalloc.reset_peak()
+    start_peak_rss_mb = peakRSSMegabytes()
+    start_wall = time.perf_counter()
+    start_cpu = time.process_time()
+
+    try:
+        yield stage_entry
+    finally:
+        stage_entry["wall_secs"] = time.perf_counter() - start_wall
+        stage_entry["cpu_secs"] = time.process_time() - start_cpu
+        stage_entry["process_peak_rss_mb"] = peakRSSMegabytes()
+        stage_entry["peak_rss_growth_mb"] = stage_entry["process_peak_rss_mb"] - start_peak_rss_mb
+        if (record.trace_memory):
+            stage_entry["tracemalloc_peak_mb"] = tracemalloc.get_traced_memory()[1] / 1024 ** 2
+        record.stages.append(stage_entry)
+
+
+def writeJSONLines(
+    path: str,
+    records: list[dict],
+    append: bool = False
+):
+    """
+    Write records to a JSON Lines file, one record per line.
+    """
+
+    with open(path, "a" if (append) else "w") as file_out:
+        for record in records:
+            file_out.write(json.dumps(record) + "\n")
+
+
+def writeStagesCSV(
+    path: str,
+    records: list[dict]
+):
+    """
+    Write records as CSV, one row per (file, stage).
+    """
+
+    with open(path, "w", newline = "") as csv_file:
+        writer = csv.writer(csv_file)
+        writer.writerow(STAGES_CSV_HEADER)
+        for record in records:
+            for stage_entry in record["stages"]:
+                tracemalloc_peak_mb = stage_entry.get("tracemalloc_peak_mb")
+                writer.writerow([
+                    record["input_file"],
+                    stage_entry["stage"],
+                    f"{stage_entry['wall_secs']:.4f}",
+                    f"{stage_entry['cpu_secs']:.4f}",
+                    f"{stage_entry['process_peak_rss_mb']:.1f}",
+                    f"{stage_entry['peak_rss_growth_mb']:.1f}",
+                    "" if (tracemalloc_peak_mb is None) else f"{tracemalloc_peak_mb:.1f}",
+                    json.dumps(stage_entry["input"]),
+                    json.dumps(stage_entry["output"]),
+                ])
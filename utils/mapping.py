@@ -0,0 +1,168 @@
+#! /usr/bin/env python3
+
+import csv
+from crdesigner.map_conversion.lanelet2.cr2lanelet import CR2LaneletConverter
+
+MAPPING_HEADER = [
+    "opendrive_road_id",
+    "opendrive_section_id",
+    "opendrive_lane_id",
+    "lanelet2_relation_id",
+]
+
+
+def buildCrToLl2LaneMapping(
+    converter: CR2LaneletConverter
+) -> dict[int, int]:
+    """
+    Map CommonRoad lanelet IDs to the Lanelet2 relation IDs the converter created for them.
+
+    Params
+    ------
+        converter: CR2LaneletConverter, converter instance that already ran on a scenario.
+
+    Returns
+    -------
+        cr_to_ll2: dict[int, int], CommonRoad lanelet ID -> Lanelet2 relation ID.
+    """
+
+    if (
+        (converter is None) or 
+        (converter.osm is None)
+    ):
+        return {}
+
+    lanelet_way_rel_ids = {
+        (way_rel.left_way, way_rel.right_way): way_rel_id
+        for way_rel_id, way_rel in converter.osm.way_relations.items()
+        if way_rel.tag_dict.get("type") == "lanelet"
+    }
+
+    cr_to_ll2 = {}
+    for cr_lanelet_id, left_way_id in converter.left_ways.items():
+        right_way_id = converter.right_ways.get(cr_lanelet_id)
+        if right_way_id is None:
+            continue
+
+        ll2_relation_id = lanelet_way_rel_ids.get((left_way_id, right_way_id))
+        if (ll2_relation_id is not None):
+            cr_to_ll2[int(cr_lanelet_id)] = int(ll2_relation_id)
+
+    return cr_to_ll2
+
+
+def parseOdrLaneId(odr_encoded_lane_id: str):
+    """
+    Split an encoded OpenDRIVE lane ID into its road, section and lane parts.
+
+    Params
+    ------
+        odr_encoded_lane_id: str, e.g. road.section.lane.width or road.section.lane.width.m
+
+    Returns
+    -------
+        (road_id, section_id, lane_id): tuple[str, str, str], or None if malformed.
+    """
+
+    # Expected formats include: road.section.lane.width and road.section.lane.width.m
+    parts = str(odr_encoded_lane_id).split(".")
+    if (len(parts) < 3):
+        return None
+
+    return parts[0], parts[1], parts[2]
+
+
+def _sort_key(row):
+    road, section, lane, relation = row
+    try:
+        return (int(road), int(section), int(lane), int(relation))
+    except ValueError:
+        return (road, section, lane, relation)
+
+
+def buildIdMappingRows(
+    converter: CR2LaneletConverter,
+    cr_lanelet_to_odr_lane: dict[int, str]
+) -> list[tuple[str, str, str, int]]:
+    """
+    Build the sorted OpenDRIVE -> Lanelet2 mapping rows.
+
+    Params
+    ------
+        converter: CR2LaneletConverter, converter instance that already ran on a scenario.
+        cr_lanelet_to_odr_lane: dict[int, str], as returned by convertOpenDriveWithMapping.
+
+    Returns
+    -------
+        mapping_rows: list of (road_id, section_id, lane_id, lanelet2_relation_id), sorted.
+    """
+
+    cr_to_ll2 = buildCrToLl2LaneMapping(converter)
+    mapping_rows = []
+    for cr_lanelet_id, ll2_relation_id in cr_to_ll2.items():
+        odr_encoded_lane_id = cr_lanelet_to_odr_lane.get(cr_lanelet_id)
+        if odr_encoded_lane_id is None:
+            continue
+
+        odr_triplet = parseOdrLaneId(odr_encoded_lane_id)
+        if odr_triplet is None:
+            continue
+
+        road_id, section_id, lane_id = odr_triplet
+        mapping_rows.append((road_id, section_id, lane_id, ll2_relation_id))
+
+    return sortIdMappingRows(mapping_rows)
+
+
+def sortIdMappingRows(
+    mapping_rows: list[tuple[str, str, str, int]]
+) -> list[tuple[str, str, str, int]]:
+    """
+    Sort mapping rows numerically by road, section, lane, then relation ID.
+    """
+
+    return sorted(mapping_rows, key = _sort_key)
+
+
+def writeIdMappingCSV(
+    mapping_path: str,
+    mapping_rows: list[tuple[str, str, str, int]]
+):
+    """
+    Write OpenDRIVE -> Lanelet2 mapping rows as CSV.
+
+    Params
+    ------
+        mapping_path: str, output CSV path.
+        mapping_rows: list of (road_id, section_id, lane_id, lanelet2_relation_id).
+    """
+
+    with open(mapping_path, "w", newline="") as csv_file:
+        writer = csv.writer(csv_file)
+        writer.writerow(MAPPING_HEADER)
+        for road_id, section_id, lane_id, ll2_relation_id in mapping_rows:
+            writer.writerow([road_id, section_id, lane_id, ll2_relation_id])
+
+
+def readIdMappingCSV(
+    mapping_path: str
+) -> list[tuple[str, str, str, int]]:
+    """
+    Read mapping rows written by writeIdMappingCSV.
+
+    Params
+    ------
+        mapping_path: str, input CSV path.
+
+    Returns
+    -------
+        mapping_rows: list of (road_id, section_id, lane_id, lanelet2_relation_id).
+    """
+
+    with open(mapping_path, newline="") as csv_file:
+        reader = csv.reader(csv_file)
+        next(reader, None)
+        return [
+            (road_id, section_id, lane_id, int(ll2_relation_id))
+            for road_id, section_id, lane_id, ll2_relation_id in reader
+        ]
@@ -0,0 +1,292 @@
+#! /usr/bin/env python3
+
+import sqlite3
+import argparse
+from pathlib import Path
+from .mapping import readIdMappingCSV
+
+MAPPING_STORE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS maps (
+    map_id INTEGER PRIMARY KEY,
+    map_name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS lanes (
+    map_id INTEGER NOT NULL REFERENCES maps(map_id) ON DELETE CASCADE,
+    road_id TEXT NOT NULL,
+    section_id TEXT NOT NULL,
+    lane_id TEXT NOT NULL,
+    relation_id INTEGER NOT NULL,
+    PRIMARY KEY (map_id, road_id, section_id, lane_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS lanes_by_relation ON lanes (map_id, relation_id);
+"""
+
+LaneKey = tuple[str, str, str]
+
+
+class IdMappingStore:
+    """
+    SQLite store of OpenDRIVE (road, section, lane) <-> Lanelet2 relation ID mappings,
+    for any number of maps in one file.
+
+    Both directions are B-tree indexed, so single lookups are O(log n) and batch
+    lookups are one indexed join, instead of reloading and scanning a CSV per query.
+    """
+
+    def __init__(self, db_path: str):
+        """
+        Params
+        ------
+            db_path: str, SQLite file, created if missing.
+        """
+
+        self.db_path = Path(db_path)
+        self.connection = sqlite3.connect(str(self.db_path))
+        self.connection.execute("PRAGMA foreign_keys = ON")
+        self.connection.executescript(MAPPING_STORE_SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.connection.close()
+
+    def _mapId(self, map_name: str) -> int:
+
+        row = self.connection.execute(
+            "SELECT map_id FROM maps WHERE map_name = ?", (map_name,)
+        ).fetchone()
+
+        return None if (row is None) else row[0]
+
+    def writeMap(
+        self,
+        map_name: str,
+        mapping_rows: list[tuple[str, str, str, int]]
+    ):
+        """
+        Store the mapping rows of one map, replacing any previous rows of that map.
+
+        Params
+        ------
+            map_name: str, map key, e.g. "CARLA/Town01.xodr".
+            mapping_rows: list of (road_id, section_id, lane_id, lanelet2_relation_id),
+                as returned by mapping.buildIdMappingRows.
+        """
+
+        with self.connection:
+            self.connection.execute("DELETE FROM maps WHERE map_name = ?", (map_name,))
+            map_id = self.connection.execute(
+                "INSERT INTO maps (map_name) VALUES (?)", (map_name,)
+            ).lastrowid
+            self.connection.executemany(
+                "INSERT INTO lanes VALUES (?, ?, ?, ?, ?)",
+                (
+                    (map_id, str(road_id), str(section_id), str(lane_id), int(relation_id))
+                    for road_id, section_id, lane_id, relation_id in mapping_rows
+                )
+            )
+
+    def importCSV(
+        self,
+        map_name: str,
+        mapping_path: str
+    ):
+        """
+        Store a mapping CSV written by mapping.writeIdMappingCSV.
+        """
+
+        self.writeMap(map_name, readIdMappingCSV(mapping_path))
+
+    def maps(self) -> list[tuple[str, int]]:
+        """
+        List (map_name, number of lanes) of every stored map, by name.
+        """
+
+        return self.connection.execute(
+            "SELECT map_name, COUNT(lanes.map_id) FROM maps "
+            "LEFT JOIN lanes USING (map_id) GROUP BY map_id ORDER BY map_name"
+        ).fetchall()
+
+    def removeMap(self, map_name: str):
+
+        with self.connection:
+            self.connection.execute("DELETE FROM maps WHERE map_name = ?", (map_name,))
+
+    def relationId(
+        self,
+        map_name: str,
+        road_id: str,
+        section_id: str,
+        lane_id: str
+    ) -> int:
+        """
+        Lanelet2 relation ID of one OpenDRIVE lane, None if unknown.
+        """
+
+        row = self.connection.execute(
+            "SELECT relation_id FROM lanes JOIN maps USING (map_id) "
+            "WHERE map_name = ? AND road_id = ? AND section_id = ? AND lane_id = ?",
+            (map_name, str(road_id), str(section_id), str(lane_id))
+        ).fetchone()
+
+        return None if (row is None) else row[0]
+
+    def laneKey(
+        self,
+        map_name: str,
+        relation_id: int
+    ) -> LaneKey:
+        """
+        (road_id, section_id, lane_id) of one Lanelet2 relation, None if unknown.
+        """
+
+        row = self.connection.execute(
+            "SELECT road_id, section_id, lane_id FROM lanes JOIN maps USING (map_id) "
+            "WHERE map_name = ? AND relation_id = ?",
+            (map_name, int(relation_id))
+        ).fetchone()
+
+        return None if (row is None) else tuple(row)
+
+    def roadLanes(
+        self,
+        map_name: str,
+        road_id: str
+    ) -> list[tuple[str, str, str, int]]:
+        """
+        Every mapping row of one road, sorted by section then lane (index prefix scan).
+        """
+
+        return self.connection.execute(
+            "SELECT road_id, section_id, lane_id, relation_id FROM lanes JOIN maps USING (map_id) "
+            "WHERE map_name = ? AND road_id = ? "
+            "ORDER BY CAST(section_id AS INTEGER), CAST(lane_id AS INTEGER)",
+            (map_name, str(road_id))
+        ).fetchall()
+
+    def relationIds(
+        self,
+        map_name: str,
+        lane_keys: list[LaneKey]
+    ) -> dict[LaneKey, int]:
+        """
+        Batch form of relationId, one indexed join for all keys.
+
+        Returns
+        -------
+            relation_ids: dict[LaneKey, int], only the keys found.
+        """
+
+        map_id = self._mapId(map_name)
+        if (map_id is None):
+            return {}
+
+        with self.connection:
+            self.connection.execute(
+                "CREATE TEMP TABLE IF NOT EXISTS query_lanes (road_id TEXT, section_id TEXT, lane_id TEXT)"
+            )
+            self.connection.execute("DELETE FROM query_lanes")
+            self.connection.executemany(
+                "INSERT INTO query_lanes VALUES (?, ?, ?)",
+                ((str(road_id), str(section_id), str(lane_id)) for road_id, section_id, lane_id in lane_keys)
+            )
+            rows = self.connection.execute(
+                "SELECT lanes.road_id, lanes.section_id, lanes.lane_id, lanes.relation_id "
+                "FROM query_lanes CROSS JOIN lanes ON lanes.map_id = ? AND lanes.road_id = query_lanes.road_id "
+                "AND lanes.section_id = query_lanes.section_id AND lanes.lane_id = query_lanes.lane_id",
+                (map_id,)
+            ).fetchall()
+
+        return {
+            (road_id, section_id, lane_id): relation_id
+            for road_id, section_id, lane_id, relation_id in rows
+        }
+
+    def laneKeys(
+        self,
+        map_name: str,
+        relation_ids: list[int]
+    ) -> dict[int, LaneKey]:
+        """
+        Batch form of laneKey, one indexed join for all relation IDs.
+
+        Returns
+        -------
+            lane_keys: dict[int, LaneKey], only the relation IDs found.
+        """
+
+        map_id = self._mapId(map_name)
+        if (map_id is None):
+            return {}
+
+        with self.connection:
+            self.connection.execute("CREATE TEMP TABLE IF NOT EXISTS query_relations (relation_id INTEGER)")
+            self.connection.execute("DELETE FROM query_relations")
+            self.connection.executemany(
+                "INSERT INTO query_relations VALUES (?)",
+                ((int(relation_id),) for relation_id in relation_ids)
+            )
+            rows = self.connection.execute(
+                "SELECT lanes.relation_id, lanes.road_id, lanes.section_id, lanes.lane_id "
+                "FROM query_relations CROSS JOIN lanes ON lanes.map_id = ? "
+                "AND lanes.relation_id = query_relations.relation_id",
+                (map_id,)
+            ).fetchall()
+
+        return {
+            relation_id: (road_id, section_id, lane_id)
+            for relation_id, road_id, section_id, lane_id in rows
+        }
+
+
+def main(argv: list[str] = None):
+
+    parser = argparse.ArgumentParser(description = "Build or query an indexed OpenDRIVE <-> Lanelet2 ID mapping store.")
+    parser.add_argument("--db", required = True, help = "SQLite mapping store")
+    subparsers = parser.add_subparsers(dest = "command", required = True)
+
+    import_parser = subparsers.add_parser("import", help = "import the id_mapping_*.csv of a batch output directory")
+    import_parser.add_argument("output_dir")
+
+    subparsers.add_parser("list", help = "list stored maps")
+
+    lane_parser = subparsers.add_parser("relation", help = "relation ID of road/section/lane")
+    lane_parser.add_argument("map_name")
+    lane_parser.add_argument("road_id")
+    lane_parser.add_argument("section_id")
+    lane_parser.add_argument("lane_id")
+
+    relation_parser = subparsers.add_parser("lane", help = "road/section/lane of relation IDs")
+    relation_parser.add_argument("map_name")
+    relation_parser.add_argument("relation_ids", nargs = "+", type = int)
+
+    args = parser.parse_args(argv)
+
+    with IdMappingStore(args.db) as store:
+        if (args.command == "import"):
+            output_dir = Path(args.output_dir)
+            for mapping_path in sorted(output_dir.rglob("id_mapping_*.csv")):
+                set_dir = mapping_path.parent.relative_to(output_dir)
+                map_name = str(set_dir / f"{mapping_path.stem[len('id_mapping_') : ]}.xodr")
+                store.importCSV(map_name, mapping_path)
+                print(f"Imported {map_name}")
+
+        elif (args.command == "list"):
+            for map_name, num_lanes in store.maps():
+                print(f"{map_name}  {num_lanes} lanes")
+
+        elif (args.command == "relation"):
+            print(store.relationId(args.map_name, args.road_id, args.section_id, args.lane_id))
+
+        elif (args.command == "lane"):
+            lane_keys = store.laneKeys(args.map_name, args.relation_ids)
+            for relation_id in args.relation_ids:
+                print(relation_id, lane_keys.get(relation_id))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+#! /usr/bin/env python3
+
+import math
+from array import array
+import numpy as np
+from lxml import etree
+
+
+def _parseFloat(value: str) -> float:
+    """
+    OSM coordinate attribute to float, NaN when empty (e.g. local_x/local_y only output).
+    """
+
+    return float(value) if (value) else math.nan
+
+
+class NodeTable:
+    """
+    Columnar, array-backed table of OSM nodes, one row per node in document order:
+    int64 IDs, (n, 2) float64 (lat, lon) and float64 elevation (0.0 when untagged).
+    Any other tags are kept sparsely, per row, since most nodes have none.
+
+    IDs are looked up through a sorted index with np.searchsorted instead of a dict,
+    and no index at all is built when IDs already come in increasing order (the
+    crdesigner output), so a node costs about 32 bytes instead of several hundred
+    for string IDs, tuples of Python floats and a dict entry.
+    """
+
+    def __init__(
+        self,
+        ids: np.ndarray,
+        coords: np.ndarray,
+        ele: np.ndarray,
+        tags: dict[int, list[tuple[str, str]]] = None
+    ):
+        """
+        Params
+        ------
+            ids: np.ndarray, (n,) int64 node IDs.
+            coords: np.ndarray, (n, 2) float64 (lat, lon) rows, NaN when unknown.
+            ele: np.ndarray, (n,) float64 elevations.
+            tags: dict[int, list[tuple[str, str]]], optional, row -> other (k, v) tags, in order.
+        """
+
+        self.ids = np.ascontiguousarray(ids, dtype = np.int64)
+        self.coords = np.ascontiguousarray(coords, dtype = np.float64).reshape(-1, 2)
+        self.ele = np.ascontiguousarray(ele, dtype = np.float64)
+        self.tags = {} if (tags is None) else tags
+
+        # Sorted ID -> row index, None when the IDs are their own sorted order
+        if (len(self.ids) < 2) or bool(np.all(self.ids[1:] > self.ids[:-1])):
+            self.order = None
+            self.sorted_ids = self.ids
+        else:
+            self.order = np.argsort(self.ids, kind = "stable")
+            self.sorted_ids = self.ids[self.order]
+
+    @classmethod
+    def fromXML(cls, osm_root: etree.Element) -> "NodeTable":
+        """
+        Build the table from the <node> children of an OSM root, in a single pass.
+        """
+
+        ids = array("q")
+        coords = array("d")
+        ele = array("d")
+        tags = {}
+
+        for row, node in enumerate(osm_root.iterchildren("node")):
+            ids.append(int(node.get("id")))
+            coords.append(_parseFloat(node.get("lat")))
+            coords.append(_parseFloat(node.get("lon")))
+
+            node_ele = 0.0
+            if (len(node)):
+                node_tags = []
+                for tag in node.iterchildren("tag"):
+                    if (tag.get("k") == "ele"):
+                        node_ele = float(tag.get("v"))
+                    else:
+                        node_tags.append((tag.get("k"), tag.get("v")))
+                if (node_tags):
+                    tags[row] = node_tags
+            ele.append(node_ele)
+
+        return cls(
+            np.frombuffer(ids, dtype = np.int64),
+            np.frombuffer(coords, dtype = np.float64),
+            np.frombuffer(ele, dtype = np.float64),
+            tags
+        )
+
+    @classmethod
+    def fromOSMLanelet(cls, osm) -> "NodeTable":
+        """
+        Build the table straight from the Node objects of a crdesigner OSMLanelet.
+        Tags come out in the order Node.serialize_to_xml would write them.
+        """
+
+        nodes = osm.nodes.values()
+        ids = np.fromiter((int(node.id_) for node in nodes), dtype = np.int64, count = len(nodes))
+        coords = np.fromiter(
+            (float(value) for node in nodes for value in (node.lat, node.lon)),
+            dtype = np.float64,
+            count = 2 * len(nodes)
+        )
+        ele = np.fromiter((float(node.ele) for node in nodes), dtype = np.float64, count = len(nodes))
+
+        tags = {}
+        for row, node in enumerate(nodes):
+            node_tags = []
+            if (node.local_x is not None) and (node.local_y is not None):
+                node_tags.append(("local_x", str(node.local_x)))
+                node_tags.append(("local_y", str(node.local_y)))
+            if (node.mgrs_code):
+                node_tags.append(("mgrs_code", node.mgrs_code))
+            if (node_tags):
+                tags[row] = node_tags
+
+        return cls(ids, coords, ele, tags)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def lat(self) -> np.ndarray:
+        return self.coords[:, 0]
+
+    @property
+    def lon(self) -> np.ndarray:
+        return self.coords[:, 1]
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Bytes held by the columns and the index, sparse tags excluded.
+        """
+
+        num_bytes = self.ids.nbytes + self.coords.nbytes + self.ele.nbytes
+        if (self.order is not None):
+            num_bytes += self.order.nbytes + self.sorted_ids.nbytes
+
+        return num_bytes
+
+    def rows(self, node_ids) -> np.ndarray:
+        """
+        Rows of the given node IDs, vectorized. Unknown IDs are dropped, a duplicated
+        ID resolves to its last row.
+
+        Params
+        ------
+            node_ids: iterable of int or numeric str, e.g. the refs of a way's <nd> elements.
+
+        Returns
+        -------
+            rows: np.ndarray, (k,) int64 rows, in the order of node_ids.
+        """
+
+        node_ids = np.fromiter((int(node_id) for node_id in node_ids), dtype = np.int64)
+        if (len(node_ids) == 0) or (len(self.ids) == 0):
+            return np.empty(0, dtype = np.int64)
+
+        positions = np.searchsorted(self.sorted_ids, node_ids, side = "right") - 1
+        found = (positions >= 0) & (self.sorted_ids[np.maximum(positions, 0)] == node_ids)
+        positions = positions[found]
+
+        return positions if (self.order is None) else self.order[positions]
+
+    def row(self, node_id) -> int:
+        """
+        Row of one node ID, None if unknown.
+        """
+
+        rows = self.rows((node_id,))
+
+        return int(rows[0]) if (len(rows)) else None
+
+    def rowTags(self, row: int) -> list[tuple[str, str]]:
+        """
+        Other (k, v) tags of a row, ele excluded, empty if none.
+        """
+
+        return self.tags.get(row, [])
+
+    def idString(self, row: int) -> str:
+        """
+        Node ID of a row, as written in OSM XML.
+        """
+
+        return str(int(self.ids[row]))
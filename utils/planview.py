@@ -0,0 +1,335 @@
+#! /usr/bin/env python3
+
+import inspect
+import numpy as np
+from contextlib import contextmanager
+from importlib.metadata import version, PackageNotFoundError
+from crdesigner.map_conversion.opendrive.odr2cr.opendrive_parser.elements.roadPlanView import PlanView
+from crdesigner.map_conversion.opendrive.odr2cr.opendrive_conversion.plane_elements.border import Border
+from crdesigner.map_conversion.opendrive.odr2cr.opendrive_conversion.plane_elements.plane import ParametricLane
+
+# "dense" is crdesigner's own sampling, every lane every ~0.5 m whatever its shape
+SAMPLING_MODES = ("dense", "analytic")
+
+DEFAULT_CHORD_TOLERANCE = 0.15          # crdesigner's OpenDriveConfig.error_tolerance default, in meters
+MIN_LANE_VERTICES = 3                   # Same floor as crdesigner's dense sampling
+BREAKPOINT_EPS = 1e-6                   # Breakpoints closer than this to a lane end are dropped, in meters
+CRDESIGNER_TESTED_VERSION = "0.8.5"     # crdesigner release whose internals the analytic sampler was written against
+
+# crdesigner internals the analytic sampler reads or replaces, none of them public API
+_CALC_VERTICES_PARAMS = ["self", "error_tolerance", "min_delta_s", "transformer"]
+_BORDER_ATTRIBUTES = ("ref_offset", "reference", "width_coefficient_offsets")
+
+
+def _chainOffset(border) -> float:
+    """
+    Plan view s of s = 0 on a border, through its chain of reference borders.
+    """
+
+    offset = 0.0
+    while isinstance(border, Border):
+        offset += border.ref_offset
+        border = border.reference
+
+    return offset
+
+
+def _chainBreakpoints(border) -> list[float]:
+    """
+    Plan view s where the curve of a border stops being smooth: starts of the width
+    polynomials of every border of its reference chain, and starts of the plan view
+    geometries (line, arc, spiral, poly3...) at the end of it.
+    """
+
+    breakpoints = []
+    offset = _chainOffset(border)
+    while isinstance(border, Border):
+        breakpoints.extend(offset + width_offset for width_offset in border.width_coefficient_offsets)
+        offset -= border.ref_offset
+        border = border.reference
+    breakpoints.extend(border._geo_lengths.tolist())
+
+    return breakpoints
+
+
+def _laneSpan(lane: ParametricLane) -> tuple[float, float]:
+    """
+    (plan view s of the lane start, lane length), reversed lanes included.
+    """
+
+    group = lane.border_group
+
+    return group.outer_border_offset + _chainOffset(group.outer_border), lane.length
+
+
+def _chordDeviation(
+    start_points: np.ndarray,
+    end_points: np.ndarray,
+    probe_points: np.ndarray
+) -> float:
+    """
+    Largest distance of the probe points of every curve to the chord of that curve.
+
+    Params
+    ------
+        start_points, end_points: np.ndarray, (c, 2) chord ends, one row per curve.
+        probe_points: np.ndarray, (k, c, 2) points of the curves between the chord ends.
+
+    Returns
+    -------
+        deviation: float, in meters.
+    """
+
+    ab = end_points - start_points
+    ap = probe_points - start_points
+    seg_len_sq = np.maximum((ab * ab).sum(axis = -1), 1e-18)
+    t = np.clip((ap * ab).sum(axis = -1) / seg_len_sq, 0.0, 1.0)
+
+    return float(np.hypot(*np.moveaxis(ap - t[..., None] * ab, -1, 0)).max())
+
+
+class AnalyticVertexSampler:
+    """
+    Places lanelet vertices from the OpenDRIVE geometry instead of every ~0.5 m:
+    each lane is split at the breakpoints of its plan view geometries and width
+    polynomials, and every smooth piece in between is bisected until the chord of
+    each segment stays within chord_tolerance of both lane borders (checked at the
+    segment's quarter, half and three-quarter points). Straight constant-width lanes
+    get their ends only, arcs and spirals get segments of about sqrt(8 * tolerance * radius).
+
+    Lanes of one lane section with the same extent share their sample positions, so
+    the border two neighbouring lanes have in common gets the same vertices on both
+    sides, as it does with dense sampling.
+    """
+
+    def __init__(
+        self,
+        plane_groups: list,
+        chord_tolerance: float,
+        min_delta_s: float
+    ):
+        """
+        Params
+        ------
+            plane_groups: list[ParametricLaneGroup], every lane group of the network,
+                e.g. Network._planes once load_opendrive ran.
+            chord_tolerance: float, max distance between a border and its polyline, in meters.
+            min_delta_s: float, segments are never split below this length, in meters.
+        """
+
+        self.chord_tolerance = chord_tolerance
+        self.min_delta_s = min_delta_s
+        self.num_evaluations = 0
+        self.num_positions = 0
+
+        self._lanes = {}
+        for plane_group in plane_groups:
+            for lane in plane_group.parametric_lanes:
+                self._lanes.setdefault(self._key(lane), []).append(lane)
+        self._positions = {}
+
+    @staticmethod
+    def _key(lane: ParametricLane) -> tuple:
+
+        start, length = _laneSpan(lane)
+        border = lane.border_group.outer_border
+        while isinstance(border, Border):
+            border = border.reference
+
+        return id(border), round(start, 6), round(length, 6)
+
+    def _points(
+        self,
+        lanes: list[ParametricLane],
+        u: float
+    ) -> np.ndarray:
+        """
+        Inner and outer border points of lanes at u meters from the start of their span.
+        """
+
+        self.num_evaluations += 1
+        points = []
+        for lane in lanes:
+            s_pos = lane.length - u if (lane.reverse) else u
+            points.append(lane.calc_border("inner", s_pos, compute_curvature = False)[0])
+            points.append(lane.calc_border("outer", s_pos, compute_curvature = False)[0])
+
+        return np.array(points, dtype = np.float64)
+
+    def _subdivide(
+        self,
+        lanes: list[ParametricLane],
+        start: float,
+        end: float
+    ) -> list[float]:
+        """
+        Sample positions of one smooth piece [start, end[ of a span.
+        """
+
+        positions = []
+        middle = (start + end) / 2
+        stack = [(start, end, self._points(lanes, start), self._points(lanes, end), self._points(lanes, middle))]
+
+        while stack:
+            start, end, start_points, end_points, middle_points = stack.pop()
+            middle = (start + end) / 2
+            quarter, three_quarter = (start + middle) / 2, (middle + end) / 2
+            quarter_points = self._points(lanes, quarter)
+            three_quarter_points = self._points(lanes, three_quarter)
+            deviation = _chordDeviation(
+                start_points, end_points, np.stack((quarter_points, middle_points, three_quarter_points))
+            )
+
+            if (deviation > self.chord_tolerance) and (end - start >= 2 * self.min_delta_s):
+                # Left half last, so it is popped first and positions stay sorted
+                stack.append((middle, end, middle_points, end_points, three_quarter_points))
+                stack.append((start, middle, start_points, middle_points, quarter_points))
+            else:
+                positions.append(start)
+
+        return positions
+
+    def _spanPositions(
+        self,
+        lanes: list[ParametricLane],
+        start: float,
+        length: float
+    ) -> np.ndarray:
+
+        if (length <= 0):
+            return np.linspace(0, length, MIN_LANE_VERTICES)
+
+        breakpoints = {0.0, length}
+        for lane in lanes:
+            for border in (lane.border_group.inner_border, lane.border_group.outer_border):
+                breakpoints.update(
+                    s_pos - start for s_pos in _chainBreakpoints(border)
+                    if (BREAKPOINT_EPS < s_pos - start < length - BREAKPOINT_EPS)
+                )
+        breakpoints = sorted(breakpoints)
+
+        positions = []
+        for piece_start, piece_end in zip(breakpoints[ : -1], breakpoints[1 : ]):
+            positions.extend(self._subdivide(lanes, piece_start, piece_end))
+        positions.append(length)
+
+        # A straight lane is its two ends, add points in between as dense sampling does
+        while (len(positions) < MIN_LANE_VERTICES):
+            gaps = np.diff(positions)
+            widest = int(np.argmax(gaps))
+            positions.insert(widest + 1, positions[widest] + gaps[widest] / 2)
+
+        return np.array(positions, dtype = np.float64)
+
+    def lanePositions(self, lane: ParametricLane) -> np.ndarray:
+        """
+        Sample positions of a lane, in its own s, increasing from 0 to its length.
+        """
+
+        key = self._key(lane)
+        positions = self._positions.get(key)
+        if (positions is None):
+            start, length = _laneSpan(lane)
+            positions = self._spanPositions(self._lanes.get(key, [lane]), start, length)
+            self._positions[key] = positions
+
+        self.num_positions += len(positions)
+
+        return (lane.length - positions[ : : -1]) if (lane.reverse) else positions
+
+    def calcVertices(
+        self,
+        lane: ParametricLane,
+        transformer = None
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Drop-in for ParametricLane.calc_vertices: left (inner) and right (outer) vertices.
+        """
+
+        if (lane.length < 0):
+            return np.array([]), np.array([])
+
+        vertices = []
+        for border in ("inner", "outer"):
+            points = np.array([
+                lane.calc_border(border, s_pos, compute_curvature = False)[0]
+                for s_pos in self.lanePositions(lane)
+            ], dtype = np.float64)
+            if (transformer is not None):
+                points = np.column_stack(transformer.transform(points[:, 0], points[:, 1]))
+            vertices.append(points)
+
+        return vertices[0], vertices[1]
+
+
+def checkCrdesignerInternals(road_network):
+    """
+    Fail early, with the installed crdesigner version, if the private crdesigner
+    attributes analytic sampling relies on are gone or changed shape, instead of
+    an AttributeError or silently wrong vertices halfway through a conversion.
+
+    Params
+    ------
+        road_network: crdesigner Network, after load_opendrive.
+    """
+
+    missing = []
+    if (not hasattr(road_network, "_planes")):
+        missing.append("Network._planes")
+    if (not hasattr(PlanView(), "_geo_lengths")):
+        missing.append("PlanView._geo_lengths")
+    border = Border()
+    missing.extend(f"Border.{name}" for name in _BORDER_ATTRIBUTES if not hasattr(border, name))
+    calc_vertices = getattr(ParametricLane, "calc_vertices", None)
+    if (calc_vertices is None) or (list(inspect.signature(calc_vertices).parameters) != _CALC_VERTICES_PARAMS):
+        missing.append(f"ParametricLane.calc_vertices({', '.join(_CALC_VERTICES_PARAMS)})")
+
+    if (missing):
+        try:
+            installed = version("commonroad-scenario-designer")
+        except PackageNotFoundError:
+            installed = "unknown"
+        raise RuntimeError(
+            f"Analytic sampling does not support the installed crdesigner {installed} "
+            f"(written against {CRDESIGNER_TESTED_VERSION}), missing or changed: {', '.join(missing)}. "
+            f"Use sampling = \"dense\"."
+        )
+
+
+@contextmanager
+def analyticVertexSampling(
+    road_network,
+    chord_tolerance: float,
+    min_delta_s: float
+):
+    """
+    Swap ParametricLane.calc_vertices for an AnalyticVertexSampler over road_network
+    while the block runs, e.g. around Network.export_commonroad_scenario.
+
+    The swap is on the class, so process-wide: do not use it from several threads at
+    once, nor convert in another thread while the block runs, as every ParametricLane
+    would go through this sampler. Process pools (as in utils.batch) are fine.
+    Raises RuntimeError through checkCrdesignerInternals on an unsupported crdesigner.
+
+    Params
+    ------
+        road_network: crdesigner Network, after load_opendrive.
+        chord_tolerance, min_delta_s: see AnalyticVertexSampler.
+
+    Returns
+    -------
+        sampler: AnalyticVertexSampler, its counters are filled once the block exits.
+    """
+
+    checkCrdesignerInternals(road_network)
+    sampler = AnalyticVertexSampler(road_network._planes, chord_tolerance, min_delta_s)
+    original_calc_vertices = ParametricLane.calc_vertices
+
+    def calc_vertices(lane, error_tolerance = None, min_delta_s = None, transformer = None):
+        return sampler.calcVertices(lane, transformer)
+
+    ParametricLane.calc_vertices = calc_vertices
+    try:
+        yield sampler
+    finally:
+        ParametricLane.calc_vertices = original_calc_vertices
@@ -1,12 +1,46 @@
 #! /usr/bin/env python3
 
 import math
+import heapq
+import bisect
 import itertools
-from pprint import pprint
+import numpy as np
 from lxml import etree
-from .conversion import DEFAULT_GEOSTRING
-from .geometry import PointCoords, dist_2nodes, calAngleTriplePoints
-from pyproj import Transformer
+from .georef import DEFAULT_GEOSTRING
+from .geometry import (
+    PointCoords, 
+    dist_2nodes, 
+    calAngleTriplePoints,
+    coords2XYArray,
+    coords2EquirectXYArray,
+    dist2NodesArray,
+    calAngleTriplePointsArray,
+    coords2LocalXYArray,
+    distPointsToSegmentArray
+)
+from .projection import getTransformer
+from .node_table import NodeTable
+
+# Downsampling params
+STRAIGHT_ANGLE_THRSH = 179.9            # Extremely strict angle threshold (trust me, 179 wasn't enough)
+MIN_SEGMENT_DIST = 3.0                  # Minimum segment length accepted
+
+ARC_BOUND_SLACK = 1e-6                  # Meters, absorbs float error of the cumulative arc length
+
+# Simplification modes:
+# - angle: greedy local filter on turn angle and segment length (original behavior)
+# - douglas_peucker: Ramer-Douglas-Peucker, bounded by max_error
+# - visvalingam: Visvalingam-Whyatt, smallest triangles first, bounded by max_error
+SIMPLIFY_MODES = ("angle", "douglas_peucker", "visvalingam")
+DEFAULT_MAX_ERROR = 0.05                # Meters, max deviation of a dropped point from the simplified way
+VW_NUMPY_SPAN = 64                      # Visvalingam spans longer than this are checked with NumPy
+LOCAL_XY_TAGS = ("local_x", "local_y")  # Projected coordinate tags written when latlon_output is False
+
+# Frames the angle mode measures turn angles in:
+# - projected: geostring, through pyproj (simplifyWayNodes behavior)
+# - equirectangular: per point x = lon * R * cos(lat), y = lat * R (the serial demo_evan.py behavior)
+ANGLE_FRAMES = ("projected", "equirectangular")
+BATCH_ANGLE_FRAME = "equirectangular"   # Keeps the batch output identical to the serial demo's
 
 
 def simplifyWayNodes(
@@ -70,11 +104,579 @@ def simplifyWayNodes(
     return simplified_points
 
 
+def _simplifyKeptIndices(
+    coords: np.ndarray,
+    xy: np.ndarray,
+    straight_angle_threshold: float,
+    min_segment_dist: float
+):
+    """
+    Array engine behind simplifyWayNodesArray, same greedy rule as simplifyWayNodes.
+
+    Turn angles only depend on the original neighbours, so they are all computed
+    in one go. The distance test depends on the last kept node, so it stays a walk,
+    but the great-circle distance between 2 vertices can never exceed the arc length
+    between them, which lets the walk bisect past every candidate that is too close
+    and only run the exact (scalar, reference) distance check on the rest.
+
+    Params
+    ------
+        coords: np.ndarray, (n, 2) float64 array of (lat, lon) rows.
+        xy: np.ndarray, (n, 2) float64 array of projected (x, y) rows.
+        straight_angle_threshold: float, angle threshold, in degrees.
+        min_segment_dist: float, minimum distance between points, in meters.
+
+    Returns
+    -------
+        kept: np.ndarray, sorted int64 indices of the kept points.
+    """
+
+    n = len(coords)
+
+    # No point in simplifying 2 nodes
+    if (n <= 2):
+        return np.arange(n, dtype = np.int64)
+
+    angles = calAngleTriplePointsArray(xy)
+    candidates = (np.flatnonzero(angles < straight_angle_threshold) + 1).tolist()
+
+    # Cumulative arc length, a lower bound is all we need from it
+    arc = np.concatenate((
+        [0.0],
+        np.cumsum(dist2NodesArray(coords[:-1], coords[1:]))
+    )).tolist()
+    candidate_arc = [arc[i] for i in candidates]
+    points = coords.tolist()
+
+    # Keep first node
+    kept = [0]
+    last_kept = 0
+    pos = 0
+
+    while (pos < len(candidates)):
+
+        # Skip candidates that are provably closer than min_segment_dist
+        pos = max(
+            pos, 
+            bisect.bisect_left(
+                candidate_arc, 
+                arc[last_kept] + min_segment_dist - ARC_BOUND_SLACK
+            )
+        )
+        if (pos >= len(candidates)):
+            break
+
+        i = candidates[pos]
+        if (dist_2nodes(points[last_kept], points[i]) >= min_segment_dist):
+            kept.append(i)
+            last_kept = i
+        pos += 1
+
+    # Keep last node
+    kept.append(n - 1)
+
+    return np.asarray(kept, dtype = np.int64)
+
+
+def _douglasPeuckerKeptIndices(
+    xy: np.ndarray,
+    max_error: float
+):
+    """
+    Ramer-Douglas-Peucker on a projected polyline, iterative and vectorized per split.
+    Every dropped point ends up within max_error of the simplified segment that replaces it.
+    O(n log n) when splits are balanced, which is the usual case for road boundaries.
+
+    Params
+    ------
+        xy: np.ndarray, (n, 2) float64 array of metric (x, y) rows.
+        max_error: float, maximum deviation, in meters.
+
+    Returns
+    -------
+        kept: np.ndarray, sorted int64 indices of the kept points.
+    """
+
+    n = len(xy)
+    if (n <= 2):
+        return np.arange(n, dtype = np.int64)
+
+    keep = np.zeros(n, dtype = bool)
+    keep[0] = keep[-1] = True
+
+    stack = [(0, n - 1)]
+    while (stack):
+        first, last = stack.pop()
+        if (last - first < 2):
+            continue
+
+        dists = distPointsToSegmentArray(xy[first + 1 : last], xy[first], xy[last])
+        farthest = int(np.argmax(dists))
+
+        if (dists[farthest] > max_error):
+            split = first + 1 + farthest
+            keep[split] = True
+            stack.append((first, split))
+            stack.append((split, last))
+
+    return np.flatnonzero(keep).astype(np.int64)
+
+
+def _spanExceedsError(
+    xy: np.ndarray,
+    points: list[list[float]],
+    p: int,
+    q: int,
+    max_error: float
+) -> bool:
+    """
+    Whether any original point strictly between p and q is farther than max_error
+    from the segment [p, q]. Short spans are checked in plain Python with early exit,
+    a NumPy call costs more than the whole loop there.
+    """
+
+    if (q - p > VW_NUMPY_SPAN):
+        return bool(distPointsToSegmentArray(xy[p + 1 : q], xy[p], xy[q]).max() > max_error)
+
+    (ax, ay), (bx, by) = points[p], points[q]
+    abx, aby = bx - ax, by - ay
+    seg_len_sq = abx * abx + aby * aby
+    max_error_sq = max_error * max_error
+
+    for px, py in points[p + 1 : q]:
+        apx, apy = px - ax, py - ay
+        t = 0.0 if (seg_len_sq == 0) else min(max((apx * abx + apy * aby) / seg_len_sq, 0.0), 1.0)
+        dx, dy = apx - t * abx, apy - t * aby
+        if (dx * dx + dy * dy > max_error_sq):
+            return True
+
+    return False
+
+
+def _visvalingamKeptIndices(
+    xy: np.ndarray,
+    max_error: float
+):
+    """
+    Visvalingam-Whyatt on a projected polyline, with a heap so it runs in O(n log n).
+    Points are removed smallest effective triangle first, but a removal is refused when
+    any original point of the span it would merge deviates more than max_error from the
+    new segment, which makes the result error-bounded like Douglas-Peucker.
+
+    Params
+    ------
+        xy: np.ndarray, (n, 2) float64 array of metric (x, y) rows.
+        max_error: float, maximum deviation, in meters.
+
+    Returns
+    -------
+        kept: np.ndarray, sorted int64 indices of the kept points.
+    """
+
+    n = len(xy)
+    if (n <= 2):
+        return np.arange(n, dtype = np.int64)
+
+    prev_idx = list(range(-1, n - 1))
+    next_idx = list(range(1, n + 1))
+    points = xy.tolist()
+
+    def _area(i):
+        (ax, ay), (bx, by), (cx, cy) = points[prev_idx[i]], points[i], points[next_idx[i]]
+        return abs((ax - bx) * (cy - by) - (ay - by) * (cx - bx)) / 2
+
+    areas = [math.inf] * n
+    for i in range(1, n - 1):
+        areas[i] = _area(i)
+    heap = [(areas[i], i) for i in range(1, n - 1)]
+    heapq.heapify(heap)
+
+    removed = [False] * n
+    pinned = [False] * n
+
+    while (heap):
+        area, i = heapq.heappop(heap)
+        if (removed[i]) or (pinned[i]) or (area != areas[i]):
+            continue
+
+        p, q = prev_idx[i], next_idx[i]
+        if (_spanExceedsError(xy, points, p, q, max_error)):
+            pinned[i] = True
+            continue
+
+        removed[i] = True
+        next_idx[p] = q
+        prev_idx[q] = p
+
+        for j in (p, q):
+            if (0 < j < n - 1) and not (pinned[j]):
+                areas[j] = _area(j)
+                heapq.heappush(heap, (areas[j], j))
+
+    return np.flatnonzero(~np.asarray(removed)).astype(np.int64)
+
+
+def simplifyKeptIndices(
+    coords: np.ndarray,
+    xy: np.ndarray,
+    mode: str = "angle",
+    straight_angle_threshold: float = 175.0,
+    min_segment_dist: float = 3.0,
+    max_error: float = DEFAULT_MAX_ERROR
+):
+    """
+    Dispatch to the simplification kernel of the given mode.
+
+    Params
+    ------
+        coords: np.ndarray, (n, 2) float64 array of (lat, lon) rows.
+        xy: np.ndarray, (n, 2) float64 array of projected (x, y) rows, metric for the
+            error-bounded modes.
+        mode: str, one of SIMPLIFY_MODES. Default "angle".
+        straight_angle_threshold: float, angle threshold, in degrees, angle mode only.
+        min_segment_dist: float, minimum distance between points, in meters, angle mode only.
+        max_error: float, maximum deviation, in meters, error-bounded modes only.
+
+    Returns
+    -------
+        kept: np.ndarray, sorted int64 indices of the kept points.
+    """
+
+    # No point in simplifying 2 nodes, whatever the mode (xy may not even be projected)
+    if (len(coords) <= 2) and (mode in SIMPLIFY_MODES):
+        return np.arange(len(coords), dtype = np.int64)
+
+    if (mode == "angle"):
+        return _simplifyKeptIndices(coords, xy, straight_angle_threshold, min_segment_dist)
+    if (mode == "douglas_peucker"):
+        return _douglasPeuckerKeptIndices(xy, max_error)
+    if (mode == "visvalingam"):
+        return _visvalingamKeptIndices(xy, max_error)
+
+    raise ValueError(f"Unknown simplification mode {mode}, expected one of {SIMPLIFY_MODES}")
+
+
+def metricXYArray(
+    coords: np.ndarray,
+    transformer = None,
+    xy: np.ndarray = None
+):
+    """
+    Metric frame for the error-bounded modes: the projected xy (or coords projected
+    with transformer) when the target CRS is projected, a local equirectangular
+    frame otherwise (e.g. the default EPSG:4326, whose units are degrees).
+    """
+
+    if (transformer is None) or (transformer.target_crs.is_geographic):
+        return coords2LocalXYArray(coords)
+    if (xy is None):
+        return coords2XYArray(coords, transformer)
+
+    return xy
+
+
+def angleXYArray(
+    coords: np.ndarray,
+    xy: np.ndarray,
+    angle_frame: str = "projected"
+):
+    """
+    Frame the angle mode measures turn angles in, see ANGLE_FRAMES: xy, already
+    projected to geostring, or coords in the per-point equirectangular frame.
+    """
+
+    if (angle_frame == "projected"):
+        return xy
+    if (angle_frame == "equirectangular"):
+        return coords2EquirectXYArray(coords)
+
+    raise ValueError(f"Unknown angle frame {angle_frame}, expected one of {ANGLE_FRAMES}")
+
+
+def simplifyWayNodesArray(
+    coords: np.ndarray,
+    straight_angle_threshold: float = 175.0,
+    min_segment_dist: float = 3.0,
+    transformer = None,
+    xy: np.ndarray = None,
+    return_indices: bool = False,
+    mode: str = "angle",
+    max_error: float = DEFAULT_MAX_ERROR
+):
+    """
+    Vectorized counterpart of simplifyWayNodes, keeping exactly the same vertices in
+    the default angle mode, plus the error-bounded modes (see SIMPLIFY_MODES).
+    The way is projected once with a single batched transformer call, unless
+    the caller already projected it (e.g. the whole map at once) and passes xy.
+
+    Params
+    ------
+        coords: np.ndarray, (n, 2) float64 array of (lat, lon) rows.
+        straight_angle_threshold: float, angle threshold, in degrees. Default 175.0.
+        min_segment_dist: float, minimum distance between points, in meters. Default 3.0.
+        transformer: pyproj.Transformer, used to project coords when xy is not given.
+        xy: np.ndarray, (n, 2) float64 array of already projected (x, y) rows. Optional.
+            Must be metric (see metricXYArray) for the error-bounded modes.
+        return_indices: bool, also return the indices of the kept rows. Default False.
+        mode: str, one of SIMPLIFY_MODES. Default "angle".
+        max_error: float, maximum deviation of a dropped point, in meters, error-bounded
+            modes only. Default DEFAULT_MAX_ERROR.
+
+    Returns
+    -------
+        simplified_coords: np.ndarray, (k, 2) float64 array of the kept (lat, lon) rows.
+        kept: np.ndarray, (k,) int64 indices into coords, only if return_indices is True.
+            Use them to carry node IDs, elevation or any other per-node attribute along.
+    """
+
+    coords = np.asarray(coords, dtype = np.float64).reshape(-1, 2)
+
+    if (xy is None) and (len(coords) > 2):
+        if (mode == "angle"):
+            xy = coords2XYArray(coords, transformer)
+        else:
+            xy = metricXYArray(coords, transformer)
+
+    kept = simplifyKeptIndices(
+        coords,
+        xy,
+        mode = mode,
+        straight_angle_threshold = straight_angle_threshold,
+        min_segment_dist = min_segment_dist,
+        max_error = max_error
+    )
+
+    if (return_indices):
+        return coords[kept], kept
+
+    return coords[kept]
+
+
+class _WayDownsampler:
+    """
+    Shared core of the XML and object-model downsampling paths. Holds the columnar
+    node table, projected once for the whole map, simplifies ways given as node rows
+    and creates the new <node> elements their <nd> refs point to.
+    """
+
+    def __init__(
+        self,
+        node_table: NodeTable,
+        straight_angle_threshold: float,
+        min_segment_dist: float,
+        geostring: str = DEFAULT_GEOSTRING,
+        share_nodes: bool = False,
+        latlon_output: bool = True,
+        mode: str = "angle",
+        max_error: float = DEFAULT_MAX_ERROR,
+        angle_frame: str = "projected"
+    ):
+        self.node_table = node_table
+        self.straight_angle_threshold = straight_angle_threshold
+        self.min_segment_dist = min_segment_dist
+        self.share_nodes = share_nodes
+        self.latlon_output = latlon_output
+        self.mode = mode
+        self.max_error = max_error
+
+        transformer = getTransformer(
+            DEFAULT_GEOSTRING,
+            geostring,
+            always_xy = True
+        )
+        self.node_xy = coords2XYArray(node_table.coords, transformer)
+        if (mode == "angle"):
+            self.simplify_xy = angleXYArray(node_table.coords, self.node_xy, angle_frame)
+        else:
+            self.simplify_xy = metricXYArray(node_table.coords, transformer, self.node_xy)
+
+        self.new_node_id_gen = itertools.count(1_000_000)
+        self.new_node_ids = {}
+        self.new_nodes = []
+
+    def wayRows(self, node_refs) -> np.ndarray:
+        """
+        Node table rows of a way's node refs, refs to unknown nodes are dropped.
+        """
+
+        return self.node_table.rows(node_refs)
+
+    def simplifyWay(
+        self,
+        way_id: str,
+        rows: np.ndarray
+    ) -> list[etree.Element]:
+        """
+        Simplify one way and create the nodes it keeps.
+
+        Returns
+        -------
+            new_nds: list[lxml.etree.Element] | None, the way's new <nd> elements,
+                None if the way is too simple to be downsampled and must be kept as is.
+        """
+
+        if (len(rows) < 2):
+            print(f"Skipping way {way_id} cuz not enough points.")
+
+        # Nodes without lat/lon (e.g. an already downsampled, local_x/local_y only file)
+        if np.isnan(self.node_table.coords[rows]).any():
+            raise ValueError(
+                f"Way {way_id} has nodes without lat/lon, downsampling needs the converter's "
+                "lat/lon output, not a local_x/local_y only file"
+            )
+
+        simplified, kept = simplifyWayNodesArray(
+            coords = self.node_table.coords[rows],
+            straight_angle_threshold = self.straight_angle_threshold,
+            min_segment_dist = self.min_segment_dist,
+            xy = self.simplify_xy[rows],
+            return_indices = True,
+            mode = self.mode,
+            max_error = self.max_error
+        )
+        
+        if (len(simplified) < 2):
+            print(f"Skipping way {way_id} cuz its too simple after filtering.")
+            return None
+        
+        # New <node> & <nd> refs, per-node attributes carried by row index
+        new_nds = []
+        kept_rows = rows[kept]
+        kept_xy = self.node_xy[kept_rows].tolist()
+        kept_ele = self.node_table.ele[kept_rows].tolist()
+        for (lat, lon), row, (local_x, local_y), ele in zip(simplified.tolist(), kept_rows.tolist(), kept_xy, kept_ele):
+            node_id = self.new_node_ids.get(row) if (self.share_nodes) else None
+
+            if (node_id is None):
+                node_id = str(next(self.new_node_id_gen))
+                if (self.share_nodes):
+                    self.new_node_ids[row] = node_id
+
+                if (self.latlon_output):
+                    node = etree.Element("node", id=node_id, visible="true", version="1", lat=str(lat), lon=str(lon))
+                else:
+                    node = etree.Element("node", id=node_id, visible="true", version="1", lat="", lon="")
+
+                # Fresh local_x/local_y are written below, source ones would be duplicates
+                for k, v in self.node_table.rowTags(row):
+                    if (self.latlon_output) or (k not in LOCAL_XY_TAGS):
+                        node.append(etree.Element("tag", k=k, v=v))
+
+                if not (self.latlon_output):
+                    tag_x = etree.Element("tag", k="local_x", v=f"{local_x:.4f}")
+                    tag_y = etree.Element("tag", k="local_y", v=f"{local_y:.4f}")
+                    node.append(tag_x)
+                    node.append(tag_y)
+
+                tag_ele = etree.Element("tag", k="ele", v=f"{ele:.4f}")
+                node.append(tag_ele)
+
+                self.new_nodes.append(node)
+
+            nd = etree.Element("nd", ref = node_id)
+            new_nds.append(nd)
+
+        return new_nds
+
+    def updateNodeIdRemap(self, node_id_remap: dict[str, str]):
+        """
+        Fill node_id_remap with source node ID -> new node ID, shared nodes only.
+        """
+
+        node_id_remap.update(
+            (self.node_table.idString(row), node_id)
+            for row, node_id in self.new_node_ids.items()
+        )
+
+
+def iterDownsampledOSM(
+    osm_root: etree.Element,
+    straight_angle_threshold: float,
+    min_segment_dist: float,
+    geostring: str = DEFAULT_GEOSTRING,
+    share_nodes: bool = False,
+    node_id_remap: dict[str, str] = None,
+    latlon_output: bool = True,
+    generator: str = None,
+    mode: str = "angle",
+    max_error: float = DEFAULT_MAX_ERROR,
+    angle_frame: str = "projected"
+):
+    """
+    Generator form of postprocessDownsamplingOSM, yielding the downsampled <osm> children
+    in output order (ways and relations as they come, then the new nodes) instead of
+    rebuilding osm_root, so they can go straight into writer.streamOSM.
+    Ways are still simplified in place, the old <node> elements are left untouched.
+
+    Params
+    ------
+        Same as postprocessDownsamplingOSM.
+
+    Yields
+    ------
+        element: lxml.etree.Element, next child of the downsampled <osm> root.
+    """
+
+    if (generator is not None):
+        osm_root.set("generator", generator)
+
+    downsampler = _WayDownsampler(
+        NodeTable.fromXML(osm_root),
+        straight_angle_threshold,
+        min_segment_dist,
+        geostring = geostring,
+        share_nodes = share_nodes,
+        latlon_output = latlon_output,
+        mode = mode,
+        max_error = max_error,
+        angle_frame = angle_frame
+    )
+
+    for child in list(osm_root):
+
+        # Old nodes are dropped, relations and others pass through as they are
+        if (child.tag == "node"):
+            continue
+        if (child.tag != "way"):
+            yield child
+            continue
+
+        way = child
+
+        rows = downsampler.wayRows(nd.get("ref") for nd in way.findall("nd"))
+        new_nds = downsampler.simplifyWay(way.get("id"), rows)
+        if (new_nds is None):
+            yield way
+            continue
+
+        # Replace old <nd> in one go, removing them one by one is quadratic
+        way[:] = [
+            child 
+            for child in way 
+            if child.tag != "nd"
+        ] + new_nds
+
+        yield way
+
+    if (node_id_remap is not None):
+        downsampler.updateNodeIdRemap(node_id_remap)
+
+    # New nodes go last, same as the in-place output
+    yield from downsampler.new_nodes
+
+
 def postprocessDownsamplingOSM(
     osm_root: etree.Element,
     straight_angle_threshold: float,
     min_segment_dist: float,
-    geostring: str = DEFAULT_GEOSTRING
+    geostring: str = DEFAULT_GEOSTRING,
+    share_nodes: bool = False,
+    node_id_remap: dict[str, str] = None,
+    latlon_output: bool = True,
+    generator: str = None,
+    mode: str = "angle",
+    max_error: float = DEFAULT_MAX_ERROR,
+    angle_frame: str = "projected"
 ):
     """
     Postprocess OSM data by downsampling the nodes of the ways.
@@ -84,114 +686,192 @@ def postprocessDownsamplingOSM(
         osm_root: lxml.etree.Element, root element of the OSM XML file.
         straight_angle_threshold: float, angle threshold, in degrees.
         min_segment_dist: float, minimum distance between points, in meters.
+        geostring: str, CRS the angles are measured in. Default DEFAULT_GEOSTRING.
+        share_nodes: bool, if True, a source node surviving in several ways is written
+            once and referenced by all of them, keeping lanelet adjacency intact.
+            If False, every way gets its own copy of its nodes. Default False.
+            On crdesigner output, ways only share their end nodes where they meet end to
+            end, mostly in junctions (e.g. Town02: 811 -> 578 nodes); side by side lanelets
+            share whole ways, so maps without junctions come out the same. Nearly
+            coincident seam nodes that are not shared are merged by welding.weldNodes.
+        node_id_remap: dict[str, str], optional, filled with source node ID -> new node ID
+            for every surviving node. Only filled when share_nodes is True.
+        latlon_output: bool, if True, nodes keep their lat/lon. If False, lat/lon are left
+            empty and local_x/local_y tags, projected to geostring, are written instead.
+            Default True.
+        generator: str, optional, value to set as the <osm> generator attribute.
+        mode: str, simplification mode, one of SIMPLIFY_MODES. "angle" uses
+            straight_angle_threshold and min_segment_dist, the error-bounded
+            "douglas_peucker" and "visvalingam" guarantee that every dropped point stays
+            within max_error meters of the simplified way. Default "angle".
+        max_error: float, maximum deviation, in meters, error-bounded modes only.
+        angle_frame: str, frame the angle mode measures turn angles in, one of ANGLE_FRAMES.
+            "projected" uses geostring, "equirectangular" the serial demo's per-point frame
+            (BATCH_ANGLE_FRAME). Default "projected".
 
     Returns
     -------
         osm_root: lxml.etree.Element, root element of the OSM XML file after downsampling.
     """
 
-    transformer = Transformer.from_crs(
-        DEFAULT_GEOSTRING,
-        geostring,
-        always_xy = True
+    # Replace old <node> elements with the new resampled nodes
+    osm_root[:] = list(iterDownsampledOSM(
+        osm_root,
+        straight_angle_threshold,
+        min_segment_dist,
+        geostring = geostring,
+        share_nodes = share_nodes,
+        node_id_remap = node_id_remap,
+        latlon_output = latlon_output,
+        generator = generator,
+        mode = mode,
+        max_error = max_error,
+        angle_frame = angle_frame
+    ))
+    print(f"[debug] final osm_root num nodes: {len(osm_root)}")
+
+    return osm_root
+
+
+def _downsampledWayElement(
+    way,
+    new_nds: list[etree.Element]
+) -> etree.Element:
+    """
+    <way> element of a crdesigner Way with its nodes replaced by new_nds, laid out
+    like the XML path leaves it: attributes, tags, then <nd> refs.
+    """
+
+    way_elem = etree.Element("way")
+    way_elem.set("id", way.id_)
+    way_elem.set("action", "modify")
+    way_elem.set("visible", "true")
+    way_elem.set("version", "1")
+    for tag_key, tag_value in way.tag_dict.items():
+        way_elem.append(etree.Element("tag", k=tag_key, v=tag_value))
+    way_elem.extend(new_nds)
+
+    return way_elem
+
+
+def iterDownsampledOSMLanelet(
+    osm,
+    straight_angle_threshold: float,
+    min_segment_dist: float,
+    geostring: str = DEFAULT_GEOSTRING,
+    share_nodes: bool = False,
+    node_id_remap: dict[str, str] = None,
+    latlon_output: bool = True,
+    mode: str = "angle",
+    max_error: float = DEFAULT_MAX_ERROR,
+    angle_frame: str = "projected"
+):
+    """
+    Same as iterDownsampledOSM, but reading the converter's in-memory OSM model
+    (CR2LaneletConverter.osm) instead of its serialized tree. The source nodes and ways
+    are never turned into XML: ways are simplified from the Node objects and only the
+    output elements are created. The model itself is left untouched.
+
+    Params
+    ------
+        osm: crdesigner OSMLanelet, e.g. from conversion.convertToOSMLanelet.
+        Others: same as postprocessDownsamplingOSM.
+
+    Yields
+    ------
+        element: lxml.etree.Element, next child of the downsampled <osm> root, in the
+            same order and with the same content as iterDownsampledOSM would yield them.
+    """
+
+    downsampler = _WayDownsampler(
+        NodeTable.fromOSMLanelet(osm),
+        straight_angle_threshold,
+        min_segment_dist,
+        geostring = geostring,
+        share_nodes = share_nodes,
+        latlon_output = latlon_output,
+        mode = mode,
+        max_error = max_error,
+        angle_frame = angle_frame
     )
 
-    # Map node ID to (lat, lon)
-    nodes = {
-        node.get("id"): (
-            float(node.get("lat")), 
-            float(node.get("lon")),
-            float(next(
-                (
-                    tag.get("v") 
-                    for tag in node.findall("tag") 
-                    if tag.get("k") == "ele"
-                ), 
-                0
-            ))
-        ) 
-        for node in osm_root.findall("node")
-    }
-
-    ways = osm_root.findall("way")
-    new_node_id_gen = itertools.count(1_000_000)
-    used_node_ids = set()
-    new_nodes = []
-
-    for way in ways:
-
-        nd_refs = [
-            nd.get("ref") 
-            for nd in way.findall("nd")
-        ]
-        coords = [
-            nodes[ref][:2]
-            for ref in nd_refs 
-            if ref in nodes
-        ]
-
-        if (len(coords) < 2):
-            print(f"Skipping way {way.get('id')} cuz not enough points.")
-
-        simplified = simplifyWayNodes(
-            points = coords,
-            straight_angle_threshold = straight_angle_threshold,
-            min_segment_dist = min_segment_dist,
-            transformer = transformer
-        )
-        
-        if (len(simplified) < 2):
-            print(f"Skipping way {way.get('id')} cuz its too simple after filtering.")
-            continue
-        
-        # Remove old <nd>
-        for nd in way.findall("nd"):
-            way.remove(nd)
-
-        # New <node> & <nd> refs
-
-        for lat, lon in simplified:
-            print(f"Using transformer: {transformer}")
-            print(f"Before conversion: lon = {lon}, lat = {lat}")
-            local_x, local_y = transformer.transform(lon, lat)
-            print(f"After conversion: local_x = {local_x}, local_y = {local_y}")
-
-            ele = next(
-                (
-                    nodes[ref][2] 
-                    for ref in nd_refs 
-                    if ((nodes[ref][0] == lat) and (nodes[ref][1] == lon))
-                ),
-                0.0
-            )
+    for way in osm.ways.values():
+        rows = downsampler.wayRows(way.nodes)
+        new_nds = downsampler.simplifyWay(way.id_, rows)
+        if (new_nds is None):
+            yield way.serialize_to_xml()
+        else:
+            yield _downsampledWayElement(way, new_nds)
 
-            node_id = str(next(new_node_id_gen))
+    # Relations pass through, in OSMLanelet.serialize_to_xml order
+    for relation in itertools.chain(
+        osm.way_relations.values(),
+        osm.multipolygons.values(),
+        osm.regulatory_elements.values()
+    ):
+        yield relation.serialize_to_xml()
 
-            if node_id not in used_node_ids:
-                used_node_ids.add(node_id)
+    if (node_id_remap is not None):
+        downsampler.updateNodeIdRemap(node_id_remap)
 
-                node = etree.Element("node", id=node_id, visible="true", version="1", lat=str(lat), lon=str(lon))
+    # New nodes go last, same as the XML path
+    yield from downsampler.new_nodes
 
-                # tag_x = etree.Element("tag", k="local_x", v=f"{local_x:.4f}")
-                # tag_y = etree.Element("tag", k="local_y", v=f"{local_y:.4f}")
-                tag_ele = etree.Element("tag", k="ele", v=f"{ele:.4f}")
 
-                # node.append(tag_x)
-                # node.append(tag_y)
-                node.append(tag_ele)
+def osmLaneletRoot(generator: str = None) -> etree.Element:
+    """
+    Empty <osm> root with the attributes OSMLanelet.serialize_to_xml gives it,
+    generator replaced if given. For the output of iterDownsampledOSMLanelet.
+    """
 
-                new_nodes.append(node)
+    osm_root = etree.Element("osm")
+    osm_root.set("version", "0.6")
+    osm_root.set("upload", "true")
+    osm_root.set("generator", generator if (generator is not None) else "commonroad-scenario-designer")
 
-            nd = etree.Element("nd", ref = node_id)
-            way.append(nd)
+    return osm_root
 
-    # Remove old <node> elements
-    for node in osm_root.findall("node"):
-        osm_root.remove(node)
 
-    # Add new resampled nodes
-    for node in new_nodes:
-        osm_root.append(node)
-    print(f"[debug] final osm_root num nodes: {len(osm_root)}")
+def postprocessDownsamplingOSMLanelet(
+    osm,
+    straight_angle_threshold: float,
+    min_segment_dist: float,
+    geostring: str = DEFAULT_GEOSTRING,
+    share_nodes: bool = False,
+    node_id_remap: dict[str, str] = None,
+    latlon_output: bool = True,
+    generator: str = None,
+    mode: str = "angle",
+    max_error: float = DEFAULT_MAX_ERROR,
+    angle_frame: str = "projected"
+):
+    """
+    Downsample the converter's in-memory OSM model and materialize the result as XML.
+    Produces the same tree as postprocessDownsamplingOSM(osm.serialize_to_xml(), ...)
+    without building and re-parsing the pre-downsampling tree.
+
+    Params
+    ------
+        osm: crdesigner OSMLanelet, e.g. from conversion.convertToOSMLanelet.
+        Others: same as postprocessDownsamplingOSM.
+
+    Returns
+    -------
+        osm_root: lxml.etree.Element, root element of the downsampled OSM XML.
+    """
 
-    return osm_root
\ No newline at end of file
+    osm_root = osmLaneletRoot(generator)
+    osm_root.extend(iterDownsampledOSMLanelet(
+        osm,
+        straight_angle_threshold,
+        min_segment_dist,
+        geostring = geostring,
+        share_nodes = share_nodes,
+        node_id_remap = node_id_remap,
+        latlon_output = latlon_output,
+        mode = mode,
+        max_error = max_error,
+        angle_frame = angle_frame
+    ))
+
+    return osm_root
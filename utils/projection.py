@@ -0,0 +1,95 @@
+#! /usr/bin/env python3
+
+import threading
+from pyproj import Transformer
+
+
+class TransformerRegistry:
+    """
+    Process-wide registry of reusable pyproj Transformers, keyed by
+    (source CRS, target CRS, always_xy).
+
+    pyproj Transformers must not be shared between threads, so every thread
+    gets its own instance per key. Hit/miss counters are shared by all threads.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(
+        self,
+        crs_from,
+        crs_to,
+        always_xy: bool = True
+    ) -> Transformer:
+        """
+        Return this thread's Transformer for (crs_from, crs_to, always_xy), building it on first use.
+
+        Params
+        ------
+            crs_from, crs_to: str | pyproj.CRS, anything Transformer.from_crs accepts.
+            always_xy: bool, lon/lat (x/y) axis order. Default True.
+
+        Returns
+        -------
+            transformer: pyproj.Transformer.
+        """
+
+        transformers = getattr(self._local, "transformers", None)
+        if (transformers is None):
+            transformers = self._local.transformers = {}
+
+        key = (crs_from, crs_to, always_xy)
+        transformer = transformers.get(key)
+
+        if (transformer is not None):
+            with self._lock:
+                self.hits += 1
+            return transformer
+
+        transformer = Transformer.from_crs(crs_from, crs_to, always_xy = always_xy)
+        transformers[key] = transformer
+        with self._lock:
+            self.misses += 1
+
+        return transformer
+
+    def stats(self) -> dict[str, int]:
+        """
+        Hit/miss counters, plus the number of transformers held by the calling thread.
+        """
+
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "thread_size": len(getattr(self._local, "transformers", {})),
+            }
+
+    def clear(self):
+        """
+        Drop the calling thread's transformers and reset the counters.
+        """
+
+        self._local.transformers = {}
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+
+TRANSFORMER_REGISTRY = TransformerRegistry()
+
+
+def getTransformer(
+    crs_from,
+    crs_to,
+    always_xy: bool = True
+) -> Transformer:
+    """
+    Shortcut to TRANSFORMER_REGISTRY.get.
+    """
+
+    return TRANSFORMER_REGISTRY.get(crs_from, crs_to, always_xy)
@@ -0,0 +1,477 @@
+#! /usr/bin/env python3
+
+import os
+import json
+import time
+import shutil
+import signal
+import argparse
+import tempfile
+import threading
+import multiprocessing
+import http.client
+from pathlib import Path
+from urllib.parse import urlencode, urlparse, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from concurrent.futures import ProcessPoolExecutor
+
+# Stdlib only at import time, clients never pay for the crdesigner import,
+# workers do it once, when the service starts
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_QUEUE_SIZE = 32                 # Jobs waiting for a worker before new ones are refused
+DEFAULT_CLIENT_TIMEOUT = 600.0          # Seconds, per request
+DEFAULT_BUSY_RETRIES = 20               # Refused (queue full) attempts before the client gives up
+
+# Query parameters accepted by /convert, with their types
+JOB_PARAMS = {
+    "angle": float,
+    "min_dist": float,
+    "mode": str,
+    "max_error": float,
+    "weld_epsilon": float,
+    "concatenate_lanelets": lambda value: value.lower() in ("1", "true", "yes"),
+    "sampling": str,
+    "chord_tolerance": float,
+    "max_nodes_per_km": float,
+    "max_nodes": int,
+    "fidelity_report": lambda value: value.lower() in ("1", "true", "yes"),
+}
+
+
+_WARMUP_BARRIER = None
+
+
+def _warmWorker(barrier):
+    """
+    Worker initializer: import the whole conversion chain and create the default
+    transformers once, so jobs start converting right away.
+    """
+
+    global _WARMUP_BARRIER
+    _WARMUP_BARRIER = barrier
+
+    from . import batch
+    from .georef import DEFAULT_GEOSTRING, PROJ_MET
+    from .projection import getTransformer
+
+    getTransformer(DEFAULT_GEOSTRING, PROJ_MET, always_xy = True)
+
+
+def _workerPid() -> int:
+    """
+    Warmup task, waits for one such task to run on every worker.
+    """
+
+    _WARMUP_BARRIER.wait()
+
+    return os.getpid()
+
+
+def _serviceJob(
+    xodr_bytes: bytes,
+    file_name: str,
+    params: dict,
+    cache_dir: str = None
+) -> dict:
+    """
+    Worker entry point, converts one XODR document in a scratch directory and
+    returns the produced files' contents with the timing record.
+    """
+
+    from . import batch
+    from .instrument import FileRecord
+
+    start_time = time.time()
+    job_dir = Path(tempfile.mkdtemp(prefix = "xodr_service_"))
+    try:
+        input_path = job_dir / file_name
+        input_path.write_bytes(xodr_bytes)
+
+        record = FileRecord(input_path.name, set_name = "service", worker_pid = os.getpid())
+        with record.activate():
+            times = batch.convertFile(
+                input_path,
+                job_dir,
+                straight_angle_threshold = params.get("angle", batch.STRAIGHT_ANGLE_THRSH),
+                min_segment_dist = params.get("min_dist", batch.MIN_SEGMENT_DIST),
+                concatenate_lanelets = params.get("concatenate_lanelets", False),
+                cache_dir = cache_dir,
+                mode = params.get("mode", "angle"),
+                max_error = params.get("max_error", batch.DEFAULT_MAX_ERROR),
+                weld_epsilon = params.get("weld_epsilon"),
+                sampling = params.get("sampling", "dense"),
+                chord_tolerance = params.get("chord_tolerance", batch.DEFAULT_CHORD_TOLERANCE),
+                max_nodes_per_km = params.get("max_nodes_per_km"),
+                max_nodes = params.get("max_nodes"),
+                fidelity_report = params.get("fidelity_report", False)
+            )
+        record.meta["converted"] = times is not None
+
+        result = {
+            "converted": times is not None,
+            "times": times,
+            "record": record.toDict(),
+            "worker_start_time": start_time,
+            "files": {},
+        }
+        if (times is not None):
+            for path in batch.outputPaths(input_path, job_dir).values():
+                if (path.exists()):
+                    result["files"][path.name] = path.read_bytes().decode()
+
+        return result
+
+    finally:
+        shutil.rmtree(job_dir, ignore_errors = True)
+
+
+class ConversionService:
+    """
+    Pool of pre-warmed conversion workers behind a bounded job queue. At most
+    workers + queue_size jobs are accepted at once, later ones are refused right
+    away (HTTP 503 with Retry-After) instead of piling up unbounded.
+    """
+
+    def __init__(
+        self,
+        workers: int = 1,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+        cache_dir: str = None
+    ):
+        """
+        Params
+        ------
+            workers: int, number of worker processes.
+            queue_size: int, jobs allowed to wait for a free worker. Default DEFAULT_QUEUE_SIZE.
+            cache_dir: str, optional, conversion cache shared by all workers.
+        """
+
+        self.workers = workers
+        self.queue_size = queue_size
+        self.cache_dir = cache_dir
+        self.slots = threading.BoundedSemaphore(workers + queue_size)
+        self.lock = threading.Lock()
+        self.counters = {"in_flight": 0, "completed": 0, "failed": 0, "refused": 0}
+        self.executor = None
+        self.worker_pids = []
+
+    def start(self) -> float:
+        """
+        Spawn the workers and wait until every one of them is warm.
+
+        Returns
+        -------
+            warmup_secs: float, time spent spawning and warming the workers.
+        """
+
+        start = time.perf_counter()
+        self.executor = ProcessPoolExecutor(
+            max_workers = self.workers,
+            initializer = _warmWorker,
+            initargs = (multiprocessing.Barrier(self.workers), )
+        )
+
+        # One task per worker, submitted at once so the pool spawns all of them now,
+        # the barrier keeps a warm worker from taking a second one
+        futures = [self.executor.submit(_workerPid) for _ in range(self.workers)]
+        self.worker_pids = sorted({future.result() for future in futures})
+
+        return time.perf_counter() - start
+
+    def stop(self):
+
+        if (self.executor is not None):
+            self.executor.shutdown(wait = True, cancel_futures = True)
+            self.executor = None
+
+    def status(self) -> dict:
+
+        with self.lock:
+            return {
+                "workers": self.workers,
+                "worker_pids": self.worker_pids,
+                "queue_size": self.queue_size,
+                **self.counters,
+            }
+
+    def _count(self, counter: str, delta: int = 1):
+
+        with self.lock:
+            self.counters[counter] += delta
+
+    def submit(
+        self,
+        xodr_bytes: bytes,
+        file_name: str,
+        params: dict
+    ) -> dict:
+        """
+        Run one job, blocking the calling thread until it is done.
+
+        Returns
+        -------
+            result: dict | None, _serviceJob result plus "queue_wait_secs" and
+                "service_secs", None if the queue is full.
+        """
+
+        if not (self.slots.acquire(blocking = False)):
+            self._count("refused")
+            return None
+
+        self._count("in_flight")
+        submit_time = time.time()
+        try:
+            result = self.executor.submit(_serviceJob, xodr_bytes, file_name, params, self.cache_dir).result()
+            result["queue_wait_secs"] = result.pop("worker_start_time") - submit_time
+            result["service_secs"] = time.time() - submit_time
+            self._count("completed" if (result["converted"]) else "failed")
+            return result
+        except Exception:
+            self._count("failed")
+            raise
+        finally:
+            self._count("in_flight", -1)
+            self.slots.release()
+
+
+class _ServiceHandler(BaseHTTPRequestHandler):
+    """
+    POST /convert?<JOB_PARAMS> with the XODR document as body and its file name in
+    the X-File-Name header, GET /health for the service status.
+    """
+
+    service: ConversionService = None
+
+    def _reply(
+        self,
+        code: int,
+        payload: dict,
+        headers: dict[str, str] = None
+    ):
+
+        body = json.dumps(payload).encode()
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+
+        if (urlparse(self.path).path != "/health"):
+            self._reply(404, {"error": f"Unknown path {self.path}"})
+            return
+
+        self._reply(200, self.service.status())
+
+    def do_POST(self):
+
+        url = urlparse(self.path)
+        if (url.path != "/convert"):
+            self._reply(404, {"error": f"Unknown path {self.path}"})
+            return
+
+        file_name = Path(self.headers.get("X-File-Name", "input.xodr")).name
+        if not (file_name.endswith(".xodr")):
+            self._reply(400, {"error": f"Expected an .xodr file name, got {file_name}"})
+            return
+
+        try:
+            params = {
+                name: JOB_PARAMS[name](values[-1])
+                for name, values in parse_qs(url.query).items()
+                if name in JOB_PARAMS
+            }
+        except ValueError as e:
+            self._reply(400, {"error": f"Invalid job parameter: {e}"})
+            return
+
+        xodr_bytes = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+        try:
+            result = self.service.submit(xodr_bytes, file_name, params)
+        except Exception as e:
+            self._reply(500, {"error": str(e)})
+            return
+
+        if (result is None):
+            self._reply(503, {"error": "Job queue full"}, {"Retry-After": "1"})
+        elif not (result["converted"]):
+            self._reply(422, result)
+        else:
+            self._reply(200, result)
+
+
+def serve(
+    host: str = DEFAULT_HOST,
+    port: int = DEFAULT_PORT,
+    workers: int = 1,
+    queue_size: int = DEFAULT_QUEUE_SIZE,
+    cache_dir: str = None
+):
+    """
+    Start a ConversionService and serve it over localhost HTTP until interrupted.
+    """
+
+    service = ConversionService(workers, queue_size, cache_dir)
+    warmup_secs = service.start()
+    print(f"{workers} workers warm after {warmup_secs:.2f}s, pids {service.worker_pids}")
+
+    handler = type("ServiceHandler", (_ServiceHandler, ), {"service": service})
+    server = ThreadingHTTPServer((host, port), handler)
+    print(f"Conversion service listening on http://{host}:{server.server_address[1]}")
+
+    # SIGTERM stops the service cleanly too, shutdown() has to come from another thread
+    signal.signal(signal.SIGTERM, lambda *_: threading.Thread(target = server.shutdown).start())
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.stop()
+
+
+class ConversionClient:
+    """
+    Client of a running conversion service. Jobs refused because the service queue
+    is full are retried after the Retry-After delay the service asks for.
+    """
+
+    def __init__(
+        self,
+        host: str = DEFAULT_HOST,
+        port: int = DEFAULT_PORT,
+        timeout: float = DEFAULT_CLIENT_TIMEOUT,
+        busy_retries: int = DEFAULT_BUSY_RETRIES
+    ):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.busy_retries = busy_retries
+
+    def _request(
+        self,
+        method: str,
+        path: str,
+        body: bytes = None,
+        headers: dict[str, str] = None
+    ) -> tuple[int, dict, dict]:
+
+        connection = http.client.HTTPConnection(self.host, self.port, timeout = self.timeout)
+        try:
+            connection.request(method, path, body = body, headers = headers or {})
+            response = connection.getresponse()
+            return response.status, dict(response.getheaders()), json.loads(response.read())
+        finally:
+            connection.close()
+
+    def health(self) -> dict:
+
+        _, _, payload = self._request("GET", "/health")
+
+        return payload
+
+    def convert(
+        self,
+        xodr_path: str,
+        **params
+    ) -> dict:
+        """
+        Convert one XODR file on the service.
+
+        Params
+        ------
+            xodr_path: str, path to the input XODR file.
+            params: optional job parameters, see JOB_PARAMS (angle, min_dist, mode,
+                max_error, weld_epsilon, concatenate_lanelets, sampling, chord_tolerance,
+                max_nodes_per_km, max_nodes, fidelity_report).
+
+        Returns
+        -------
+            result: dict, with "files" (output file name -> contents: converted OSM,
+                id mapping CSV...), "times", "record" (per-stage timing record),
+                "queue_wait_secs" and "service_secs".
+        """
+
+        xodr_path = Path(xodr_path)
+        query = urlencode({name: value for name, value in params.items() if value is not None})
+        body = xodr_path.read_bytes()
+        headers = {"X-File-Name": xodr_path.name, "Content-Type": "application/xml"}
+
+        for _ in range(self.busy_retries + 1):
+            status, response_headers, payload = self._request("POST", f"/convert?{query}", body, headers)
+            if (status != 503):
+                break
+            time.sleep(float(response_headers.get("Retry-After", 1)))
+
+        if (status == 503):
+            raise RuntimeError(f"Conversion service busy, gave up on {xodr_path} after {self.busy_retries} retries")
+        if (status != 200):
+            raise RuntimeError(f"Conversion of {xodr_path} failed ({status}): {payload.get('error', 'conversion failed')}")
+
+        return payload
+
+    def convertToDir(
+        self,
+        xodr_path: str,
+        output_dir: str,
+        **params
+    ) -> dict:
+        """
+        Same as convert, writing the returned files to output_dir like batch.convertFile.
+        """
+
+        result = self.convert(xodr_path, **params)
+
+        os.makedirs(output_dir, exist_ok = True)
+        for file_name, contents in result["files"].items():
+            (Path(output_dir) / file_name).write_bytes(contents.encode())
+
+        return result
+
+
+def main(argv: list[str] = None):
+
+    parser = argparse.ArgumentParser(description = "Local conversion service with pre-warmed workers, and its client.")
+    parser.add_argument("--host", default = DEFAULT_HOST)
+    parser.add_argument("--port", type = int, default = DEFAULT_PORT)
+    subparsers = parser.add_subparsers(dest = "command", required = True)
+
+    serve_parser = subparsers.add_parser("serve", help = "run the service")
+    serve_parser.add_argument("--workers", type = int, default = os.cpu_count())
+    serve_parser.add_argument("--queue-size", type = int, default = DEFAULT_QUEUE_SIZE)
+    serve_parser.add_argument("--cache-dir", default = None)
+
+    convert_parser = subparsers.add_parser("convert", help = "convert files on a running service")
+    convert_parser.add_argument("input_files", nargs = "+")
+    convert_parser.add_argument("--output-dir", required = True)
+
+    subparsers.add_parser("health", help = "print the service status")
+
+    args = parser.parse_args(argv)
+
+    if (args.command == "serve"):
+        serve(args.host, args.port, args.workers, args.queue_size, args.cache_dir)
+        return
+
+    client = ConversionClient(args.host, args.port)
+    if (args.command == "health"):
+        print(json.dumps(client.health(), indent = 2))
+        return
+
+    for input_file in args.input_files:
+        result = client.convertToDir(input_file, args.output_dir)
+        print(
+            f"{input_file}: {', '.join(result['files'])} "
+            f"(queued {result['queue_wait_secs']:.2f}s, total {result['service_secs']:.2f}s)"
+        )
+
+
+if __name__ == "__main__":
+    main()
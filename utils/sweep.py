@@ -0,0 +1,429 @@
+#! /usr/bin/env python3
+
+import io
+import csv
+import copy
+import time
+import argparse
+import contextlib
+import numpy as np
+from pathlib import Path
+from dataclasses import dataclass, asdict
+from concurrent.futures import ProcessPoolExecutor
+from lxml import etree
+from .georef import DEFAULT_GEOSTRING, PROJ_MET
+from .geometry import coords2XYArray, spanDeviationArray
+from .node_table import NodeTable
+from .projection import getTransformer
+from .postprocess import (
+    postprocessDownsamplingOSM,
+    simplifyKeptIndices,
+    metricXYArray,
+    angleXYArray,
+    SIMPLIFY_MODES,
+    BATCH_ANGLE_FRAME,
+    DEFAULT_MAX_ERROR,
+    STRAIGHT_ANGLE_THRSH,
+    MIN_SEGMENT_DIST
+)
+from .writer import writeOSMWithOptions, addOutputArgs, outputOptionsFromArgs
+
+SWEEP_CSV_HEADER = [
+    "mode",
+    "straight_angle_threshold",
+    "min_segment_dist",
+    "max_error",
+    "nodes",
+    "nodes_per_km",
+    "max_deviation",
+    "mean_deviation",
+    "secs",
+]
+
+
+class WayArrays:
+    """
+    Ways of one converted map as flat arrays, extracted and projected once: the way
+    points in way order, in lat/lon, in the angle frame and in meters, with CSR
+    offsets delimiting each way. Evaluating a downsampling setting only runs the
+    simplification kernel on these, the OSM tree is never touched, and the arrays
+    pickle cheaply to worker processes.
+    """
+
+    def __init__(
+        self,
+        node_table: NodeTable,
+        way_rows: list[np.ndarray],
+        geostring: str = DEFAULT_GEOSTRING,
+        way_ids: list = None,
+        angle_frame: str = BATCH_ANGLE_FRAME
+    ):
+        """
+        Params
+        ------
+            node_table: NodeTable, pre-downsampling nodes.
+            way_rows: list[np.ndarray], node table rows of every way.
+            geostring: str, CRS the angle mode measures angles in, as passed to the downsampling.
+            way_ids: list, optional, OSM ID of every way, to match them with the downsampled ways.
+            angle_frame: str, frame the angle mode measures angles in, one of ANGLE_FRAMES.
+                Default BATCH_ANGLE_FRAME, as the batch downsampling.
+        """
+
+        transformer = getTransformer(DEFAULT_GEOSTRING, geostring, always_xy = True)
+        node_xy = coords2XYArray(node_table.coords, transformer)
+        metric_xy = metricXYArray(node_table.coords, transformer, node_xy)
+        angle_xy = angleXYArray(node_table.coords, node_xy, angle_frame)
+
+        way_lengths = np.array([len(way) for way in way_rows], dtype = np.int64)
+        rows = np.concatenate(way_rows).astype(np.int64) if (way_rows) else np.empty(0, dtype = np.int64)
+        self.way_offsets = np.concatenate(([0], np.cumsum(way_lengths)))
+        self.coords = node_table.coords[rows]
+        self.angle_xy = angle_xy[rows]
+        self.metric_xy = metric_xy[rows]
+        self.geostring = geostring
+        self.way_ids = None if (way_ids is None) else np.array([int(way_id) for way_id in way_ids], dtype = np.int64)
+
+        # Origin of the local frame metricXYArray falls back to for geographic CRS
+        self.metric_origin = node_table.coords.mean(axis = 0) if (len(node_table)) else np.zeros(2)
+
+        # Segments across two ways are not part of any boundary
+        point_ways = np.repeat(np.arange(len(way_lengths)), way_lengths)
+        within_way = point_ways[1 : ] == point_ways[ : -1]
+        segment_lengths = np.hypot(*np.diff(self.metric_xy, axis = 0).T)
+        self.boundary_km = float(segment_lengths[within_way].sum()) / 1000
+
+    @classmethod
+    def fromOSM(
+        cls,
+        osm_root: etree.Element,
+        geostring: str = DEFAULT_GEOSTRING,
+        angle_frame: str = BATCH_ANGLE_FRAME
+    ) -> "WayArrays":
+        """
+        From a pre-downsampling OSM tree, e.g. the predown.osm of a cache entry.
+        """
+
+        node_table = NodeTable.fromXML(osm_root)
+        ways = list(osm_root.iterfind("way"))
+        way_rows = [node_table.rows(nd.get("ref") for nd in way.iterfind("nd")) for way in ways]
+
+        return cls(node_table, way_rows, geostring, [way.get("id") for way in ways], angle_frame)
+
+    @classmethod
+    def fromOSMLanelet(
+        cls,
+        osm,
+        geostring: str = DEFAULT_GEOSTRING,
+        angle_frame: str = BATCH_ANGLE_FRAME
+    ) -> "WayArrays":
+        """
+        From the converter's in-memory OSM model (CR2LaneletConverter.osm).
+        """
+
+        node_table = NodeTable.fromOSMLanelet(osm)
+        ways = list(osm.ways.values())
+        way_rows = [node_table.rows(way.nodes) for way in ways]
+
+        return cls(node_table, way_rows, geostring, [way.id_ for way in ways], angle_frame)
+
+    @property
+    def source_nodes(self) -> int:
+
+        return len(self.coords)
+
+    def evaluate(
+        self,
+        mode: str = "angle",
+        straight_angle_threshold: float = STRAIGHT_ANGLE_THRSH,
+        min_segment_dist: float = MIN_SEGMENT_DIST,
+        max_error: float = DEFAULT_MAX_ERROR
+    ) -> tuple[int, float, float]:
+        """
+        Downsample every way with one setting, without building any output.
+
+        Params
+        ------
+            Same as postprocessDownsamplingOSM.
+
+        Returns
+        -------
+            - nodes: int, output node count, one per kept point of every way.
+            - max_deviation: float, max distance of a source point to its simplified way, in meters.
+            - mean_deviation: float, mean of that distance over all source points, in meters.
+        """
+
+        nodes = 0
+        max_deviation = 0.0
+        deviation_sum = 0.0
+        for start, end in zip(self.way_offsets[ : -1], self.way_offsets[1 : ]):
+
+            # Ways of 2 points or less, or simplified below 2 points, are kept whole
+            if (end - start <= 2):
+                nodes += end - start
+                continue
+            kept = simplifyKeptIndices(
+                self.coords[start : end],
+                self.angle_xy[start : end] if (mode == "angle") else self.metric_xy[start : end],
+                mode = mode,
+                straight_angle_threshold = straight_angle_threshold,
+                min_segment_dist = min_segment_dist,
+                max_error = max_error
+            )
+            if (len(kept) < 2):
+                nodes += end - start
+                continue
+
+            nodes += len(kept)
+            deviation = spanDeviationArray(self.metric_xy[start : end], kept)
+            max_deviation = max(max_deviation, float(deviation.max()))
+            deviation_sum += float(deviation.sum())
+
+        return int(nodes), max_deviation, deviation_sum / max(self.source_nodes, 1)
+
+
+@dataclass(frozen = True)
+class SweepSetting:
+    """
+    One downsampling setting of a sweep, unused parameters of its mode left as they are.
+    """
+
+    mode: str = "angle"
+    straight_angle_threshold: float = STRAIGHT_ANGLE_THRSH
+    min_segment_dist: float = MIN_SEGMENT_DIST
+    max_error: float = DEFAULT_MAX_ERROR
+
+    def downsamplingKwargs(self) -> dict:
+        """
+        Keyword arguments for postprocessDownsamplingOSM and friends.
+        """
+
+        return asdict(self)
+
+
+@dataclass
+class SweepRow:
+    """
+    What one setting gives on the swept map.
+    """
+
+    setting: SweepSetting
+    nodes: int
+    nodes_per_km: float
+    max_deviation: float                # Meters
+    mean_deviation: float               # Meters, over all source points
+    secs: float                         # Evaluation time, in the worker
+
+    def toCSVRow(self) -> list:
+
+        return [
+            self.setting.mode,
+            self.setting.straight_angle_threshold,
+            self.setting.min_segment_dist,
+            self.setting.max_error,
+            self.nodes,
+            f"{self.nodes_per_km:.2f}",
+            f"{self.max_deviation:.6f}",
+            f"{self.mean_deviation:.6f}",
+            f"{self.secs:.4f}",
+        ]
+
+
+def sweepGrid(
+    angles: list[float] = (STRAIGHT_ANGLE_THRSH,),
+    min_dists: list[float] = (MIN_SEGMENT_DIST,),
+    modes: list[str] = ("angle",),
+    max_errors: list[float] = (DEFAULT_MAX_ERROR,)
+) -> list[SweepSetting]:
+    """
+    Settings of a grid sweep: angle mode on angles x min_dists, the error-bounded
+    modes on max_errors.
+    """
+
+    settings = []
+    for mode in modes:
+        if (mode not in SIMPLIFY_MODES):
+            raise ValueError(f"Unknown simplification mode {mode}, expected one of {SIMPLIFY_MODES}")
+        if (mode == "angle"):
+            settings.extend(
+                SweepSetting(mode, angle, min_dist)
+                for angle in angles
+                for min_dist in min_dists
+            )
+        else:
+            settings.extend(SweepSetting(mode, max_error = max_error) for max_error in max_errors)
+
+    return settings
+
+
+def evaluateSetting(
+    arrays: WayArrays,
+    setting: SweepSetting
+) -> SweepRow:
+
+    start = time.perf_counter()
+    nodes, max_deviation, mean_deviation = arrays.evaluate(**setting.downsamplingKwargs())
+    secs = time.perf_counter() - start
+
+    return SweepRow(
+        setting = setting,
+        nodes = nodes,
+        nodes_per_km = nodes / max(arrays.boundary_km, 1e-9),
+        max_deviation = max_deviation,
+        mean_deviation = mean_deviation,
+        secs = secs
+    )
+
+
+# Way arrays of the sweep, sent once per worker process instead of once per setting
+_WORKER_ARRAYS = None
+
+def _initWorker(arrays: WayArrays):
+
+    global _WORKER_ARRAYS
+    _WORKER_ARRAYS = arrays
+
+def _evaluateInWorker(setting: SweepSetting) -> SweepRow:
+
+    return evaluateSetting(_WORKER_ARRAYS, setting)
+
+
+def runSweep(
+    arrays: WayArrays,
+    settings: list[SweepSetting],
+    workers: int = 1
+) -> list[SweepRow]:
+    """
+    Evaluate every setting on the same way arrays, fanned out to a process pool.
+
+    Params
+    ------
+        arrays: WayArrays, the swept map.
+        settings: list[SweepSetting], e.g. from sweepGrid.
+        workers: int, number of worker processes. 1 runs everything in this process.
+
+    Returns
+    -------
+        rows: list[SweepRow], in settings order.
+    """
+
+    if (workers <= 1) or (len(settings) <= 1):
+        return [evaluateSetting(arrays, setting) for setting in settings]
+
+    with ProcessPoolExecutor(
+        max_workers = min(workers, len(settings)),
+        initializer = _initWorker,
+        initargs = (arrays,)
+    ) as executor:
+        return list(executor.map(_evaluateInWorker, settings))
+
+
+def materializeSetting(
+    osm_root: etree.Element,
+    setting: SweepSetting,
+    geostring: str = PROJ_MET,
+    **kwargs
+) -> etree.Element:
+    """
+    Downsampled OSM tree of one setting. postprocessDownsamplingOSM works in place,
+    so it runs on a copy and osm_root stays usable for the next setting.
+
+    Params
+    ------
+        osm_root: lxml.etree.Element, pre-downsampling OSM tree.
+        setting: SweepSetting, setting to apply.
+        geostring: str, CRS of the output local_x/local_y. Default PROJ_MET, as the batch.
+        kwargs: other postprocessDownsamplingOSM arguments. Default latlon_output = False,
+            generator = "VMB" and angle_frame = BATCH_ANGLE_FRAME, as the batch.
+
+    Returns
+    -------
+        osm_root: lxml.etree.Element, the downsampled copy.
+    """
+
+    kwargs = {"latlon_output": False, "generator": "VMB", "angle_frame": BATCH_ANGLE_FRAME, **kwargs}
+
+    return postprocessDownsamplingOSM(
+        copy.deepcopy(osm_root),
+        geostring = geostring,
+        **setting.downsamplingKwargs(),
+        **kwargs
+    )
+
+
+def writeSweepCSV(
+    path: str,
+    rows: list[SweepRow]
+):
+
+    with open(path, "w", newline = "") as csv_file:
+        writer = csv.writer(csv_file)
+        writer.writerow(SWEEP_CSV_HEADER)
+        writer.writerows(row.toCSVRow() for row in rows)
+
+
+def printSweep(rows: list[SweepRow]):
+
+    for index, row in enumerate(rows):
+        setting = row.setting
+        if (setting.mode == "angle"):
+            params = f"angle {setting.straight_angle_threshold}, min_dist {setting.min_segment_dist} m"
+        else:
+            params = f"max_error {setting.max_error} m"
+        print(
+            f"[{index}] {setting.mode} ({params}): {row.nodes} nodes, {row.nodes_per_km:.1f}/km, "
+            f"deviation max {row.max_deviation:.4f} m mean {row.mean_deviation:.4f} m, {row.secs:.3f}s"
+        )
+
+
+def main(argv: list[str] = None):
+
+    parser = argparse.ArgumentParser(
+        description = "Compare downsampling settings on one pre-downsampling OSM file, without reconverting."
+    )
+    parser.add_argument("input_file", type = Path, help = "pre-downsampling .osm file, e.g. a cache entry's predown.osm")
+    parser.add_argument("--angles", nargs = "+", type = float, default = [STRAIGHT_ANGLE_THRSH],
+                        help = "straight angle thresholds of angle mode, in degrees")
+    parser.add_argument("--min-dists", nargs = "+", type = float, default = [MIN_SEGMENT_DIST],
+                        help = "minimum segment lengths of angle mode, in meters")
+    parser.add_argument("--modes", nargs = "+", choices = SIMPLIFY_MODES, default = ["angle"])
+    parser.add_argument("--max-errors", nargs = "+", type = float, default = [DEFAULT_MAX_ERROR],
+                        help = "max deviations of douglas_peucker/visvalingam, in meters")
+    parser.add_argument("--geostring", default = PROJ_MET,
+                        help = "CRS angles are measured in, as in the batch downsampling")
+    parser.add_argument("--workers", type = int, default = 1)
+    parser.add_argument("--csv", default = None, help = "also write the sweep table to this CSV")
+    parser.add_argument("--materialize", nargs = "+", type = int, default = [],
+                        help = "indices of the settings to write as downsampled OSM")
+    parser.add_argument("--output-dir", type = Path, default = Path("."),
+                        help = "directory of the materialized settings")
+    addOutputArgs(parser)
+    args = parser.parse_args(argv)
+
+    osm_root = etree.parse(str(args.input_file)).getroot()
+    settings = sweepGrid(args.angles, args.min_dists, args.modes, args.max_errors)
+
+    start = time.perf_counter()
+    arrays = WayArrays.fromOSM(osm_root, args.geostring)
+    extract_secs = time.perf_counter() - start
+    rows = runSweep(arrays, settings, args.workers)
+    print(
+        f"{args.input_file}: {arrays.source_nodes} nodes over {arrays.boundary_km:.2f} km, "
+        f"{len(settings)} settings, extraction {extract_secs:.2f}s, sweep {time.perf_counter() - start - extract_secs:.2f}s"
+    )
+    printSweep(rows)
+
+    if (args.csv is not None):
+        writeSweepCSV(args.csv, rows)
+        print(f"Sweep table saved to : {args.csv}")
+
+    output_options = outputOptionsFromArgs(args)
+    for index in args.materialize:
+        with contextlib.redirect_stdout(io.StringIO()):
+            downsamp_osm = materializeSetting(osm_root, settings[index], args.geostring)
+        output_path = args.output_dir / f"sweep_{args.input_file.stem}_{index}{output_options.suffix}"
+        writeOSMWithOptions(downsamp_osm, output_path, output_options)
+        print(f"Setting [{index}] saved to : {output_path}")
+
+
+if __name__ == "__main__":
+    main()
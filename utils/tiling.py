@@ -0,0 +1,371 @@
+#! /usr/bin/env python3
+
+import os
+import math
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from lxml import etree
+
+from .conversion import PROJ_MET
+from .mapping import writeIdMappingCSV, sortIdMappingRows
+from .postprocess import SIMPLIFY_MODES, DEFAULT_MAX_ERROR
+from .writer import OSMOutputOptions, writeOSMWithOptions, addOutputArgs, outputOptionsFromArgs
+from .batch import STRAIGHT_ANGLE_THRSH, MIN_SEGMENT_DIST, outputPaths
+from .incremental import (
+    RoadGraph,
+    extractRoads,
+    convertRoadSubset,
+    wayGeometryKey,
+    xodrFingerprints,
+    conversionSettings,
+    writeFingerprints
+)
+
+DEFAULT_TILE_SIZE = 500.0               # Meters, side of a square tile
+
+
+def roadCentroids(xodr_root: etree.Element) -> dict[str, tuple[float, float]]:
+    """
+    Rough position of every road: mean of its planView geometry start points and
+    of the straight-line end of its last geometry. Good enough to bin roads into tiles.
+
+    Returns
+    -------
+        centroids: dict[str, tuple[float, float]], road ID -> (x, y) in XODR coordinates.
+    """
+
+    centroids = {}
+    for road in xodr_root.findall("road"):
+        points = []
+        geometries = road.findall("planView/geometry")
+        for geometry in geometries:
+            points.append((float(geometry.get("x")), float(geometry.get("y"))))
+        if (geometries):
+            last = geometries[-1]
+            length = float(last.get("length"))
+            hdg = float(last.get("hdg"))
+            points.append((
+                float(last.get("x")) + length * math.cos(hdg),
+                float(last.get("y")) + length * math.sin(hdg)
+            ))
+        if not (points):
+            points = [(0.0, 0.0)]
+
+        centroids[road.get("id")] = (
+            sum(x for x, _ in points) / len(points),
+            sum(y for _, y in points) / len(points)
+        )
+
+    return centroids
+
+
+def roadUnits(
+    xodr_root: etree.Element,
+    graph: RoadGraph
+) -> list[set[str]]:
+    """
+    Partition roads into units that must not be split across tiles: all interior
+    roads of a junction together, and chains of directly linked roads outside
+    junctions (crdesigner can merge lanelets along them). Cut lines therefore
+    never run through a junction or a mergeable chain.
+
+    Returns
+    -------
+        units: list[set[str]], disjoint road ID sets covering every road, in file order.
+    """
+
+    units = []
+    assigned = set()
+    junction_units = {}
+
+    for road in xodr_root.findall("road"):
+        road_id = road.get("id")
+        if (road_id in assigned):
+            continue
+
+        junction_id = road.get("junction", "-1")
+        if (junction_id != "-1"):
+            if (junction_id not in junction_units):
+                junction_units[junction_id] = set()
+                units.append(junction_units[junction_id])
+            junction_units[junction_id].add(road_id)
+            assigned.add(road_id)
+            continue
+
+        unit = graph.chains({road_id})
+        units.append(unit)
+        assigned |= unit
+
+    return units
+
+
+def partitionTiles(
+    xodr_root: etree.Element,
+    tile_size: float = DEFAULT_TILE_SIZE,
+    graph: RoadGraph = None
+) -> list[set[str]]:
+    """
+    Bin road units (see roadUnits) into a square grid by the mean position of their roads.
+
+    Params
+    ------
+        xodr_root: lxml.etree.Element, <OpenDRIVE> root.
+        tile_size: float, grid cell side, in XODR units (meters). Default DEFAULT_TILE_SIZE.
+        graph: RoadGraph, optional, built from xodr_root if not given.
+
+    Returns
+    -------
+        tiles: list[set[str]], road IDs per non-empty tile, ordered by grid cell.
+    """
+
+    if (graph is None):
+        graph = RoadGraph(xodr_root)
+
+    centroids = roadCentroids(xodr_root)
+    tiles = {}
+    for unit in roadUnits(xodr_root, graph):
+        x = sum(centroids[road_id][0] for road_id in unit) / len(unit)
+        y = sum(centroids[road_id][1] for road_id in unit) / len(unit)
+        cell = (math.floor(x / tile_size), math.floor(y / tile_size))
+        tiles.setdefault(cell, set()).update(unit)
+
+    return [tiles[cell] for cell in sorted(tiles)]
+
+
+def _convertTileJob(
+    sub_xodr_bytes: bytes,
+    road_ids: set[str],
+    *args
+):
+    """
+    Worker entry point. XML trees do not pickle, so the tile travels as bytes both ways.
+    """
+
+    converted = convertRoadSubset(etree.fromstring(sub_xodr_bytes), road_ids, *args)
+    if (converted is None):
+        return None
+
+    osm_root, mapping_rows = converted
+    return etree.tostring(osm_root), mapping_rows
+
+
+def stitchTiles(
+    tile_results: list[tuple[etree.Element, list[tuple[str, str, str, int]]]]
+) -> tuple[etree.Element, list[tuple[str, str, str, int]]]:
+    """
+    Merge per-tile downsampled outputs into one, renumbering every element
+    1, 2, 3... in tile order so IDs are unique and deterministic across tiles.
+    Ways no relation refers to (virtual traffic signs) can come out of several tiles
+    through their context roads, only the first copy is kept.
+
+    Params
+    ------
+        tile_results: list of (osm_root, mapping_rows), as returned by convertRoadSubset.
+
+    Returns
+    -------
+        - osm_root: lxml.etree.Element, stitched <osm> root.
+        - mapping_rows: list, stitched, sorted mapping rows.
+    """
+
+    osm_root = etree.Element("osm")
+    if (tile_results):
+        osm_root.attrib.update(tile_results[0][0].attrib)
+
+    grouped = {"way": [], "relation": [], "node": []}
+    mapping_rows = []
+    seen_way_keys = set()
+    next_id = 1
+
+    for tile_osm, tile_mapping_rows in tile_results:
+        nodes = {node.get("id"): node for node in tile_osm.findall("node")}
+        referenced_ways = {
+            member.get("ref")
+            for member in tile_osm.iter("member")
+            if member.get("type") == "way"
+        }
+
+        # Drop duplicate unreferenced ways, then the nodes only they used
+        skipped_ways = set()
+        for way in tile_osm.findall("way"):
+            if (way.get("id") in referenced_ways):
+                continue
+            key = wayGeometryKey(way, nodes)
+            if (key in seen_way_keys):
+                skipped_ways.add(way.get("id"))
+            seen_way_keys.add(key)
+
+        node_users = {}
+        for way in tile_osm.findall("way"):
+            for nd in way.findall("nd"):
+                node_users.setdefault(nd.get("ref"), set()).add(way.get("id"))
+        skipped = skipped_ways | {
+            node_id
+            for node_id, users in node_users.items()
+            if users <= skipped_ways
+        }
+
+        id_remap = {}
+        for child in tile_osm:
+            if (child.get("id") not in skipped):
+                id_remap[child.get("id")] = str(next_id)
+                next_id += 1
+
+        for child in list(tile_osm):
+            if (child.get("id") in skipped) or (child.tag not in grouped):
+                continue
+            child.set("id", id_remap[child.get("id")])
+            for ref_elem in child.iter("nd", "member"):
+                ref_elem.set("ref", id_remap.get(ref_elem.get("ref"), ref_elem.get("ref")))
+            grouped[child.tag].append(child)
+
+        mapping_rows.extend(
+            (road_id, section_id, lane_id, int(id_remap[str(relation_id)]))
+            for road_id, section_id, lane_id, relation_id in tile_mapping_rows
+        )
+
+    # Same layout as the downsampled output: ways, relations, then nodes
+    for tag in ("way", "relation", "node"):
+        osm_root.extend(grouped[tag])
+
+    return osm_root, sortIdMappingRows(mapping_rows)
+
+
+def convertTiled(
+    input_file_path: str,
+    output_dir: str,
+    tile_size: float = DEFAULT_TILE_SIZE,
+    workers: int = 1,
+    straight_angle_threshold: float = STRAIGHT_ANGLE_THRSH,
+    min_segment_dist: float = MIN_SEGMENT_DIST,
+    concatenate_lanelets: bool = False,
+    georeference_string: str = PROJ_MET,
+    mode: str = "angle",
+    max_error: float = DEFAULT_MAX_ERROR,
+    output_options: OSMOutputOptions = None
+) -> dict:
+    """
+    Convert one XODR file tile by tile, in parallel, and stitch the tiles back together.
+    Each worker only loads its tile plus one ring of neighbouring roads as context,
+    so per-worker memory follows the tile size rather than the map size.
+    Writes the same files as batch.convertFile, plus the fingerprints incremental
+    runs start from.
+
+    Params
+    ------
+        input_file_path: str, path to the input XODR file.
+        output_dir: str, output directory.
+        tile_size: float, tile side, in meters. Default DEFAULT_TILE_SIZE.
+        workers: int, number of worker processes, 1 runs in-process. Default 1.
+        Others: same as batch.convertFile. mode is one of SIMPLIFY_MODES, tiles are
+            downsampled separately.
+
+    Returns
+    -------
+        summary: dict, tile and road counts, None if any tile failed to convert.
+    """
+
+    if (mode not in SIMPLIFY_MODES):
+        raise ValueError(f"Tiled conversion needs a fixed simplification mode, one of {SIMPLIFY_MODES}")
+    if (output_options is None):
+        output_options = OSMOutputOptions()
+
+    paths = outputPaths(input_file_path, output_dir)
+    osm_path = paths["osm"].with_suffix(output_options.suffix)
+    xodr_root = etree.parse(str(input_file_path)).getroot()
+    graph = RoadGraph(xodr_root)
+    tiles = partitionTiles(xodr_root, tile_size, graph)
+
+    job_args = []
+    for road_ids in tiles:
+        context_roads = graph.chains(road_ids | graph.neighbours(road_ids))
+        job_args.append((
+            etree.tostring(extractRoads(xodr_root, context_roads)),
+            road_ids,
+            straight_angle_threshold,
+            min_segment_dist,
+            concatenate_lanelets,
+            georeference_string,
+            "VMB",
+            mode,
+            max_error
+        ))
+    del xodr_root
+
+    print(
+        f"Tiled conversion of {input_file_path}: {len(graph.road_links)} roads in {len(tiles)} tiles "
+        f"(largest {max((len(tile) for tile in tiles), default = 0)} roads), {workers} workers"
+    )
+
+    if (workers <= 1):
+        results = [_convertTileJob(*args) for args in job_args]
+    else:
+        with ProcessPoolExecutor(max_workers = workers) as executor:
+            results = list(executor.map(_convertTileJob, *zip(*job_args)))
+
+    if any(result is None for result in results):
+        print(f"Conversion failed for at least one tile of {input_file_path}, skipping output.")
+        return None
+
+    osm_root, mapping_rows = stitchTiles([
+        (etree.fromstring(osm_bytes), tile_mapping_rows)
+        for osm_bytes, tile_mapping_rows in results
+    ])
+
+    writeOSMWithOptions(osm_root, osm_path, output_options)
+    writeIdMappingCSV(paths["mapping"], mapping_rows)
+    fingerprints = xodrFingerprints(input_file_path)
+    fingerprints["settings"] = conversionSettings(
+        straight_angle_threshold,
+        min_segment_dist,
+        concatenate_lanelets,
+        georeference_string,
+        mode,
+        max_error,
+        output_options
+    )
+    writeFingerprints(paths["fingerprints"], fingerprints)
+    print(f"Converted file saved to : {osm_path}")
+
+    return {
+        "tiles": len(tiles),
+        "roads": len(graph.road_links),
+        "lanelets": len(mapping_rows),
+    }
+
+
+def main(argv: list[str] = None):
+
+    parser = argparse.ArgumentParser(description = "Convert large XODR files tile by tile, in parallel.")
+    parser.add_argument("input_files", nargs = "+")
+    parser.add_argument("--output-dir", required = True)
+    parser.add_argument("--tile-size", type = float, default = DEFAULT_TILE_SIZE, help = "tile side, in meters")
+    parser.add_argument("--workers", type = int, default = os.cpu_count())
+    parser.add_argument("--angle", type = float, default = STRAIGHT_ANGLE_THRSH)
+    parser.add_argument("--min-dist", type = float, default = MIN_SEGMENT_DIST)
+    parser.add_argument("--mode", choices = SIMPLIFY_MODES, default = "angle",
+                        help = "simplification mode, --angle/--min-dist only apply to angle mode")
+    parser.add_argument("--max-error", type = float, default = DEFAULT_MAX_ERROR,
+                        help = "max deviation in meters for douglas_peucker/visvalingam")
+    parser.add_argument("--concatenate-lanelets", action = "store_true")
+    addOutputArgs(parser)
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.output_dir, exist_ok = True)
+    for input_file in args.input_files:
+        convertTiled(
+            input_file,
+            args.output_dir,
+            tile_size = args.tile_size,
+            workers = args.workers,
+            straight_angle_threshold = args.angle,
+            min_segment_dist = args.min_dist,
+            concatenate_lanelets = args.concatenate_lanelets,
+            mode = args.mode,
+            max_error = args.max_error,
+            output_options = outputOptionsFromArgs(args)
+        )
+
+
+if __name__ == "__main__":
+    main()
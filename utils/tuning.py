@@ -0,0 +1,281 @@
+#! /usr/bin/env python3
+
+import io
+import time
+import argparse
+import contextlib
+import numpy as np
+from dataclasses import dataclass
+from lxml import etree
+from .georef import DEFAULT_GEOSTRING, PROJ_MET
+from .node_table import NodeTable
+from .postprocess import SIMPLIFY_MODES, DEFAULT_MAX_ERROR
+from .sweep import WayArrays
+
+# Pseudo simplification mode: pick mode and parameters with tuneDownsampling
+AUTO_MODE = "auto"
+
+# Angle mode search grid, from the historical strict setting outwards
+ANGLE_CANDIDATES = (179.9, 179.5, 179.0, 178.0, 176.0, 173.0, 170.0, 165.0)    # Degrees
+MIN_DIST_CANDIDATES = (0.5, 1.0, 2.0, 3.0, 5.0, 8.0)                            # Meters
+
+# Error-bounded modes: bisection of their max_error parameter, on a log scale
+ERROR_SEARCH_STEPS = 10
+MIN_ERROR_PARAM = 0.001                 # Meters
+ERROR_SLACK = 1e-9                      # Meters, absorbs float error of the measured deviation
+
+
+@dataclass
+class TuningResult:
+    """
+    Downsampling parameters picked by tuneDownsampling, with what they produce.
+    """
+
+    mode: str
+    straight_angle_threshold: float
+    min_segment_dist: float
+    max_error: float
+    nodes: int                          # Output nodes, one per kept point of every way
+    source_nodes: int                   # Way points before downsampling
+    boundary_km: float                  # Total length of the ways
+    measured_error: float               # Max distance of a dropped point to its simplified way, in meters
+    node_cap: float                     # Budget in nodes, None if only max_error was given
+    within_budget: bool
+    within_error: bool                  # False if no candidate met max_error, the most faithful one is returned
+    evaluations: int                    # Parameter sets tried
+
+    @property
+    def nodes_per_km(self) -> float:
+
+        return self.nodes / max(self.boundary_km, 1e-9)
+
+    def downsamplingKwargs(self) -> dict:
+        """
+        Keyword arguments for postprocessDownsamplingOSM and friends.
+        """
+
+        return {
+            "straight_angle_threshold": self.straight_angle_threshold,
+            "min_segment_dist": self.min_segment_dist,
+            "mode": self.mode,
+            "max_error": self.max_error,
+        }
+
+
+def _pickCandidate(
+    candidates: list[tuple[dict, int, float]],
+    max_error: float,
+    node_cap: float
+) -> tuple[dict, int, float]:
+    """
+    Best (params, nodes, measured_error) candidate: within max_error and the node cap,
+    the most faithful one; within max_error only, the smallest; otherwise the most faithful.
+    """
+
+    feasible = [c for c in candidates if (c[2] <= max_error + ERROR_SLACK)]
+    if not (feasible):
+        return min(candidates, key = lambda c: (c[2], c[1]))
+
+    if (node_cap is not None):
+        in_budget = [c for c in feasible if (c[1] <= node_cap)]
+        if (in_budget):
+            return min(in_budget, key = lambda c: (c[2], -c[1]))
+
+    return min(feasible, key = lambda c: (c[1], c[2]))
+
+
+def tuneDownsampling(
+    node_table: NodeTable,
+    way_rows: list[np.ndarray],
+    max_error: float = DEFAULT_MAX_ERROR,
+    max_nodes_per_km: float = None,
+    max_nodes: int = None,
+    geostring: str = DEFAULT_GEOSTRING,
+    modes: tuple[str] = SIMPLIFY_MODES
+) -> TuningResult:
+    """
+    Search downsampling parameters for a node budget under a geometric error bound,
+    running only the simplification kernels on the pre-downsampling ways (no reconversion,
+    no output built). Angle mode is tried on a threshold x min distance grid, the
+    error-bounded modes by bisecting their max_error below the bound. Every candidate's
+    deviation is measured, so angle mode results are held to max_error too.
+
+    Among the candidates within max_error, the one with the lowest error that fits the
+    budget wins; without a budget, or if nothing fits it, the one with the fewest nodes.
+
+    Params
+    ------
+        node_table: NodeTable, pre-downsampling nodes.
+        way_rows: list[np.ndarray], node table rows of every way.
+        max_error: float, max distance between a dropped point and its simplified way, in meters.
+        max_nodes_per_km: float, optional, budget in output nodes per km of way (lane boundary).
+        max_nodes: int, optional, budget in total output nodes. The tighter budget applies.
+        geostring: str, CRS the angle mode measures angles in, as passed to the downsampling.
+        modes: tuple[str], simplification modes to search. Default all of SIMPLIFY_MODES.
+
+    Returns
+    -------
+        result: TuningResult.
+    """
+
+    return tuneDownsamplingWayArrays(
+        WayArrays(node_table, way_rows, geostring),
+        max_error = max_error,
+        max_nodes_per_km = max_nodes_per_km,
+        max_nodes = max_nodes,
+        modes = modes
+    )
+
+
+def tuneDownsamplingWayArrays(
+    arrays: WayArrays,
+    max_error: float = DEFAULT_MAX_ERROR,
+    max_nodes_per_km: float = None,
+    max_nodes: int = None,
+    modes: tuple[str] = SIMPLIFY_MODES
+) -> TuningResult:
+    """
+    tuneDownsampling on way arrays already extracted, e.g. shared with a sweep.
+    """
+
+    caps = []
+    if (max_nodes_per_km is not None):
+        caps.append(max_nodes_per_km * arrays.boundary_km)
+    if (max_nodes is not None):
+        caps.append(max_nodes)
+    node_cap = min(caps) if (caps) else None
+
+    candidates = []
+
+    def tryParams(**params) -> int:
+        nodes, measured_error, _ = arrays.evaluate(**params)
+        candidates.append((params, nodes, measured_error))
+        return nodes
+
+    for mode in modes:
+        if (mode == "angle"):
+            for straight_angle_threshold in ANGLE_CANDIDATES:
+                for min_segment_dist in MIN_DIST_CANDIDATES:
+                    tryParams(
+                        mode = mode,
+                        straight_angle_threshold = straight_angle_threshold,
+                        min_segment_dist = min_segment_dist,
+                        max_error = max_error
+                    )
+            continue
+
+        if (mode not in SIMPLIFY_MODES):
+            raise ValueError(f"Unknown simplification mode {mode}, expected one of {SIMPLIFY_MODES}")
+
+        # Loosest setting first, tighter ones only matter if it fits the budget
+        params = {"mode": mode, "straight_angle_threshold": None, "min_segment_dist": None}
+        nodes = tryParams(**params, max_error = max_error)
+        if (node_cap is None) or (nodes > node_cap):
+            continue
+
+        low, high = min(MIN_ERROR_PARAM, max_error), max_error
+        for _ in range(ERROR_SEARCH_STEPS):
+            middle = float(np.sqrt(low * high))
+            if (tryParams(**params, max_error = middle) <= node_cap):
+                high = middle
+            else:
+                low = middle
+
+    params, nodes, measured_error = _pickCandidate(candidates, max_error, node_cap)
+
+    return TuningResult(
+        mode = params["mode"],
+        straight_angle_threshold = params["straight_angle_threshold"],
+        min_segment_dist = params["min_segment_dist"],
+        max_error = params["max_error"],
+        nodes = nodes,
+        source_nodes = arrays.source_nodes,
+        boundary_km = arrays.boundary_km,
+        measured_error = measured_error,
+        node_cap = node_cap,
+        within_budget = (node_cap is None) or (nodes <= node_cap),
+        within_error = measured_error <= max_error + ERROR_SLACK,
+        evaluations = len(candidates)
+    )
+
+
+def tuneDownsamplingOSM(
+    osm_root: etree.Element,
+    **kwargs
+) -> TuningResult:
+    """
+    tuneDownsampling on a pre-downsampling OSM tree, e.g. the predown.osm of a cache entry.
+    """
+
+    geostring = kwargs.pop("geostring", DEFAULT_GEOSTRING)
+
+    return tuneDownsamplingWayArrays(WayArrays.fromOSM(osm_root, geostring), **kwargs)
+
+
+def tuneDownsamplingOSMLanelet(
+    osm,
+    **kwargs
+) -> TuningResult:
+    """
+    tuneDownsampling on the converter's in-memory OSM model (CR2LaneletConverter.osm).
+    """
+
+    geostring = kwargs.pop("geostring", DEFAULT_GEOSTRING)
+
+    return tuneDownsamplingWayArrays(WayArrays.fromOSMLanelet(osm, geostring), **kwargs)
+
+
+def formatTuningResult(result: TuningResult) -> str:
+
+    if (result.mode == "angle"):
+        params = f"angle {result.straight_angle_threshold}, min_dist {result.min_segment_dist} m"
+    else:
+        params = f"max_error {result.max_error:.4f} m"
+    budget = "no budget" if (result.node_cap is None) else (
+        f"budget {result.node_cap:.0f} {'met' if (result.within_budget) else 'NOT met'}"
+    )
+
+    error = "" if (result.within_error) else " (over max_error)"
+
+    return (
+        f"{result.mode} ({params}): {result.nodes} nodes of {result.source_nodes}, "
+        f"{result.nodes_per_km:.1f}/km over {result.boundary_km:.2f} km, "
+        f"max deviation {result.measured_error:.4f} m{error}, {budget}, {result.evaluations} evaluations"
+    )
+
+
+def main(argv: list[str] = None):
+
+    parser = argparse.ArgumentParser(
+        description = "Pick downsampling parameters for a node budget, from pre-downsampling OSM files."
+    )
+    parser.add_argument("input_files", nargs = "+", help = "pre-downsampling .osm files, e.g. a cache entry's predown.osm")
+    parser.add_argument("--max-error", type = float, default = DEFAULT_MAX_ERROR,
+                        help = "max deviation of a dropped point, in meters")
+    parser.add_argument("--max-nodes-per-km", type = float, default = None,
+                        help = "budget in output nodes per km of lane boundary")
+    parser.add_argument("--max-nodes", type = int, default = None,
+                        help = "budget in total output nodes")
+    parser.add_argument("--modes", nargs = "+", choices = SIMPLIFY_MODES, default = list(SIMPLIFY_MODES))
+    parser.add_argument("--geostring", default = PROJ_MET,
+                        help = "CRS angles are measured in, as in the batch downsampling")
+    args = parser.parse_args(argv)
+
+    for input_file in args.input_files:
+        osm_root = etree.parse(str(input_file)).getroot()
+
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = tuneDownsamplingOSM(
+                osm_root,
+                max_error = args.max_error,
+                max_nodes_per_km = args.max_nodes_per_km,
+                max_nodes = args.max_nodes,
+                geostring = args.geostring,
+                modes = tuple(args.modes)
+            )
+        print(f"{input_file}: {formatTuningResult(result)}, {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
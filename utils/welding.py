@@ -0,0 +1,187 @@
+#! /usr/bin/env python3
+
+import csv
+import math
+import numpy as np
+from lxml import etree
+from .geometry import coords2LocalXYArray
+from .node_table import NodeTable
+
+DEFAULT_WELD_EPSILON = 0.01             # Meters, nodes closer than this are merged
+
+NODE_REMAP_HEADER = [
+    "source_node_id",
+    "welded_node_id",
+]
+
+
+def nodePositions(node_table: NodeTable) -> np.ndarray:
+    """
+    Metric (x, y, ele) of every node table row: local_x/local_y tags when present
+    (the downsampled output leaves lat/lon empty), otherwise lat/lon in a local
+    equirectangular frame.
+
+    Params
+    ------
+        node_table: NodeTable, nodes to position.
+
+    Returns
+    -------
+        xyz: np.ndarray, (n, 3) float64 array, in meters.
+    """
+
+    xyz = np.empty((len(node_table), 3), dtype = np.float64)
+    xyz[:, 2] = node_table.ele
+
+    local_rows = []
+    local_xy = []
+    for row, tags in node_table.tags.items():
+        tags = dict(tags)
+        if ("local_x" in tags) and ("local_y" in tags):
+            local_rows.append(row)
+            local_xy.append((float(tags["local_x"]), float(tags["local_y"])))
+
+    geo = np.ones(len(node_table), dtype = bool)
+    geo[local_rows] = False
+    if (local_rows):
+        xyz[local_rows, :2] = local_xy
+    if (geo.any()):
+        xyz[geo, :2] = coords2LocalXYArray(node_table.coords[geo])
+
+    return xyz
+
+
+def weldIndices(
+    xyz: np.ndarray,
+    epsilon: float = DEFAULT_WELD_EPSILON
+) -> np.ndarray:
+    """
+    Greedy welding on a uniform grid of epsilon-sized cells: every point merges into
+    the first earlier kept point within epsilon (3D distance, so stacked roads on
+    bridges never merge), or is kept itself. A point only has to look at its own
+    and the 8 surrounding cells, O(n) on average, no pairwise search.
+
+    Params
+    ------
+        xyz: np.ndarray, (n, 3) float64 array of metric positions.
+        epsilon: float, welding distance, in meters. Default DEFAULT_WELD_EPSILON.
+
+    Returns
+    -------
+        representative: np.ndarray, (n,) int64, index of the kept point each point
+            merges into, itself if kept.
+    """
+
+    n = len(xyz)
+    representative = np.arange(n, dtype = np.int64)
+    if (n == 0):
+        return representative
+
+    cells = np.floor(xyz[:, :2] / epsilon).astype(np.int64).tolist()
+    points = xyz.tolist()
+    epsilon_sq = epsilon * epsilon
+    grid = {}
+
+    for i in range(n):
+        cx, cy = cells[i]
+        px, py, pz = points[i]
+        found = -1
+
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                for j in grid.get((cx + dx, cy + dy), ()):
+                    qx, qy, qz = points[j]
+                    if ((px - qx) ** 2 + (py - qy) ** 2 + (pz - qz) ** 2 <= epsilon_sq):
+                        found = j
+                        break
+                if (found >= 0):
+                    break
+            if (found >= 0):
+                break
+
+        if (found >= 0):
+            representative[i] = found
+        else:
+            grid.setdefault((cx, cy), []).append(i)
+
+    return representative
+
+
+def weldNodes(
+    osm_root: etree.Element,
+    epsilon: float = DEFAULT_WELD_EPSILON,
+    node_id_remap: dict[str, str] = None
+) -> int:
+    """
+    Merge <node> elements closer than epsilon, in place: the first node (document order)
+    of every group is kept, the others are removed and every <nd> ref to them is
+    rewritten. Consecutive duplicate refs this creates inside a way are collapsed,
+    except in degenerate ways that would be left with a single node.
+
+    Params
+    ------
+        osm_root: lxml.etree.Element, root element of the OSM XML, e.g. after downsampling.
+        epsilon: float, welding distance, in meters. Default DEFAULT_WELD_EPSILON.
+        node_id_remap: dict[str, str], optional, filled with removed node ID -> kept node ID.
+
+    Returns
+    -------
+        num_welded: int, number of nodes removed.
+    """
+
+    if not (epsilon > 0) or not (math.isfinite(epsilon)):
+        raise ValueError(f"Welding epsilon must be a positive number, got {epsilon}")
+
+    node_table = NodeTable.fromXML(osm_root)
+    representative = weldIndices(nodePositions(node_table), epsilon)
+
+    welded = {
+        node_table.idString(i): node_table.idString(rep)
+        for i, rep in enumerate(representative.tolist())
+        if i != rep
+    }
+    if not (welded):
+        return 0
+
+    for way in osm_root.iter("way"):
+        nds = way.findall("nd")
+        refs = [welded.get(nd.get("ref"), nd.get("ref")) for nd in nds]
+        for nd, ref in zip(nds, refs):
+            nd.set("ref", ref)
+
+        # Collapse repeated refs, unless the way would end up with a single node
+        duplicates = [
+            nd
+            for i, nd in enumerate(nds)
+            if (i > 0) and (refs[i] == refs[i - 1])
+        ]
+        if (duplicates) and (len(nds) - len(duplicates) >= 2):
+            for nd in duplicates:
+                way.remove(nd)
+
+    # Rebuild the children in one go, removing nodes one by one is quadratic
+    osm_root[:] = [
+        child
+        for child in osm_root
+        if (child.tag != "node") or (child.get("id") not in welded)
+    ]
+
+    if (node_id_remap is not None):
+        node_id_remap.update(welded)
+
+    return len(welded)
+
+
+def writeNodeRemapCSV(
+    remap_path: str,
+    node_id_remap: dict[str, str]
+):
+    """
+    Write removed node ID -> kept node ID pairs as CSV, sorted by source node ID.
+    """
+
+    with open(remap_path, "w", newline="") as csv_file:
+        writer = csv.writer(csv_file)
+        writer.writerow(NODE_REMAP_HEADER)
+        for source_id, welded_id in sorted(node_id_remap.items(), key = lambda item: int(item[0])):
+            writer.writerow([source_id, welded_id])
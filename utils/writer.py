@@ -0,0 +1,425 @@
+#! /usr/bin/env python3
+
+import io
+import gzip
+import copy
+import time
+import argparse
+import importlib.util
+import itertools
+from pathlib import Path
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Iterable
+from lxml import etree
+
+INDENT = "  "
+
+# Compression is picked from the output file suffix
+COMPRESSION_SUFFIXES = {
+    "gzip": ".gz",
+    "zstd": ".zst",
+}
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+
+# Tags holding metric values, rounded with metric_decimals, lat/lon use latlon_decimals
+METRIC_TAGS = ("local_x", "local_y", "ele")
+
+
+@dataclass(frozen = True)
+class OSMOutputOptions:
+    """
+    How converted OSM files are written. The default is the historical output:
+    pretty printed, full precision lat/lon, .4f local_x/local_y/ele, uncompressed.
+    """
+
+    pretty_print: bool = True
+    latlon_decimals: int = None         # e.g. 8, about 1 mm at the equator
+    metric_decimals: int = None         # e.g. 3, 1 mm
+    compression: str = None             # None, "gzip" or "zstd"
+
+    @property
+    def suffix(self) -> str:
+        """
+        File suffix of the output, e.g. ".osm.gz".
+        """
+
+        return ".osm" + COMPRESSION_SUFFIXES.get(self.compression, "")
+
+    @property
+    def label(self) -> str:
+
+        parts = ["pretty" if (self.pretty_print) else "compact"]
+        if (self.latlon_decimals is not None):
+            parts.append(f"latlon{self.latlon_decimals}")
+        if (self.metric_decimals is not None):
+            parts.append(f"metric{self.metric_decimals}")
+        if (self.compression is not None):
+            parts.append(self.compression)
+
+        return "+".join(parts)
+
+
+def compressionFromPath(path) -> str:
+    """
+    Compression implied by a file name suffix, None for plain output.
+    """
+
+    suffix = Path(path).suffix
+    for compression, compression_suffix in COMPRESSION_SUFFIXES.items():
+        if (suffix == compression_suffix):
+            return compression
+
+    return None
+
+
+@contextmanager
+def _compressedOutput(
+    file_out,
+    compression: str
+):
+    """
+    Wrap a binary file object in a compressing writer, closed (flushed) on exit
+    while file_out itself stays open.
+    """
+
+    if (compression is None):
+        yield file_out
+        return
+
+    if (compression == "gzip"):
+        # mtime = 0 keeps the output byte-identical across runs
+        writer = gzip.GzipFile(fileobj = file_out, mode = "wb", compresslevel = GZIP_LEVEL, mtime = 0)
+    elif (compression == "zstd"):
+        try:
+            import zstandard
+        except ImportError:
+            raise ImportError("zstd output needs the zstandard package (pip install zstandard)")
+        writer = zstandard.ZstdCompressor(level = ZSTD_LEVEL).stream_writer(file_out, closefd = False)
+    else:
+        raise ValueError(f"Unknown compression {compression}, expected one of {list(COMPRESSION_SUFFIXES)}")
+
+    try:
+        yield writer
+    finally:
+        writer.close()
+
+
+def _formatDecimal(
+    value: str,
+    decimals: int
+) -> str:
+    """
+    Round a number to at most decimals decimals, without trailing zeros.
+    Empty values (lat/lon of local_x/local_y only output) are left as they are.
+    """
+
+    if not (value):
+        return value
+
+    text = f"{float(value):.{decimals}f}"
+    if ("." in text):
+        text = text.rstrip("0").rstrip(".")
+
+    return "0" if (text == "-0") else text
+
+
+def roundCoordinates(
+    element: etree.Element,
+    latlon_decimals: int = None,
+    metric_decimals: int = None
+):
+    """
+    Round, in place, the lat/lon attributes of an OSM <node> and its metric
+    tags (see METRIC_TAGS). Other elements are left untouched.
+    streamOSM only calls it on copies, unless asked otherwise.
+    """
+
+    if (element.tag != "node"):
+        return
+
+    if (latlon_decimals is not None):
+        for attr in ("lat", "lon"):
+            if (attr in element.attrib):
+                element.set(attr, _formatDecimal(element.get(attr), latlon_decimals))
+
+    if (metric_decimals is not None):
+        for tag in element.iterchildren("tag"):
+            if (tag.get("k") in METRIC_TAGS):
+                tag.set("v", _formatDecimal(tag.get("v"), metric_decimals))
+
+
+def streamOSM(
+    output,
+    osm_root: etree.Element,
+    elements: Iterable[etree.Element] = None,
+    pretty_print: bool = True,
+    latlon_decimals: int = None,
+    metric_decimals: int = None,
+    compression: str = None,
+    copy_elements: bool = True
+):
+    """
+    Write an OSM document element by element with lxml.etree.xmlfile, instead of
+    serializing the whole document into one bytes object first.
+    Pretty printed output is byte-identical to etree.tostring(osm_root, xml_declaration = True,
+    encoding = "UTF-8", pretty_print = True) when elements are osm_root's children and
+    neither rounding nor compression is asked for. Compact output has no whitespace at all
+    between elements, whatever the indentation of the input tree.
+
+    Params
+    ------
+        output: str | Path | binary file-like, where to write. Paths ending in .gz or .zst
+            are compressed accordingly.
+        osm_root: lxml.etree.Element, <osm> root, only its tag and attributes are used.
+            They are read once the first element has been produced, so a postprocessing
+            generator (e.g. postprocess.iterDownsampledOSM) can still adjust them.
+        elements: Iterable[lxml.etree.Element], children to write. Default osm_root's children.
+        pretty_print: bool, indent output. Default True.
+        latlon_decimals: int, optional, round node lat/lon to this many decimals.
+        metric_decimals: int, optional, round local_x/local_y/ele tags to this many decimals.
+        compression: str, optional, "gzip" or "zstd". Default taken from the output path suffix.
+        copy_elements: bool, round and indent a copy of each element while writing it, so the
+            caller's tree is left as it was (e.g. full precision for a binary map written next).
+            False rounds and indents the elements themselves, for elements nobody else holds,
+            e.g. from a postprocessing generator. Default True.
+    """
+
+    if (elements is None):
+        elements = list(osm_root)
+
+    if (copy_elements):
+        elements = (copy.deepcopy(element) for element in elements)
+
+    if (latlon_decimals is not None) or (metric_decimals is not None):
+        elements = _roundedElements(elements, latlon_decimals, metric_decimals)
+
+    if hasattr(output, "write"):
+        with _compressedOutput(output, compression) as file_out:
+            _streamOSM(file_out, osm_root, elements, pretty_print)
+    else:
+        if (compression is None):
+            compression = compressionFromPath(output)
+        with open(output, "wb") as raw_out, _compressedOutput(raw_out, compression) as file_out:
+            _streamOSM(file_out, osm_root, elements, pretty_print)
+
+
+def _roundedElements(
+    elements: Iterable[etree.Element],
+    latlon_decimals: int,
+    metric_decimals: int
+):
+
+    for element in elements:
+        roundCoordinates(element, latlon_decimals, metric_decimals)
+        yield element
+
+
+def _stripIndentation(element: etree.Element):
+    """
+    Drop whitespace-only text, e.g. the indentation of a tree parsed from pretty printed XML.
+    """
+
+    for child in element.iter():
+        if (child.text is not None) and not (child.text.strip()):
+            child.text = None
+        if (child.tail is not None) and not (child.tail.strip()):
+            child.tail = None
+
+
+def _streamOSM(
+    file_out,
+    osm_root: etree.Element,
+    elements: Iterable[etree.Element],
+    pretty_print: bool
+):
+
+    elements = iter(elements)
+    first = next(elements, None)
+
+    with etree.xmlfile(file_out, encoding = "UTF-8") as xf:
+        xf.write_declaration()
+
+        with xf.element(osm_root.tag, dict(osm_root.attrib)):
+            if (first is not None):
+                for element in itertools.chain([first], elements):
+                    if (pretty_print):
+                        xf.write("\n" + INDENT)
+                        etree.indent(element, space = INDENT, level = 1)
+                    else:
+                        _stripIndentation(element)
+                    xf.write(element, with_tail = False)
+
+                if (pretty_print):
+                    xf.write("\n")
+
+    # Trailing newline, as etree.tostring pretty prints it
+    if (pretty_print):
+        file_out.write(b"\n")
+
+
+def writeOSM(
+    osm_root: etree.Element,
+    output,
+    pretty_print: bool = True,
+    latlon_decimals: int = None,
+    metric_decimals: int = None,
+    compression: str = None
+):
+    """
+    Write a whole OSM tree through streamOSM.
+
+    Params
+    ------
+        osm_root: lxml.etree.Element, <osm> root.
+        output: str | Path | binary file-like, where to write.
+        Others: same as streamOSM.
+    """
+
+    streamOSM(
+        output,
+        osm_root,
+        pretty_print = pretty_print,
+        latlon_decimals = latlon_decimals,
+        metric_decimals = metric_decimals,
+        compression = compression
+    )
+
+
+def writeOSMWithOptions(
+    osm_root: etree.Element,
+    output,
+    options: OSMOutputOptions = None
+):
+    """
+    writeOSM with the settings of an OSMOutputOptions, default options if None.
+    """
+
+    if (options is None):
+        options = OSMOutputOptions()
+
+    writeOSM(
+        osm_root,
+        output,
+        pretty_print = options.pretty_print,
+        latlon_decimals = options.latlon_decimals,
+        metric_decimals = options.metric_decimals,
+        compression = options.compression
+    )
+
+
+def readOSM(path) -> etree.Element:
+    """
+    Parse an OSM file written by writeOSM, compressed or not (see compressionFromPath).
+
+    Returns
+    -------
+        osm_root: lxml.etree.Element, <osm> root.
+    """
+
+    compression = compressionFromPath(path)
+    if (compression == "gzip"):
+        with gzip.open(path, "rb") as file_in:
+            return etree.parse(file_in).getroot()
+    if (compression == "zstd"):
+        try:
+            import zstandard
+        except ImportError:
+            raise ImportError("zstd input needs the zstandard package (pip install zstandard)")
+        with open(path, "rb") as raw_in, zstandard.ZstdDecompressor().stream_reader(raw_in) as file_in:
+            return etree.parse(file_in).getroot()
+
+    return etree.parse(str(path)).getroot()
+
+
+def outputSizeReport(
+    osm_root: etree.Element,
+    options_list: list[OSMOutputOptions]
+) -> list[dict]:
+    """
+    Write one OSM tree in memory with each of the given options and measure it.
+    The tree itself is not modified, writeOSM works on copies.
+
+    Returns
+    -------
+        report: list[dict], per options: "format" label, "bytes", "write_secs" and
+            "size_ratio" vs the first options of the list.
+    """
+
+    report = []
+    for options in options_list:
+        buffer = io.BytesIO()
+
+        start = time.perf_counter()
+        writeOSMWithOptions(osm_root, buffer, options)
+        write_secs = time.perf_counter() - start
+
+        report.append({
+            "format": options.label,
+            "bytes": buffer.tell(),
+            "write_secs": write_secs,
+        })
+
+    for entry in report:
+        entry["size_ratio"] = entry["bytes"] / max(report[0]["bytes"], 1)
+
+    return report
+
+
+def addOutputArgs(parser: argparse.ArgumentParser):
+    """
+    Add the OSMOutputOptions command line flags to a parser.
+    """
+
+    parser.add_argument("--compact", action = "store_true", help = "no indentation")
+    parser.add_argument("--latlon-decimals", type = int, default = None,
+                        help = "round node lat/lon, e.g. 8 (about 1 mm)")
+    parser.add_argument("--metric-decimals", type = int, default = None,
+                        help = "round local_x/local_y/ele, e.g. 3 (1 mm)")
+    parser.add_argument("--compress", choices = list(COMPRESSION_SUFFIXES), default = None,
+                        help = "write .osm.gz / .osm.zst (zstd needs the zstandard package)")
+
+
+def outputOptionsFromArgs(args: argparse.Namespace) -> OSMOutputOptions:
+
+    return OSMOutputOptions(
+        pretty_print = not args.compact,
+        latlon_decimals = args.latlon_decimals,
+        metric_decimals = args.metric_decimals,
+        compression = args.compress
+    )
+
+
+def main(argv: list[str] = None):
+
+    parser = argparse.ArgumentParser(description = "Compare OSM output formats: size and write time per file.")
+    parser.add_argument("input_files", nargs = "+", help = "converted .osm files (.osm.gz also read)")
+    parser.add_argument("--latlon-decimals", type = int, default = 8)
+    parser.add_argument("--metric-decimals", type = int, default = 3)
+    args = parser.parse_args(argv)
+
+    rounded = {"latlon_decimals": args.latlon_decimals, "metric_decimals": args.metric_decimals}
+    options_list = [
+        OSMOutputOptions(),
+        OSMOutputOptions(pretty_print = False),
+        OSMOutputOptions(pretty_print = False, **rounded),
+        OSMOutputOptions(pretty_print = False, **rounded, compression = "gzip"),
+    ]
+    if (importlib.util.find_spec("zstandard") is not None):
+        options_list.append(OSMOutputOptions(pretty_print = False, **rounded, compression = "zstd"))
+    else:
+        print("zstandard not installed, skipping zstd")
+
+    for input_file in args.input_files:
+        print(input_file)
+        osm_root = etree.parse(str(input_file)).getroot()
+        for entry in outputSizeReport(osm_root, options_list):
+            print(
+                f"  {entry['format']:<36} {entry['bytes'] / 1024:>10.1f} KiB "
+                f"({entry['size_ratio'] * 100:5.1f}%)  {entry['write_secs'] * 1000:8.1f} ms"
+            )
+
+
+if __name__ == "__main__":
+    main()